@@ -16,6 +16,7 @@ import unittest
 import sys
 from inspect import stack
 from os.path import abspath, dirname, pardir, join
+from tempfile import mkdtemp
 
 # prevent python from writing *.pyc files / __pycache__ folders
 sys.dont_write_bytecode = True
@@ -31,6 +32,7 @@ import controller
 from PyQt5.QtWidgets import QApplication
 from autonomous_system.AS_operations import ASCreation
 from graph_generation.graph_dimension import GraphDimensionWindow
+from graphical_objects.graphical_site import GraphicalSite
 from graph_generation.multiple_nodes import MultipleNodes
 from graph_generation.multiple_links import MultipleLinks
 from ip_networks.arp_table import ARPTable
@@ -133,13 +135,56 @@ class TestFlow(unittest.TestCase):
         self.assertEqual(ek_flow, 19)  
         
     def test_dinic(self):
-        _, dinic_flow = self.nk.dinic(self.source, self.target)
+        link_flow, dinic_flow = self.nk.dinic(self.source, self.target)
         self.assertEqual(dinic_flow, 19)  
+        # the flow of each physical link is also written to the link
+        for plink, flow in zip(self.nk.plinks.values(), link_flow):
+            self.assertEqual((plink.flowSD, plink.flowDS), (flow, -flow))
+        # with float capacities, rounding can leave a tiny residual capacity
+        # on the bottleneck arc of an augmenting path
+        s, a, b, t = (self.nk.nf(name=name) for name in ('fs', 'fa', 'fb', 'ft'))
+        for source, destination, capacity in ((s, a, 56.27179081474245), 
+                    (a, t, 16.45989633993955), (a, b, 100), (b, t, 100)):
+            plink = self.nk.lf(source=source, destination=destination)
+            plink.capacitySD, plink.capacityDS = capacity, 0
+        _, dinic_flow = self.nk.dinic(s, t)
+        self.assertAlmostEqual(dinic_flow, 56.27179081474245)
+        pr_flow = self.nk.push_relabel(s, t)
+        self.assertAlmostEqual(pr_flow, 56.27179081474245)
     
+    def test_push_relabel(self):
+        pr_flow = self.nk.push_relabel(self.source, self.target)
+        self.assertEqual(pr_flow, 19)
+        # the flow is conserved at every node but the source and the target
+        for node in self.nk.nodes.values():
+            if node in (self.source, self.target):
+                continue
+            self.assertEqual(sum(plink.flowSD if plink.source == node else 
+                plink.flowDS for _, plink in self.nk.graph[node.id]['plink']), 0)
+        # without global relabeling, the gap heuristic lifts the nodes
+        pr_flow = self.nk.push_relabel(self.source, self.target, 1000)
+        self.assertEqual(pr_flow, 19)
+        
+    def test_gomory_hu_tree(self):
+        for workers in (1, 2):
+            tree = self.nk.gomory_hu_tree(workers)
+            self.assertEqual(tree.minimum_cut_value(self.source, self.target), 19)
+            value, nodes, plinks = tree.minimum_cut(self.source, self.target)
+            self.assertIn(self.source, nodes)
+            self.assertNotIn(self.target, nodes)
+            self.assertEqual(sum(plink.capacitySD for plink in plinks), value)
+        
     def test_LP_flow(self):
         LP_flow = self.nk.LP_MF_formulation(self.source, self.target)
         self.assertEqual(LP_flow, 19)   
         
+    def test_fork(self):
+        # the flow computed on a fork is not written to the physical links
+        fork = self.nk.fork()
+        self.assertEqual(fork.edmonds_karp(self.source, self.target), 19)
+        for plink in self.nk.plinks.values():
+            self.assertEqual((plink.flowSD, plink.flowDS), (0, 0))
+        
 class TestMST(unittest.TestCase):
  
     @start_pyNMS_and_import_project('test_mst.xls')
@@ -176,12 +221,197 @@ class TestSP(unittest.TestCase):
         for i, r in enumerate((self.route9, self.route10, self.route11)):
             _, path = self.nk.A_star(r[0], r[1])
             self.assertEqual(list(map(str, path)), self.results[i])
-        
+
+    def test_A_star_geographic(self):
+        # with costs proportional to the length of the physical links, the
+        # geographic heuristic is not null: A* must still return the
+        # shortest paths
+        for i, node in enumerate(self.nk.nodes.values()):
+            node.longitude, node.latitude = 2*i % 5, 3*i % 7
+        for plink in self.nk.plinks.values():
+            length = self.nk.haversine_distance(plink.source, plink.destination)
+            plink.costSD, plink.costDS = 2*length + 1, 3*length + 1
+        for r in (self.route9, self.route10, self.route11):
+            dist, _, _ = self.nk.dijkstra(r[0], r[1])
+            nodes, path = self.nk.A_star(r[0], r[1])
+            self.assertEqual((nodes[0], nodes[-1]), r)
+            self.assertAlmostEqual(self.path_cost(nodes, path), dist[r[1]])
+        # the heuristic is computed once, until the coordinates change
+        geographic = self.nk.geographic
+        self.nk.A_star(*self.route9)
+        self.assertIs(self.nk.geographic, geographic)
+        for node in self.nk.nodes.values():
+            node.longitude, node.latitude = 10*node.longitude, 10*node.latitude
+        for r in (self.route9, self.route10, self.route11):
+            dist, _, _ = self.nk.dijkstra(r[0], r[1])
+            nodes, path = self.nk.A_star(r[0], r[1])
+            self.assertAlmostEqual(self.path_cost(nodes, path), dist[r[1]])
+        self.assertIsNot(self.nk.geographic, geographic)
+
+    def test_k_shortest_paths(self):
+        for i, r in enumerate((self.route9, self.route10, self.route11)):
+            paths = list(self.nk.k_shortest_paths(r[0], r[1], 5))
+            self.assertEqual(list(map(str, paths[0][1])), self.results[i])
+            costs = [self.path_cost(*path) for path in paths]
+            self.assertEqual(costs, sorted(costs))
+            # all paths are loop-free, and different
+            for nodes, _ in paths:
+                self.assertEqual(len(set(nodes)), len(nodes))
+            self.assertEqual(len({tuple(path) for _, path in paths}), len(paths))
+
+    def path_cost(self, nodes, path):
+        return sum(plink.costSD if plink.source == node else plink.costDS
+                                        for node, plink in zip(nodes, path))
+
     def test_bellman_ford(self):
         for i, r in enumerate((self.route9, self.route10, self.route11)):
             _, path = self.nk.bellman_ford(r[0], r[1])
             self.assertEqual(list(map(str, path)), self.results[i])
-        
+
+    def test_spfa(self):
+        for i, r in enumerate((self.route9, self.route10, self.route11)):
+            _, path = self.nk.spfa(r[0], r[1])
+            self.assertEqual(list(map(str, path)), self.results[i])
+        # a physical link with a negative cost in both directions is a 
+        # negative cycle
+        plink = self.nk.pn['plink'][self.nk.name_to_id['ethernet link1']]
+        plink.costSD = plink.costDS = -1
+        nodes, cycle = self.nk.spfa(*self.route9, cycle=True)
+        self.assertEqual((nodes[0], cycle), (nodes[-1], [plink, plink]))
+            
+    def test_dijkstra(self):
+        for i, r in enumerate((self.route9, self.route10, self.route11)):
+            _, path, _ = self.nk.dijkstra(r[0], r[1])
+            self.assertEqual(list(map(str, path)), self.results[i])
+
+    def test_bidirectional_dijkstra(self):
+        for i, r in enumerate((self.route9, self.route10, self.route11)):
+            _, path = self.nk.bidirectional_dijkstra(r[0], r[1])
+            self.assertEqual(list(map(str, path)), self.results[i])
+
+    def test_contraction_hierarchy(self):
+        self.nk.build_contraction_hierarchy()
+        for i, r in enumerate((self.route9, self.route10, self.route11)):
+            _, path = self.nk.CH_shortest_path(r[0], r[1])
+            self.assertEqual(list(map(str, path)), self.results[i])
+        # the hierarchy is saved with the project and can be reloaded as
+        # long as the costs are the same
+        filepath = join(mkdtemp(), 'test_SP.xls.ch')
+        self.nk.save_contraction_hierarchy(filepath)
+        self.nk.hierarchy = None
+        self.assertIsNotNone(self.nk.load_contraction_hierarchy(filepath))
+        _, path = self.nk.CH_shortest_path(*self.route9)
+        self.assertEqual(list(map(str, path)), self.results[0])
+        # it is invalidated when a cost changes
+        plink = self.nk.pn['plink'][self.nk.name_to_id['ethernet link1']]
+        plink.costSD += 1
+        self.assertIsNone(self.nk.contraction_hierarchy())
+        self.assertIsNone(self.nk.load_contraction_hierarchy(filepath))
+
+    def test_shortest_paths_bulk(self):
+        routes = (self.route9, self.route10, self.route11)
+        for workers in (1, 2):
+            result = self.nk.shortest_paths_bulk(routes, workers=workers)
+            self.assertEqual(len(result), 3)
+            for i, r in enumerate(routes):
+                nodes, path = result.path(i)
+                self.assertEqual(list(map(str, path)), self.results[i])
+                self.assertEqual(self.path_cost(nodes, path), result.distance(i))
+        result = self.nk.shortest_paths_bulk(routes, 'spfa', workers=1)
+        self.assertEqual(list(map(str, result.path(0)[1])), self.results[0])
+        # with a negative cycle, spfa and its bulk version find no path
+        plink = self.nk.pn['plink'][self.nk.name_to_id['ethernet link1']]
+        plink.costSD = plink.costDS = -1
+        result = self.nk.shortest_paths_bulk(routes, 'spfa', workers=1)
+        for i, r in enumerate(routes):
+            self.assertEqual(result.path(i), self.nk.spfa(*r))
+            self.assertEqual(result.path(i), ([], []))
+
+    def test_update_spt(self):
+        tree = self.nk.shortest_path_tree(self.route9[0])
+        plink = self.nk.pn['plink'][self.nk.name_to_id['ethernet link1']]
+        # failure of a physical link of the tree: the repaired tree is the
+        # tree computed without this physical link
+        self.nk.failed_obj.add(plink)
+        repaired = self.nk.update_spt(tree, [plink])
+        allowed_plinks = set(self.nk.plinks.values()) - {plink}
+        expected = self.nk.shortest_path_tree(self.route9[0], 
+                                            allowed_plinks=allowed_plinks)
+        self.assertEqual(repaired.distances(), expected.distances())
+        # recovery with a higher cost
+        self.nk.failed_obj.discard(plink)
+        plink.costSD = plink.costDS = 100
+        repaired = self.nk.update_spt(repaired, [plink])
+        expected = self.nk.shortest_path_tree(self.route9[0])
+        self.assertEqual(repaired.distances(), expected.distances())
+        # a physical link excluded by the caller stays excluded after a 
+        # change, whether the tree is repaired or computed again
+        allowed_plinks = set(tree.links()) - {plink}
+        tree = self.nk.shortest_path_tree(self.route9[0], 
+                                            allowed_plinks=allowed_plinks)
+        plink.costSD = plink.costDS = 1
+        repaired = self.nk.update_spt(tree, [plink])
+        self.assertNotIn(plink, repaired.links())
+        self.assertEqual(repaired.distances(), tree.distances())
+        self.nk.nf(name='isolated node')
+        rebuilt = self.nk.update_spt(tree, [plink])
+        self.assertNotIn(plink, rebuilt.links())
+        self.assertEqual(rebuilt.distance(self.route9[1]), 
+                                            tree.distance(self.route9[1]))
+
+    def test_disjoint_paths(self):
+        costs = {plink: (plink.costSD, plink.costDS) 
+                                        for plink in self.nk.plinks.values()}
+        for r in (self.route9, self.route10, self.route11):
+            paths = self.nk.disjoint_paths(r[0], r[1], 2)
+            self.assertEqual(len(paths), 2)
+            plinks = [plink for _, path in paths for plink in path]
+            self.assertEqual(len(plinks), len(set(plinks)))
+            # the shortest pair is at most as long as the shortest path plus
+            # any path that avoids its physical links
+            first = self.nk.A_star(r[0], r[1])
+            second = self.nk.A_star(r[0], r[1], excluded_plinks=set(first[1]))
+            self.assertLessEqual(sum(self.path_cost(*p) for p in paths),
+                        self.path_cost(*first) + self.path_cost(*second))
+            for nodes, _ in self.nk.disjoint_paths(r[0], r[1], 2, 'node'):
+                self.assertEqual((nodes[0], nodes[-1]), r)
+            # without shared risk link groups, SRLG-disjoint paths are 
+            # link-disjoint paths
+            srlgs = {plink: {i} for i, plink in enumerate(plinks)}
+            self.assertEqual(len(self.nk.disjoint_paths(r[0], r[1], 2, 'srlg',
+                                                            srlgs=srlgs)), 2)
+        # the costs were not modified
+        self.assertEqual(costs, {plink: (plink.costSD, plink.costDS) 
+                                    for plink in self.nk.plinks.values()})
+        # two parallel routes through a shared node: with no group, SRLG 
+        # mode is link mode (and not node mode)
+        s, m, t = (self.nk.nf(name=name) for name in ('s', 'm', 't'))
+        for source, destination in ((s, m), (s, m), (m, t), (m, t)):
+            self.nk.lf(source=source, destination=destination)
+        self.assertEqual(len(self.nk.disjoint_paths(s, t, 2, 'link')), 2)
+        self.assertEqual(len(self.nk.disjoint_paths(s, t, 2, 'node')), 1)
+        for srlgs in (None, {}):
+            self.assertEqual(len(self.nk.disjoint_paths(s, t, 2, 'srlg', 
+                                                        srlgs=srlgs)), 2)
+        with self.assertRaises(ValueError):
+            self.nk.disjoint_paths(s, t, 2, 'slrg')
+        # negative costs are not supported
+        next(iter(self.nk.plinks.values())).costSD = -1
+        self.assertEqual(self.nk.disjoint_paths(*self.route9), [])
+
+    def test_spt_cache(self):
+        # all routes start from node0: they share the same tree
+        trees = {self.nk.shortest_path_tree(r[0]) for r in
+                                    (self.route9, self.route10, self.route11)}
+        self.assertEqual(len(trees), 1)
+        tree ,= trees
+        for i, r in enumerate((self.route9, self.route10, self.route11)):
+            self.assertEqual(list(map(str, tree.path(r[1])[1])), self.results[i])
+        # the cache is emptied when a cost changes
+        plink = self.nk.pn['plink'][self.nk.name_to_id['ethernet link1']]
+        plink.costSD += 1
+        self.assertIsNot(self.nk.shortest_path_tree(self.route9[0]), tree)
+
     def test_floyd_warshall(self):
         cost_plink = lambda plink: plink.costSD
         all_length = self.nk.floyd_warshall()
@@ -189,7 +419,18 @@ class TestSP(unittest.TestCase):
             path_length = all_length[r[0]][r[1]]
             _, path = self.nk.A_star(r[0], r[1])
             self.assertEqual(sum(map(cost_plink, path)), path_length)
-            
+
+    def test_all_pairs(self):
+        for engine in ('dijkstra', 'floyd_warshall'):
+            all_pairs = self.nk.all_pairs_shortest_paths(engine)
+            for i, r in enumerate((self.route9, self.route10, self.route11)):
+                _, path = all_pairs.path(r[0], r[1])
+                self.assertEqual(list(map(str, path)), self.results[i])
+        # the result is cached until the topology changes
+        self.assertIs(self.nk.all_pairs_shortest_paths(), all_pairs)
+        self.nk.lf(source=self.route9[0], destination=self.route9[1])
+        self.assertIsNot(self.nk.all_pairs_shortest_paths(), all_pairs)
+
     def test_LP(self):
         for i, r in enumerate((self.route9, self.route10, self.route11)):
             path = self.nk.LP_SP_formulation(r[0], r[1])
@@ -207,9 +448,9 @@ class TestMCF(unittest.TestCase):
     
     @start_pyNMS_and_import_project('test_mcf.xls')
     def setUp(self):
-        source = self.nk.pn['node'][self.nk.name_to_id['node1']]
-        target = self.nk.pn['node'][self.nk.name_to_id['node4']]
-        self.nk.LP_MCF_formulation(source, target, 12)
+        self.source = self.nk.pn['node'][self.nk.name_to_id['node1']]
+        self.target = self.nk.pn['node'][self.nk.name_to_id['node4']]
+        self.nk.LP_MCF_formulation(self.source, self.target, 12)
  
     def tearDown(self):
         self.app.quit()
@@ -218,6 +459,40 @@ class TestMCF(unittest.TestCase):
         for plink_name, flow in self.results:
             plink = self.nk.pn['plink'][self.nk.name_to_id[plink_name]]
             self.assertEqual(plink.flowSD, flow)
+            
+    def test_SSP_MCF(self):
+        plinks = self.nk.pn['plink'].values()
+        LP_cost = sum(plink.flowSD*plink.costSD + plink.flowDS*plink.costDS 
+                                                        for plink in plinks)
+        cost = self.nk.SSP_MCF(self.source, self.target, 12)
+        self.assertEqual(cost, LP_cost)
+        for plink_name, flow in self.results:
+            plink = self.nk.pn['plink'][self.nk.name_to_id[plink_name]]
+            self.assertEqual(plink.flowSD, flow)
+        # supplies and demands on several nodes
+        node2 = self.nk.pn['node'][self.nk.name_to_id['node2']]
+        cost = self.nk.minimum_cost_flow({self.source: 12, node2: -5, 
+                                                        self.target: -7})
+        self.assertLess(cost, LP_cost)
+        # more flow than the network can carry
+        cost = self.nk.SSP_MCF(self.source, self.target, 1000)
+        self.assertEqual(cost, float('inf'))
+        # the supplies do not match the demands: nothing is written
+        self.nk.SSP_MCF(self.source, self.target, 12)
+        flows = {plink: plink.flowSD for plink in plinks}
+        cost = self.nk.minimum_cost_flow({self.source: 2, node2: -5})
+        self.assertEqual(cost, float('inf'))
+        self.assertEqual(flows, {plink: plink.flowSD for plink in plinks})
+        # float supplies that only match up to rounding
+        cost = self.nk.minimum_cost_flow({self.source: .1, node2: .2, 
+                                                        self.target: -.3})
+        self.assertLess(cost, float('inf'))
+        self.nk.SSP_MCF(self.source, self.target, 12)
+        # neither are they with a negative cost
+        next(iter(plinks)).costDS = -1
+        cost = self.nk.SSP_MCF(self.source, self.target, 1)
+        self.assertEqual(cost, float('inf'))
+        self.assertEqual(flows, {plink: plink.flowSD for plink in plinks})
         
 class TestISIS(unittest.TestCase):
     
@@ -369,6 +644,28 @@ class TestCSPF(unittest.TestCase):
                             excluded_plinks={plink15}, excluded_nodes={node4})
         self.assertEqual(list(map(str, path)), self.results[5])
         
+    def test_constrained_shortest_path(self):
+        node2, node3, node6, node7 = (self.nk.nf(name='node' + str(i)) 
+                                                    for i in (2, 3, 6, 7))
+        plink13 = self.nk.lf(name='plink13')
+        CSPF = self.nk.constrained_shortest_path
+        for i, parameters in enumerate((
+                                        {},
+                                        {'waypoints': [node2]},
+                                        {'waypoints': [node3, node2]},
+                                        {'excluded_plinks': {plink13}}
+                                        )):
+            _, path = CSPF(node6, node7, **parameters)
+            self.assertEqual(list(map(str, path)), self.results[i])
+        # the shortest path has 6 physical links: with at most 5, we get 
+        # the cheapest path among the longer ones
+        _, path = CSPF(node6, node7, max_hops=5)
+        self.assertEqual(list(map(str, path)), 
+                        ['plink13', 'plink3', 'plink7', 'plink10', 'plink11'])
+        # no physical link can carry more than its capacity
+        _, path = CSPF(node6, node7, bandwidth=float('inf'))
+        self.assertEqual(path, [])
+        
 class TestRWA(unittest.TestCase):
      
     @start_pyNMS_and_import_project('test_RWA.xls')
@@ -379,8 +676,8 @@ class TestRWA(unittest.TestCase):
         self.app.quit()
         
     def test_RWA(self):
-        project_new_graph = self.nk.RWA_graph_transformation()
-        self.assertEqual(project_new_graph.network.LP_RWA_formulation(), 3)
+        new_graph = self.nk.RWA_graph_transformation()
+        self.assertEqual(new_graph.LP_RWA_formulation(), 3)
 
 ## Graph generation and IGP simulation
 
@@ -554,6 +851,275 @@ class TestMultipleObjectGeneration(unittest.TestCase):
         # there should be 9 links in total
         self.assertEqual(len(self.nk.pn['plink']), 9)
         
+class TestBulkConstruction(unittest.TestCase):
+     
+    @start_pyNMS
+    def setUp(self):
+        pass
+ 
+    def tearDown(self):
+        self.app.quit()
+        
+    def test_bulk_construction(self):
+        names = ['router' + str(i) for i in range(10)]
+        routers = self.nk.bulk_add_nodes('router', {'name': names})
+        self.assertEqual(len(self.nk.pn['node']), 10)
+        self.assertEqual([r.name for r in routers], names)
+        
+        # a ring of links: node names are converted to nodes
+        links = self.nk.bulk_add_links('ethernet link', names, 
+                            names[1:] + names[:1], {'costSD': [2]*10})
+        self.assertEqual(len(self.nk.pn['plink']), 10)
+        self.assertEqual(len(self.nk.interfaces), 20)
+        self.assertEqual(links[0].costSD, 2)
+        self.assertEqual(links[0].costDS, 1)
+        self.assertTrue(self.nk.is_connected(routers[0], routers[1], 'plink'))
+        
+        # existing names, and names repeated in the batch, update the link
+        plink = self.nk.lf(source=routers[0], destination=routers[5], name='x')
+        links = self.nk.bulk_add_links('ethernet link', names[:3], names[3:6], 
+                            {'name': ['x', 'y', 'y'], 'costSD': [3, 4, 5]})
+        self.assertEqual(len(self.nk.pn['plink']), 12)
+        self.assertIs(links[0], plink)
+        self.assertIs(links[1], links[2])
+        self.assertEqual(plink.costSD, 3)
+        self.assertEqual(links[1].costSD, 5)
+        self.assertIs(self.nk.pn['plink'][self.nk.name_to_id['x']], plink)
+        self.assertEqual(plink.destination, routers[5])
+        
+class TestIndexes(unittest.TestCase):
+     
+    @start_pyNMS
+    def setUp(self):
+        self.a, self.b = self.nk.nf(name='a'), self.nk.nf(name='b')
+        self.c = self.nk.nf(subtype='switch', name='c')
+        self.ab = self.nk.lf(source=self.a, destination=self.b)
+        self.bc = self.nk.lf(source=self.b, destination=self.c)
+        self.ca = self.nk.lf(source=self.c, destination=self.a)
+ 
+    def tearDown(self):
+        self.app.quit()
+        
+    def test_subtype_indexes(self):
+        self.assertEqual(set(self.nk.ftr('node', 'router')), {self.a, self.b})
+        self.assertEqual(set(self.nk.ftr('node', 'router', 'switch')), 
+                                                    {self.a, self.b, self.c})
+        self.assertEqual(len(list(self.nk.ftr('plink', 'ethernet link'))), 3)
+        # the subtypes that are not of the given type are ignored
+        self.assertFalse(list(self.nk.ftr('node', 'ethernet link')))
+        self.assertEqual(len(list(self.nk.ftr('interface', 
+                                                'ethernet interface'))), 6)
+        self.assertEqual(set(self.nk.gftr(self.b, 'plink', 'ethernet link')),
+                                    {(self.a, self.ab), (self.c, self.bc)})
+        self.assertEqual(set(self.nk.gftr(self.b, 'plink', 'ethernet link', 
+                                            ud=False)), {(self.c, self.bc)})
+        self.assertTrue(self.nk.is_connected(self.b, self.a, 'plink'))
+        self.assertEqual(self.nk.number_of_links_between(self.a, self.b), 1)
+        
+    def test_slotted_objects(self):
+        # the side tables are only allocated when they are first read
+        self.assertFalse(hasattr(self.a, '_AS'))
+        self.assertFalse(self.a.AS)
+        self.assertTrue(hasattr(self.a, '_AS'))
+        # the declared properties are stored in slots, not in a dictionnary
+        for obj in (self.a, self.c, self.ab, self.ab.interfaceS):
+            self.assertFalse(obj.__dict__)
+        self.assertEqual(self.a.attributes()['name'], 'a')
+        # properties defined by the user are still stored
+        self.a.update_properties({'user property': 'value'})
+        self.assertEqual(getattr(self.a, 'user property'), 'value')
+        self.assertEqual(self.a.attributes()['user property'], 'value')
+        
+    def test_remove_link(self):
+        self.nk.remove_link(self.ab)
+        self.assertNotIn(self.ab, self.nk.ftr('plink', 'ethernet link'))
+        self.assertNotIn(self.ab.interfaceS, self.nk.ftr('interface', 
+                                                        'ethernet interface'))
+        self.assertEqual(set(self.nk.gftr(self.a, 'plink', 'ethernet link')),
+                                                        {(self.c, self.ca)})
+        self.assertFalse(self.nk.is_connected(self.a, self.b, 'plink'))
+        self.assertNotIn(self.ab.name, self.nk.name_to_id)
+        
+    def test_remove_node(self):
+        for link in list(self.nk.remove_node(self.a)):
+            self.nk.remove_link(link)
+        self.assertEqual(set(self.nk.ftr('node', 'router')), {self.b})
+        self.assertEqual(set(self.nk.ftr('plink', 'ethernet link')), {self.bc})
+        self.assertEqual(set(self.nk.gftr(self.c, 'plink', 'ethernet link')),
+                                                        {(self.b, self.bc)})
+        self.assertFalse(self.nk.is_connected(self.c, self.a, 'plink'))
+        self.assertNotIn('a', self.nk.name_to_id)
+        
+    def test_remove_many(self):
+        removed = self.nk.remove_many([self.a, self.bc])
+        self.assertEqual(removed, {self.a, self.ab, self.bc, self.ca})
+        self.assertEqual(set(self.nk.ftr('node', 'router', 'switch')), 
+                                                        {self.b, self.c})
+        self.assertFalse(list(self.nk.ftr('plink', 'ethernet link')))
+        self.assertFalse(list(self.nk.ftr('interface', 'ethernet interface')))
+        self.assertFalse(self.nk.interfaces)
+        self.assertFalse(list(self.nk.gftr(self.b, 'plink', 'ethernet link')))
+        self.assertFalse(self.nk.pair_links)
+        self.assertEqual(set(self.nk.name_to_id), {'b', 'c'})
+        
+class TestJournal(unittest.TestCase):
+     
+    @start_pyNMS
+    def setUp(self):
+        pass
+ 
+    def tearDown(self):
+        self.app.quit()
+        
+    def test_journal(self):
+        source, destination = self.nk.nf(name='s'), self.nk.nf(name='d')
+        plink = self.nk.lf(source=source, destination=destination)
+        version = self.nk.version
+        snapshot = self.nk.compile()
+        self.assertIs(self.nk.compile(), snapshot)
+        
+        plink.costSD = 5
+        self.nk.failed_obj = {plink}
+        changes = [entry[1:] for entry in self.nk.journal.since(version)]
+        self.assertEqual(changes, [
+                                   ('update', plink, 'costSD'), 
+                                   ('failure', plink, None)
+                                   ])
+        self.assertEqual(self.nk.version, version + 2)
+        self.assertIsNot(self.nk.compile(), snapshot)
+
+    def test_failure_set(self):
+        source, destination = self.nk.nf(name='s'), self.nk.nf(name='d')
+        plink = self.nk.lf(source=source, destination=destination)
+        failed_obj, version = self.nk.failed_obj, self.nk.version
+        failed_obj.add(plink)
+        failed_obj.intersection_update(set())
+        failed_obj ^= {source}
+        failed_obj &= {plink}
+        changes = [entry[1:] for entry in self.nk.journal.since(version)]
+        self.assertEqual(changes, [
+                                   ('failure', plink, None),
+                                   ('recovery', plink, None),
+                                   ('failure', source, None),
+                                   ('recovery', source, None)
+                                   ])
+        self.assertIs(self.nk.failed_obj, failed_obj)
+        # a batch that creates nothing does not change the version
+        version = self.nk.version
+        self.nk.bulk_add_nodes('router', {'name': []})
+        self.nk.bulk_add_nodes('router', {'name': ['s']})
+        self.assertEqual(self.nk.version, version)
+
+class TestConnectivity(unittest.TestCase):
+     
+    @start_pyNMS
+    def setUp(self):
+        pass
+ 
+    def tearDown(self):
+        self.app.quit()
+        
+    def test_connectivity(self):
+        a, b, c = (self.nk.nf(name=name) for name in 'abc')
+        self.nk.lf(source=a, destination=b)
+        plink = self.nk.lf(source=b, destination=c)
+        self.assertTrue(self.nk.same_component(a, c))
+        self.nk.failed_obj = {plink}
+        self.assertFalse(self.nk.same_component(a, c))
+        self.assertEqual(len(list(self.nk.connected_components())), 2)
+        self.nk.failed_obj = set()
+        self.assertTrue(self.nk.same_component(a, c))
+        # removed nodes no longer belong to any component
+        d = self.nk.nf(name='d')
+        self.assertEqual(self.nk.component_of(d), d)
+        self.nk.remove_many([d])
+        self.assertIsNone(self.nk.component_of(d))
+        self.nk.remove_many([c])
+        for node in (c, d):
+            self.assertIsNone(self.nk.component_of(node))
+            self.assertFalse(self.nk.same_component(node, node))
+        self.assertTrue(self.nk.same_component(a, b))
+
+    def test_path_finder_failure(self):
+        a, b, c, d = (self.nk.nf(subtype='switch', name=name) for name in 'abcd')
+        self.nk.lf(source=a, destination=b)
+        plink = self.nk.lf(source=b, destination=c)
+        for source, destination in ((a, d), (d, c)):
+            self.nk.lf(source=source, destination=destination).costSD = 5
+        traffic = self.nk.lf(subtype='routed traffic', source=a, destination=c)
+        self.nk.path_finder()
+        self.assertIn(plink, traffic.path)
+        # with a failure, the demand is routed on the other path
+        self.nk.failed_obj = {plink}
+        self.nk.path_finder()
+        self.assertEqual(len(traffic.path), 2)
+        self.assertNotIn(plink, traffic.path)
+        # a failed transit node is avoided as well, whether the path is 
+        # found with a point-to-point search or a shortest path tree
+        self.nk.failed_obj = {b}
+        self.nk.path_finder()
+        self.assertEqual(traffic.path, [plink for plink in self.nk.plinks.values()
+                                        if d in (plink.source, plink.destination)])
+        other = self.nk.lf(subtype='routed traffic', source=a, destination=c)
+        self.nk.path_finder()
+        for demand in (traffic, other):
+            self.assertEqual(len(demand.path), 2)
+            self.assertNotIn(plink, demand.path)
+
+    def test_path_finder_fork(self):
+        a, b, c = (self.nk.nf(subtype='switch', name=name) for name in 'abc')
+        ab, bc = self.nk.lf(source=a, destination=b), self.nk.lf(source=b,
+                                                            destination=c)
+        ac = self.nk.lf(source=a, destination=c)
+        ac.costSD = ac.costDS = 5
+        traffic = self.nk.lf(subtype='routed traffic', source=a, destination=c)
+        self.nk.path_finder()
+        self.assertEqual(traffic.path, [ab, bc])
+        # the path found on a fork is only stored in the fork
+        fork = self.nk.fork()
+        fork.failed_obj = {ab}
+        fork.path_finder()
+        self.assertEqual(fork.value(traffic, 'path'), [ac])
+        self.assertEqual(traffic.path, [ab, bc])
+        self.assertFalse(self.nk.failed_obj)
+        ab.trafficSD = 3
+        fork.reset_traffic()
+        self.assertEqual((ab.trafficSD, fork.value(ab, 'trafficSD')), (3, 0))
+
+class TestSiteRemoval(unittest.TestCase):
+     
+    @start_pyNMS
+    def setUp(self):
+        pass
+ 
+    def tearDown(self):
+        self.app.quit()
+        
+    def test_site_removal(self):
+        a, b = self.nk.nf(name='a'), self.nk.nf(name='b')
+        plink = self.nk.lf(source=a, destination=b)
+        self.vw.refresh_display()
+        site = self.pj.site_view.network.nf(subtype='site', name='site')
+        GraphicalSite(self.pj.site_view, site)
+        site.view.add_to_site(plink)
+        self.assertEqual(set(site.view.gobj), {a, b, plink})
+        gnode = a.gnode[site.view]
+        
+        # the attached link is removed from the site view as well
+        self.vw.remove_objects(a.gnode[self.vw])
+        self.assertEqual(site.ps, {'node': {b}, 'link': set()})
+        self.assertEqual(set(site.view.gobj), {b})
+        self.assertNotIn(gnode, site.view.scene.items())
+        self.assertFalse(a.gnode)
+        self.assertFalse(plink.glink)
+        # objects removed in bulk without any AS or site: the side tables
+        # are not created
+        c, d = self.nk.nf(name='c'), self.nk.nf(name='d')
+        plink = self.nk.lf(source=c, destination=d)
+        self.nk.remove_many([c, d])
+        for obj in (c, d, plink):
+            self.assertFalse(hasattr(obj, '_AS') or hasattr(obj, '_sites'))
+        
 if str.__eq__(__name__, '__main__'):
     unittest.main(warnings='ignore')  
     unittest.main()
\ No newline at end of file
@@ -94,7 +94,7 @@ def napalm_load_merge(credentials, *nodes):
     for node in nodes:
         device = open_device(credentials, node)
         config = node.napalm_data['Configuration']['candidate']
-        j2_config = Template(config).render(**node.__dict__)
+        j2_config = Template(config).render(**node.attributes())
         device.load_merge_candidate(config=j2_config)
         napalm_update(device, node, {'Configuration'})
         device.close()
@@ -103,7 +103,7 @@ def napalm_load_merge_commit(credentials, *nodes):
     for node in nodes:
         device = open_device(credentials, node)
         config = node.napalm_data['Configuration']['candidate']
-        j2_config = Template(config).render(**node.__dict__)
+        j2_config = Template(config).render(**node.attributes())
         device.load_merge_candidate(config=j2_config)
         device.commit_config()
         napalm_update(device, node, {'Configuration'})
@@ -113,7 +113,7 @@ def napalm_load_replace(credentials, *nodes):
     for node in nodes:
         device = open_device(credentials, node)
         config = node.napalm_data['Configuration']['candidate']
-        j2_config = Template(config).render(**node.__dict__)
+        j2_config = Template(config).render(**node.attributes())
         device.load_replace_candidate(config=j2_config)
         napalm_update(device, node, {'Configuration'})
         device.close()
@@ -122,7 +122,7 @@ def napalm_load_replace_commit(credentials, *nodes):
     for node in nodes:
         device = open_device(credentials, node)
         config = node.napalm_data['Configuration']['candidate']
-        j2_config = Template(config).render(**node.__dict__)
+        j2_config = Template(config).render(**node.attributes())
         device.load_replace_candidate(config=j2_config)
         device.commit_config()
         napalm_update(device, node, {'Configuration'})
@@ -65,7 +65,7 @@ class SendScriptWindow(QWidget):
             netmiko_connection = ConnectHandler(**connection_parameters)
             
             # turn the script into a Jinja2 template
-            j2_config = Template(config).render(**node.__dict__)
+            j2_config = Template(config).render(**node.attributes())
             
             # send the script line per line
             for line in j2_config.splitlines():
@@ -17,7 +17,6 @@ from collections import defaultdict
 from miscellaneous.network_functions import mac_comparer
 from heapq import heappop, heappush
 from . import area
-from . import AS_management
 
 class AutonomousSystem(object):
     
@@ -26,7 +25,7 @@ class AutonomousSystem(object):
 
     def __init__(
                  self, 
-                 view,
+                 network,
                  name, 
                  id,
                  links = set(), 
@@ -34,8 +33,7 @@ class AutonomousSystem(object):
                  imp = False
                  ):
                      
-        self.view = view
-        self.network = self.view.network
+        self.network = network
         self.name = name
         self.id = id
         self.links = links
@@ -134,8 +132,8 @@ class VLAN_AS(ASWithArea, Ethernet_AS):
         super().__init__(*args)
         is_imported = args[-1]
         
-        # management window of the AS 
-        self.management = AS_management.VLAN_Management(self, is_imported)
+        # management window of the AS (created by the network observer)
+        self.management = self.network.observer.AS_management(self, is_imported)
                 
         if not is_imported:
             self.area_factory(
@@ -163,8 +161,8 @@ class STP_AS(Ethernet_AS):
         self.root = None
         self.SPT_links = set()
         
-        # management window of the AS 
-        self.management = AS_management.STP_Management(self, is_imported)
+        # management window of the AS (created by the network observer)
+        self.management = self.network.observer.AS_management(self, is_imported)
                 
         # set the default per-AS properties of all AS objects
         self.add_to_AS(*(self.nodes | self.links))
@@ -271,8 +269,8 @@ class RIP_AS(IP_AS):
         super().__init__(*args)
         is_imported = args[-1]
         
-        # management window of the AS 
-        self.management = AS_management.RIP_Management(self, is_imported)
+        # management window of the AS (created by the network observer)
+        self.management = self.network.observer.AS_management(self, is_imported)
         
         # the metric used to compute the shortest path. By default, it is 
         # a hop count for a RIP AS, and bandwidth-dependent for ISIS or OSPF.
@@ -359,8 +357,8 @@ class ISIS_AS(ASWithArea, IP_AS):
         is_imported = args[-1]
         self.ref_bw = 10000 # (kbps)
         
-        # management window of the AS 
-        self.management = AS_management.ISIS_Management(self, is_imported)
+        # management window of the AS (created by the network observer)
+        self.management = self.network.observer.AS_management(self, is_imported)
         
         # contains all L1/L2 nodes
         self.border_routers = set()
@@ -532,7 +530,7 @@ class OSPF_AS(ASWithArea, IP_AS):
         self.ref_bw = 10**8
 
         # management window of the AS
-        self.management = AS_management.OSPF_Management(self, is_imported)
+        self.management = self.network.observer.AS_management(self, is_imported)
         
         # contains all ABRs
         self.border_routers = set()
@@ -674,7 +672,7 @@ class BGP_AS(ASWithArea, IP_AS):
         is_imported = args[-1]
 
         # management window of the AS
-        self.management = AS_management.BGP_Management(self, is_imported)
+        self.management = self.network.observer.AS_management(self, is_imported)
         
         # set the default per-AS properties of all AS objects
         self.add_to_AS(*(self.nodes | self.links))
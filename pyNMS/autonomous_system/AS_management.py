@@ -19,11 +19,11 @@ from PyQt5.QtWidgets import (QApplication, QCheckBox, QGridLayout, QGroupBox,
 
 class ASManagement(QTabWidget):
     
-    def __init__(self, AS, is_imported):
+    def __init__(self, AS, is_imported, view):
         super().__init__()
         self.AS = AS
-        self.view = AS.view
-        self.network = self.AS.view.network
+        self.view = view
+        self.network = self.AS.network
         self.setMinimumSize(300, 300)
         self.dict_listbox = {}
         self.setWindowTitle('Manage AS')
@@ -123,7 +123,7 @@ class ASManagement(QTabWidget):
         
     # function to highlight the selected object on the canvas
     def highlight_object(self, obj_type):
-        self.AS.view.scene.clearSelection() 
+        self.view.scene.clearSelection() 
         for selected_item in self.dict_listbox[obj_type].selectedItems():
             obj = self.network.of(name=selected_item.text(), _type=obj_type)
             obj.gobject.setSelected(True)
@@ -236,7 +236,7 @@ class ASManagementWithArea(ASManagement):
             
     # function to highlight the selected object on the canvas
     def highlight_area_object(self, obj_type):        
-        self.AS.view.scene.clearSelection()
+        self.view.scene.clearSelection()
         lb = self.area_nodes_list if obj_type == 'node' else self.area_links_list
         for selected_item in lb.selectedItems():
             selected_object = self.network.of(name=selected_item.text(), _type=obj_type)
@@ -325,11 +325,11 @@ class STP_Management(ASManagement):
         button_elect_root.grid(2, 0, in_=lf_stp_specifics)
         
     def highlight_SPT(self):
-        self.AS.view.highlight_objects(*self.AS.SPT_links)
+        self.view.highlight_objects(*self.AS.SPT_links)
         
     def elect_root(self):
         self.AS.root_election()
-        self.AS.view.highlight_objects(self.AS.root)
+        self.view.highlight_objects(self.AS.root)
         
 class VLAN_Management(ASManagementWithArea):
     
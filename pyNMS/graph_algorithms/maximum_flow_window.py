@@ -28,6 +28,7 @@ class MaximumFlowWindow(QWidget):
     'Ford-Fulkerson',
     'Edmond-Karps', 
     'Dinic', 
+    'Push-relabel',
     'Linear programming'
     )
     
@@ -70,6 +71,7 @@ class MaximumFlowWindow(QWidget):
                     'Ford-Fulkerson': self.network.ford_fulkerson,
                     'Edmond-Karps': self.network.edmonds_karp,
                     'Dinic': self.network.dinic,
+                    'Push-relabel': self.network.push_relabel,
                     'Linear programming': self.network.LP_MF_formulation
                     }[self.mf_list.currentText()]
         maximum_flow = algorithm(source, destination)   
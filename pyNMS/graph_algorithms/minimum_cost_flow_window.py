@@ -24,7 +24,7 @@ from PyQt5.QtWidgets import (
 
 class MCFlowWindow(QWidget):
     
-    algorithms = ('Linear programming', 'Klein')
+    algorithms = ('Linear programming', 'Successive shortest paths')
     
     def __init__(self, controller):
         super().__init__()
@@ -66,10 +66,10 @@ class MCFlowWindow(QWidget):
     def compute_mcflow(self, _):
         source = self.network.nf(name=self.source_edit.text())
         destination = self.network.nf(name=self.destination_edit.text())
-        flow = self.flow_entry.text
+        flow = float(self.flow_edit.text())
         algorithm = {
                     'Linear programming': self.network.LP_MCF_formulation,
-                    'Klein': lambda: 'to be implemented'
+                    'Successive shortest paths': self.network.SSP_MCF
                     }[self.mcf_list.currentText()]
         cost = algorithm(source, destination, flow)   
         print(cost)
@@ -26,6 +26,7 @@ class ShortestPathWindow(QWidget):
     
     algorithms = (
     'Constrained A*',
+    'Bidirectional Dijkstra',
     'Bellman-Ford algorithm', 
     'Floyd-Warshall algorithm',
     'Linear programming'
@@ -66,10 +67,14 @@ class ShortestPathWindow(QWidget):
     def compute_sp(self, _):
         source = self.network.nf(name=self.source_edit.text())
         destination = self.network.nf(name=self.destination_edit.text())
+        # the all-pairs shortest paths are computed once for all queries, 
+        # until the topology changes
+        all_pairs = lambda s, d: self.network.all_pairs_shortest_paths().path(s, d)
         algorithm = {
                     'Constrained A*': self.network.A_star,
+                    'Bidirectional Dijkstra': self.network.bidirectional_dijkstra,
                     'Bellman-Ford algorithm': self.network.bellman_ford,
-                    'Floyd-Warshall algorithm': self.network.floyd_warshall,
+                    'Floyd-Warshall algorithm': all_pairs,
                     'Linear programming': self.network.LP_SP_formulation
                     }[self.sp_list.currentText()]
         nodes, physical_links = algorithm(source, destination)
@@ -18,6 +18,19 @@ class UnionFind:
         self.up = {node: node for node in nodes}
         self.rank = {node: 0 for node in nodes}
         
+    def add(self, node):
+        if node not in self.up:
+            self.up[node] = node
+            self.rank[node] = 0
+        
+    # a node of rank 0 is not the parent of any other node: it can be 
+    # removed without breaking the structure. Returns whether it was removed.
+    def remove(self, node):
+        if self.rank[node]:
+            return False
+        del self.up[node], self.rank[node]
+        return True
+        
     def find(self, node):
         if self.up[node] == node:
             return node
@@ -35,5 +48,5 @@ class UnionFind:
             if self.rank[repr_nA] == self.rank[repr_nB]:
                 self.rank[repr_nA] += 1   
         else:
-            self.up[repr_nA] == repr_nB
+            self.up[repr_nA] = repr_nB
         return True
@@ -0,0 +1,188 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import warnings
+from array import array
+from heapq import heappop, heappush
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    warnings.warn('numpy not installed: all-pairs shortest paths will be slower')
+
+# All-pairs shortest paths of a compiled network (see compiled_network.py).
+# The result is stored as two n x n matrices, indexed like the snapshot:
+# - dist[i][j] is the distance from the node i to the node j
+# - next_arc[i][j] is the first arc of the shortest path from i to j (-1 if
+# j is i or cannot be reached): a path is retrieved by following the arcs
+# With numpy, both matrices are numpy arrays (float64 and int32), otherwise
+# lists of arrays.
+# Two engines are available:
+# - repeated Dijkstra on the CSR adjacency, for sparse graphs with
+# non-negative costs
+# - blocked Floyd-Warshall (numpy), for dense graphs or negative costs
+
+class AllPairsShortestPaths(object):
+
+    # the graph is sparse (repeated Dijkstra) if the number of arcs is below
+    # n²/sparsity: beyond that, Floyd-Warshall is faster with numpy
+    sparsity = 100
+
+    # number of pivots processed at once by Floyd-Warshall, and number of
+    # rows of the matrix updated at once (the block must fit in cache)
+    pivot_block = 64
+    row_block = 64
+
+    def __init__(self, cn, engine=None):
+        self.cn = cn
+        n = len(cn)
+        if engine is None:
+            sparse = np is None or len(cn.targets) < n*n/self.sparsity
+            negative = min(cn.arc_cost, default=0) < 0
+            engine = 'dijkstra' if sparse and not negative else 'floyd_warshall'
+        self.engine = engine
+        if engine == 'dijkstra':
+            self.repeated_dijkstra()
+        elif np is None:
+            self.python_floyd_warshall()
+        else:
+            self.floyd_warshall()
+
+    # a negative cycle makes the distance of a node to itself negative
+    @property
+    def negative_cycle(self):
+        return any(self.dist[i][i] < 0 for i in range(len(self.cn)))
+
+    def repeated_dijkstra(self):
+        cn = self.cn
+        offsets, targets, arc_cost = cn.offsets, cn.targets, cn.arc_cost
+        n = len(cn)
+        if np is not None:
+            self.dist = np.empty((n, n))
+            self.next_arc = np.empty((n, n), dtype=np.int32)
+        else:
+            self.dist, self.next_arc = [None]*n, [None]*n
+        for s in range(n):
+            dist = [float('inf')]*n
+            # first_arc is the first arc of the path from s to each node:
+            # a node inherits the first arc of the node it was reached from
+            first_arc = [-1]*n
+            visited = bytearray(n)
+            dist[s] = 0
+            heap = [(0, s)]
+            while heap:
+                dist_node, node = heappop(heap)
+                if visited[node]:
+                    continue
+                visited[node] = 1
+                first = first_arc[node]
+                for e in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[e]
+                    dist_neighbor = dist_node + arc_cost[e]
+                    if dist_neighbor < dist[neighbor]:
+                        dist[neighbor] = dist_neighbor
+                        first_arc[neighbor] = e if node == s else first
+                        heappush(heap, (dist_neighbor, neighbor))
+            if np is not None:
+                self.dist[s], self.next_arc[s] = dist, first_arc
+            else:
+                self.dist[s] = array('d', dist)
+                self.next_arc[s] = array('l', first_arc)
+
+    # the weight matrix contains the cheapest arc between each pair of nodes
+    def weight_matrix(self):
+        cn, n = self.cn, len(self.cn)
+        sources = np.repeat(np.arange(n), np.diff(np.asarray(cn.offsets)))
+        targets = np.asarray(cn.targets)
+        costs = np.asarray(cn.arc_cost)
+        dist = np.full((n, n), np.inf)
+        np.minimum.at(dist, (sources, targets), costs)
+        next_arc = np.full((n, n), -1, dtype=np.int32)
+        cheapest = costs == dist[sources, targets]
+        next_arc[sources[cheapest], targets[cheapest]] = np.flatnonzero(cheapest)
+        diagonal = np.arange(n)
+        improved = dist[diagonal, diagonal] > 0
+        dist[diagonal[improved], diagonal[improved]] = 0
+        next_arc[diagonal[improved], diagonal[improved]] = -1
+        return dist, next_arc
+
+    # blocked Floyd-Warshall: the pivots are processed by blocks of
+    # 'pivot_block' nodes. For each block, the rows of the pivots are updated
+    # first; the matrix is then updated one block of rows at a time, with
+    # all pivots of the block, so that the rows being updated stay in cache.
+    # Distances only decrease and always are lengths of actual paths, so
+    # using pivot rows that are already updated with the next pivots of the
+    # block does not change the result.
+    def floyd_warshall(self):
+        dist, next_arc = self.weight_matrix()
+        n = len(self.cn)
+        for start in range(0, n, self.pivot_block):
+            pivots = range(start, min(n, start + self.pivot_block))
+            blocks = [slice(start, pivots[-1] + 1)] + [slice(i,
+                min(n, i + self.row_block)) for i in range(0, n, self.row_block)]
+            for rows in blocks:
+                D, N = dist[rows], next_arc[rows]
+                for k in pivots:
+                    candidate = D[:, k, None] + dist[k]
+                    improved = candidate < D
+                    np.copyto(D, candidate, where=improved)
+                    np.copyto(N, N[:, k, None], where=improved)
+        self.dist, self.next_arc = dist, next_arc
+
+    # Floyd-Warshall without numpy, only used for negative costs
+    def python_floyd_warshall(self):
+        cn, n = self.cn, len(self.cn)
+        dist = [array('d', [float('inf')])*n for _ in range(n)]
+        next_arc = [array('l', [-1])*n for _ in range(n)]
+        for u in range(n):
+            dist[u][u] = 0
+            for e in range(cn.offsets[u], cn.offsets[u + 1]):
+                v = cn.targets[e]
+                if cn.arc_cost[e] < dist[u][v]:
+                    dist[u][v], next_arc[u][v] = cn.arc_cost[e], e
+        for k in range(n):
+            dist_k = dist[k]
+            for u in range(n):
+                dist_u, next_u, dist_uk = dist[u], next_arc[u], dist[u][k]
+                for v in range(n):
+                    if dist_uk + dist_k[v] < dist_u[v]:
+                        dist_u[v] = dist_uk + dist_k[v]
+                        next_u[v] = next_u[k]
+        self.dist, self.next_arc = dist, next_arc
+
+    def distance(self, source, target):
+        index = self.cn.index
+        return float(self.dist[index[source]][index[target]])
+
+    # returns the shortest path from source to target as lists of nodes and
+    # physical links, like the other shortest path algorithms
+    def path(self, source, target):
+        cn = self.cn
+        s, t = cn.index[source], cn.index[target]
+        if self.dist[s][t] == float('inf'):
+            return [], []
+        path_node, path_arc = [s], []
+        while path_node[-1] != t:
+            # there is no shortest path if there is a negative cycle
+            if len(path_arc) == len(cn):
+                return [], []
+            path_arc.append(int(self.next_arc[path_node[-1]][t]))
+            path_node.append(cn.targets[path_arc[-1]])
+        return cn.to_nodes(path_node), cn.to_links(path_arc)
+
+    # distances from a node to all other nodes: result[source][target] is the
+    # distance from source to target
+    def __getitem__(self, source):
+        row = self.dist[self.cn.index[source]]
+        return {node: float(d) for node, d in zip(self.cn.nodes, row)}
@@ -0,0 +1,133 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from array import array
+from collections import OrderedDict
+from multiprocessing import Pool
+from .shortest_path_tree import dijkstra
+from .spfa import spfa
+
+# Shortest paths for many (source, target) pairs of a compiled network (see
+# compiled_network.py). The pairs are grouped by source: a single search
+# per source gives the paths to all its targets. The groups are spread over
+# a pool of worker processes, which receive the arrays of the snapshot once
+# (the pool initializer) and only exchange node and arc indices afterwards.
+# The result is stored in three arrays, indexed like the pairs:
+# - dist[i] is the distance of the i-th pair (inf if there is no path)
+# - the arcs of the i-th path are arcs[offsets[i]:offsets[i+1]]
+
+# paths from a source to a group of targets: returns the distances, the
+# number of arcs of each path and the arcs of all paths, one after another
+def search(topology, algorithm, s, group):
+    offsets, targets, arc_link, arc_twin, arc_cost, allowed_node, allowed_plink = topology
+    if algorithm == 'spfa':
+        dist, prec_arc, cycle = spfa(offsets, targets, arc_link, arc_twin, 
+                                arc_cost, allowed_node, allowed_plink, s)
+        # like Network.spfa, no target can be reached if there is a 
+        # negative cycle
+        if cycle != -1:
+            dist = array('d', [float('inf')])*len(dist)
+    else:
+        dist, prec_arc = dijkstra(offsets, targets, arc_link, arc_cost, 
+                                        allowed_node, allowed_plink, s)
+    distances, lengths, arcs = array('d'), array('l'), array('l')
+    for t in group:
+        path = []
+        if dist[t] != float('inf'):
+            e = prec_arc[t]
+            while e != -1:
+                path.append(e)
+                # the source of an arc is the target of its twin
+                e = prec_arc[targets[arc_twin[e]]]
+        distances.append(dist[t])
+        lengths.append(len(path))
+        arcs.extend(reversed(path))
+    return distances, lengths, arcs
+
+# snapshot arrays of a worker process, set by the pool initializer
+topology = None
+
+def share(shared):
+    global topology
+    topology = shared
+
+def worker_search(task):
+    return search(topology, *task)
+
+class BulkShortestPaths(object):
+
+    def __init__(
+                 self,
+                 cn,
+                 pairs,
+                 algorithm,
+                 workers,
+                 allowed_node,
+                 allowed_plink
+                 ):
+        self.cn = cn
+        self.pairs = [(cn.index[s], cn.index[t]) for s, t in pairs]
+        groups = OrderedDict()
+        for i, (s, _) in enumerate(self.pairs):
+            groups.setdefault(s, []).append(i)
+        tasks = [(algorithm, s, [self.pairs[i][1] for i in group])
+                                            for s, group in groups.items()]
+        shared = (cn.offsets, cn.targets, cn.arc_link, cn.arc_twin,
+                                    cn.arc_cost, allowed_node, allowed_plink)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(tasks))
+        # with a single worker, the searches run in the current process
+        if workers > 1:
+            chunksize = max(1, len(tasks) // (4*workers))
+            with Pool(workers, share, (shared,)) as pool:
+                results = pool.map(worker_search, tasks, chunksize)
+        else:
+            results = [search(shared, *task) for task in tasks]
+
+        number = len(self.pairs)
+        self.dist = array('d', [0])*number
+        paths = [None]*number
+        for group, (distances, lengths, arcs) in zip(groups.values(), results):
+            start = 0
+            for i, distance, length in zip(group, distances, lengths):
+                self.dist[i] = distance
+                paths[i] = arcs[start:start + length]
+                start += length
+        self.offsets = array('l', [0])*(number + 1)
+        self.arcs = array('l')
+        for i, path in enumerate(paths):
+            self.arcs.extend(path)
+            self.offsets[i + 1] = len(self.arcs)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def distance(self, i):
+        return self.dist[i]
+
+    # path of the i-th pair, as lists of nodes and physical links (empty
+    # lists if the target cannot be reached)
+    def path(self, i):
+        cn = self.cn
+        if self.dist[i] == float('inf'):
+            return [], []
+        arcs = self.arcs[self.offsets[i]:self.offsets[i + 1]]
+        nodes = [self.pairs[i][0]] + [cn.targets[e] for e in arcs]
+        return cn.to_nodes(nodes), cn.to_links(arcs)
+
+    def __iter__(self):
+        return (self.path(i) for i in range(len(self)))
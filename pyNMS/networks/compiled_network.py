@@ -0,0 +1,187 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+from copy import copy
+
+# A compiled network is an integer-indexed snapshot of the physical topology,
+# stored in CSR (compressed sparse row) form:
+# - nodes are numbered from 0 to n-1, physical links from 0 to m-1
+# - the arcs leaving the node i are the arcs offsets[i] to offsets[i+1] - 1
+# - each physical link yields two arcs (one per direction): for an arc e,
+# targets[e] is the node at the other end, arc_link[e] the physical link and
+# arc_sd[e] is 1 if the arc goes from the link source to its destination,
+# arc_twin[e] is the arc of the same physical link in the opposite direction.
+# Directional properties are copied once into per-link arrays (costSD,
+# costDS, capacitySD, capacityDS) and into per-arc arrays (arc_cost, 
+# arc_rcost, arc_capacity), so that algorithms no longer need to call 
+# getattr for every edge they scan.
+
+class CompiledNetwork(object):
+
+    # directional properties copied in the snapshot: only properties whose
+    # changes are recorded in the journal, as the snapshot is cached by version
+    properties = ('cost', 'capacity')
+    
+    # per-arc arrays derived from each directional property
+    arc_properties = {
+                      'cost': ('arc_cost', 'arc_rcost'), 
+                      'capacity': ('arc_capacity',)
+                      }
+
+    def __init__(self, network):
+        self.nodes = list(network.nodes.values())
+        self.links = list(network.plinks.values())
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.link_index = {link: i for i, link in enumerate(self.links)}
+        n, m = len(self.nodes), len(self.links)
+
+        # link endpoints and per-direction properties
+        self.link_source = array('l', (self.index[l.source] for l in self.links))
+        self.link_destination = array('l',
+                                (self.index[l.destination] for l in self.links))
+        for property in self.properties:
+            for dir in ('SD', 'DS'):
+                values = array('d', (getattr(l, property + dir) for l in self.links))
+                setattr(self, property + dir, values)
+
+        # we count the arcs leaving each node to build the offsets array
+        degree = [0]*n
+        for s, d in zip(self.link_source, self.link_destination):
+            degree[s] += 1
+            degree[d] += 1
+        self.offsets = array('l', [0]*(n + 1))
+        for i in range(n):
+            self.offsets[i + 1] = self.offsets[i] + degree[i]
+
+        # we fill the arcs: 'position' is the next free slot for each node
+        position = list(self.offsets[:-1])
+        self.targets = array('l', [0]*(2*m))
+        self.arc_link = array('l', [0]*(2*m))
+        self.arc_sd = array('b', [0]*(2*m))
+        # arc_twin[e] is the arc of the same link in the opposite direction
+        self.arc_twin = array('l', [0]*(2*m))
+        # link_arc[l] is the arc of the link l in the s-d direction
+        self.link_arc = array('l', [0]*m)
+        for l, (s, d) in enumerate(zip(self.link_source, self.link_destination)):
+            e_sd, e_ds = position[s], position[d] + (s == d)
+            self.targets[e_sd], self.arc_link[e_sd], self.arc_sd[e_sd] = d, l, 1
+            self.targets[e_ds], self.arc_link[e_ds], self.arc_sd[e_ds] = s, l, 0
+            self.arc_twin[e_sd], self.arc_twin[e_ds] = e_ds, e_sd
+            self.link_arc[l] = e_sd
+            position[s] += 1
+            position[d] += 1
+
+        # per-arc cost in the direction of the arc, and in the reverse
+        # direction (cost of the twin arc, used by backward searches)
+        costSD, costDS = self.costSD, self.costDS
+        capacitySD, capacityDS = self.capacitySD, self.capacityDS
+        self.arc_cost = array('d', (costSD[l] if sd else costDS[l]
+                            for l, sd in zip(self.arc_link, self.arc_sd)))
+        self.arc_rcost = array('d', (costDS[l] if sd else costSD[l]
+                            for l, sd in zip(self.arc_link, self.arc_sd)))
+        self.arc_capacity = array('d', (capacitySD[l] if sd else capacityDS[l]
+                            for l, sd in zip(self.arc_link, self.arc_sd)))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # an allowed set of objects is converted to a mask indexed like the
+    # snapshot. A mask is a bytearray: membership becomes a list lookup.
+    def node_mask(self, nodes=None, excluded=()):
+        if nodes is None:
+            mask = bytearray(b'\x01')*len(self.nodes)
+        else:
+            mask = bytearray(len(self.nodes))
+            for node in nodes:
+                if node in self.index:
+                    mask[self.index[node]] = 1
+        for node in excluded:
+            if node in self.index:
+                mask[self.index[node]] = 0
+        return mask
+
+    def link_mask(self, links=None, excluded=()):
+        if links is None:
+            mask = bytearray(b'\x01')*len(self.links)
+        else:
+            mask = bytearray(len(self.links))
+            for link in links:
+                if link in self.link_index:
+                    mask[self.link_index[link]] = 1
+        for link in excluded:
+            if link in self.link_index:
+                mask[self.link_index[link]] = 0
+        return mask
+
+    # the source of an arc is not stored: it is the node at the other end of
+    # the arc's physical link
+    def arc_source(self, e):
+        l = self.arc_link[e]
+        return self.link_source[l] if self.arc_sd[e] else self.link_destination[l]
+
+    # given a predecessor array (index of the arc used to reach each node, -1
+    # for the root or an unreached node), returns the path from the root to
+    # the target as a list of node indices and a list of arc indices
+    def traceback(self, prec_arc, target):
+        path_node, path_arc = [target], []
+        e = prec_arc[target]
+        while e != -1:
+            path_arc.append(e)
+            path_node.append(self.arc_source(e))
+            e = prec_arc[path_node[-1]]
+        return path_node[::-1], path_arc[::-1]
+
+    # conversion of indices back to pyNMS objects
+    def to_nodes(self, indices):
+        return [self.nodes[i] for i in indices]
+
+    def to_links(self, arcs):
+        return [self.links[self.arc_link[e]] for e in arcs]
+
+    # write per-arc values (e.g a flow) back to the physical links, with the
+    # 'SD' / 'DS' suffix given by the direction of each arc. 'store' is 
+    # the function used to write a value (Network.set_value for a fork)
+    def write_back(self, property, arc_values, store=setattr):
+        for e, value in enumerate(arc_values):
+            link = self.links[self.arc_link[e]]
+            store(link, property + ('SD' if self.arc_sd[e] else 'DS'), value)
+            
+    # returns a copy of the snapshot in which some directional properties
+    # are overridden: 'values' maps (link, property) to a value, where the 
+    # property is e.g 'costSD'. All arrays are shared with the snapshot, 
+    # except the arrays of the overridden properties.
+    def patch(self, values):
+        cn, copied = copy(self), set()
+        for (link, property), value in values.items():
+            name = property[:-2]
+            if name not in self.properties or link not in self.link_index:
+                continue
+            if name not in copied:
+                copied.add(name)
+                for array_name in (name + 'SD', name + 'DS') + \
+                                            self.arc_properties[name]:
+                    setattr(cn, array_name, array('d', getattr(self, array_name)))
+            l = self.link_index[link]
+            getattr(cn, property)[l] = value
+            # update the arcs of the link
+            e_sd = self.link_arc[l]
+            e_ds = self.arc_twin[e_sd]
+            SD, DS = getattr(cn, name + 'SD')[l], getattr(cn, name + 'DS')[l]
+            if name == 'cost':
+                cn.arc_cost[e_sd], cn.arc_cost[e_ds] = SD, DS
+                cn.arc_rcost[e_sd], cn.arc_rcost[e_ds] = DS, SD
+            else:
+                cn.arc_capacity[e_sd], cn.arc_capacity[e_ds] = SD, DS
+        return cn
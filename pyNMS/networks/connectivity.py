@@ -0,0 +1,100 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from miscellaneous.union_find import UnionFind
+
+# Connected components of the physical topology, without the objects in
+# failure, maintained incrementally from the journal of the network:
+# - a union-find structure is updated when nodes and physical links are
+# added, or when physical links recover from a failure
+# - the links that merged two components form a spanning forest: removing
+# (or failing) a link that is not in the forest cannot split a component,
+# so it costs nothing. Otherwise, the structure is rebuilt lazily, the next
+# time a component is requested.
+# - a removed node is dropped from the union-find (or the structure is
+# rebuilt if other nodes point to it)
+
+class Connectivity(object):
+
+    def __init__(self, network):
+        self.network = network
+        # version of the network the components were computed at
+        self.version = None
+
+    def rebuild(self):
+        network = self.network
+        self.failed = set(network.failed_obj)
+        self.components = UnionFind([node for node in network.nodes.values()
+                                                if node not in self.failed])
+        self.forest = set()
+        for plink in network.plinks.values():
+            self.insert(plink)
+        self.version = network.version
+
+    def insert(self, plink):
+        source, destination, failed = plink.source, plink.destination, self.failed
+        if plink in failed or source in failed or destination in failed:
+            return
+        if self.components.union(source, destination):
+            self.forest.add(plink)
+
+    def update(self):
+        network = self.network
+        if self.version == network.version and network.failed_obj == self.failed:
+            return
+        entries = None
+        if self.version is not None:
+            entries = network.journal.since(self.version)
+        if entries is None:
+            return self.rebuild()
+        # changes of the topology
+        for _, change, obj, _ in entries:
+            if change == 'add':
+                if obj.class_type == 'node':
+                    self.components.add(obj)
+                elif obj.type == 'plink':
+                    self.insert(obj)
+            elif change == 'remove':
+                if obj in self.forest:
+                    return self.rebuild()
+                # a removed node can only be dropped from the union-find if 
+                # it is not the parent of another node
+                if obj.class_type == 'node' and obj in self.components.up:
+                    if not self.components.remove(obj):
+                        return self.rebuild()
+        # changes of the failed objects (the failed objects of a fork are
+        # not recorded in the journal: we compare the sets instead)
+        failed = network.failed_obj
+        if failed != self.failed:
+            for obj in failed - self.failed:
+                if obj.class_type == 'node' or obj in self.forest:
+                    return self.rebuild()
+            recovered = self.failed - failed
+            self.failed = set(failed)
+            for obj in recovered:
+                if obj.class_type == 'node':
+                    return self.rebuild()
+                if obj.type == 'plink':
+                    self.insert(obj)
+        self.version = network.version
+
+    # returns the representative node of the component of 'node': two nodes
+    # are in the same component if they have the same representative.
+    # A node in failure does not belong to any component (None)
+    def component_of(self, node):
+        self.update()
+        if node not in self.components.up:
+            return None
+        return self.components.find(node)
+
@@ -0,0 +1,282 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from heapq import heappop, heappush
+
+# Contraction hierarchy of a compiled network (see compiled_network.py),
+# for fast point-to-point shortest path queries on a static topology.
+# Preprocessing: the nodes are contracted one by one, least important
+# first. Contracting a node v removes it from the graph: for every pair of
+# arcs u -> v -> w, a shortcut u -> w (through v) is added, unless there is
+# another path from u to w that is no longer (a witness).
+# The rank of a node is its position in the contraction order. A shortest
+# path always goes up in rank, then down: a query is a bidirectional
+# search in which both searches only go up (the backward search follows
+# the arcs in reverse direction).
+# Costs are directional (costSD / costDS) and must be non-negative.
+
+class ContractionHierarchy(object):
+
+    # number of nodes settled by a witness search before it gives up: a
+    # shortcut is then added, which can be useless, but never wrong
+    witness_limit = 50
+
+    def __init__(self, cn):
+        self.cn = cn
+        n, inf = len(cn), float('inf')
+        # current graph: out_edges[u][w] = in_edges[w][u] = (cost, middle,
+        # arc) where the edge is either an arc (middle is -1), or a shortcut
+        # through the node 'middle' (arc is -1)
+        out_edges = [{} for _ in range(n)]
+        in_edges = [{} for _ in range(n)]
+        for u in range(n):
+            for e in range(cn.offsets[u], cn.offsets[u + 1]):
+                w, cost = cn.targets[e], cn.arc_cost[e]
+                if w == u or cost == inf:
+                    continue
+                if w not in out_edges[u] or cost < out_edges[u][w][0]:
+                    out_edges[u][w] = in_edges[w][u] = (cost, -1, e)
+        self.contract(out_edges, in_edges)
+
+    # Dijkstra from 'source' without the node being contracted: it stops
+    # when all targets are settled, or beyond 'limit'
+    def witness_search(self, out_edges, source, excluded, targets, limit):
+        dist, visited, remaining = {source: 0}, 0, len(targets)
+        heap = [(0, source)]
+        while heap and visited < self.witness_limit:
+            dist_node, node = heappop(heap)
+            if dist_node > limit:
+                break
+            if dist_node > dist[node]:
+                continue
+            visited += 1
+            if node in targets:
+                remaining -= 1
+                if not remaining:
+                    break
+            for neighbor, (cost, _, _) in out_edges[node].items():
+                if neighbor == excluded:
+                    continue
+                dist_neighbor = dist_node + cost
+                if dist_neighbor < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = dist_neighbor
+                    heappush(heap, (dist_neighbor, neighbor))
+        return dist
+
+    # shortcuts needed to contract the node v
+    def shortcuts(self, out_edges, in_edges, v):
+        shortcuts = []
+        if not out_edges[v]:
+            return shortcuts
+        max_out = max(cost for cost, _, _ in out_edges[v].values())
+        for u, (cost_uv, _, _) in in_edges[v].items():
+            targets = out_edges[v].keys() - {u}
+            if not targets:
+                continue
+            dist = self.witness_search(out_edges, u, v, targets, cost_uv + max_out)
+            for w in targets:
+                cost_vw = out_edges[v][w][0]
+                if dist.get(w, float('inf')) > cost_uv + cost_vw:
+                    shortcuts.append((u, w, cost_uv + cost_vw))
+        return shortcuts
+
+    def contract(self, out_edges, in_edges):
+        n = len(out_edges)
+        # the priority of a node is its edge difference (number of shortcuts
+        # minus number of edges removed) plus its number of contracted
+        # neighbors, so that the contraction is spread across the graph
+        contracted_neighbors = [0]*n
+        def priority(v):
+            shortcuts = self.shortcuts(out_edges, in_edges, v)
+            return (len(shortcuts) - len(out_edges[v]) - len(in_edges[v])
+                    + contracted_neighbors[v]), shortcuts
+        heap = [(priority(v)[0], v) for v in range(n)]
+        heap.sort()
+
+        # up[u] is the list of (w, cost) for the edges u -> w where w has a
+        # higher rank, down[v] the list of (u, cost) for the edges u -> v
+        # where u has a higher rank. edges[u, w] = (middle, arc) is used
+        # to unpack the shortcuts.
+        self.rank = [0]*n
+        self.up, self.down = [[] for _ in range(n)], [[] for _ in range(n)]
+        self.edges = {}
+        rank = 0
+        while heap:
+            _, v = heappop(heap)
+            # lazy update: the priority of v may have increased since it
+            # was computed
+            current, shortcuts = priority(v)
+            if heap and current > heap[0][0]:
+                heappush(heap, (current, v))
+                continue
+            for u, w, cost in shortcuts:
+                if w not in out_edges[u] or cost < out_edges[u][w][0]:
+                    out_edges[u][w] = in_edges[w][u] = (cost, v, -1)
+            self.rank[v] = rank
+            rank += 1
+            # the remaining neighbors of v have a higher rank
+            for w, (cost, middle, arc) in out_edges[v].items():
+                self.up[v].append((w, cost))
+                self.edges[v, w] = (middle, arc)
+                del in_edges[w][v]
+                contracted_neighbors[w] += 1
+            for u, (cost, middle, arc) in in_edges[v].items():
+                self.down[v].append((u, cost))
+                self.edges[u, v] = (middle, arc)
+                del out_edges[u][v]
+                contracted_neighbors[u] += 1
+            out_edges[v], in_edges[v] = {}, {}
+
+    # returns the distance and the list of edges of the shortest path
+    def query(self, s, t):
+        if s == t:
+            return 0, []
+        graphs, stalling = (self.up, self.down), (self.down, self.up)
+        inf = float('inf')
+        dist, prec = ({s: 0}, {t: 0}), ({s: -1}, {t: -1})
+        heaps = ([(0, s)], [(0, t)])
+        best, meeting = inf, None
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                if not heaps[side]:
+                    continue
+                dist_node, node = heappop(heaps[side])
+                if dist_node > dist[side][node]:
+                    continue
+                # nothing better can be found on this side
+                if dist_node >= best:
+                    heaps[side].clear()
+                    continue
+                if node in dist[not side]:
+                    if dist_node + dist[not side][node] < best:
+                        best, meeting = dist_node + dist[not side][node], node
+                # stall-on-demand: if a higher node gives a shorter path to
+                # this node, its distance is not the shortest one and it is
+                # not worth searching further from it
+                if any(dist[side].get(neighbor, inf) + cost < dist_node
+                            for neighbor, cost in stalling[side][node]):
+                    continue
+                for neighbor, cost in graphs[side][node]:
+                    dist_neighbor = dist_node + cost
+                    if dist_neighbor < dist[side].get(neighbor, inf):
+                        dist[side][neighbor] = dist_neighbor
+                        prec[side][neighbor] = node
+                        heappush(heaps[side], (dist_neighbor, neighbor))
+        if meeting is None:
+            return best, None
+        # edges from the source to the meeting node, then to the target
+        forward, node = [], meeting
+        while prec[0][node] != -1:
+            forward.append((prec[0][node], node))
+            node = prec[0][node]
+        backward, node = [], meeting
+        while prec[1][node] != -1:
+            backward.append((node, prec[1][node]))
+            node = prec[1][node]
+        return best, forward[::-1] + backward
+
+    # a shortcut is replaced by the two edges it was made of, recursively
+    def unpack(self, edges):
+        arcs, stack = [], edges[::-1]
+        while stack:
+            u, w = stack.pop()
+            middle, arc = self.edges[u, w]
+            if middle == -1:
+                arcs.append(arc)
+            else:
+                stack.extend(((middle, w), (u, middle)))
+        return arcs
+
+    def distance(self, source, target):
+        return self.query(self.cn.index[source], self.cn.index[target])[0]
+
+    # shortest path from source to target, as lists of nodes and physical
+    # links (empty lists if the target cannot be reached)
+    def path(self, source, target):
+        cn = self.cn
+        s = cn.index[source]
+        _, edges = self.query(s, cn.index[target])
+        if edges is None:
+            return [], []
+        arcs = self.unpack(edges)
+        return cn.to_nodes([s] + [cn.targets[e] for e in arcs]), cn.to_links(arcs)
+
+    # the hierarchy is stored with the project: nodes and physical links are
+    # identified by their names, and arcs by their physical link and
+    # direction (1 for source -> destination)
+    def to_dict(self):
+        cn = self.cn
+        return {
+                'nodes': [node.name for node in cn.nodes],
+                'links': [
+                          (link.name, link.source.name, link.destination.name,
+                           cn.costSD[l], cn.costDS[l])
+                          for l, link in enumerate(cn.links)
+                          ],
+                'rank': self.rank,
+                'up': self.up,
+                'down': self.down,
+                'edges': [
+                          (u, w, middle, cn.arc_link[arc], cn.arc_sd[arc])
+                          if arc != -1 else (u, w, middle, -1, 0)
+                          for (u, w), (middle, arc) in self.edges.items()
+                          ]
+                }
+
+    # returns the hierarchy stored in 'data' if it was built from the same
+    # topology and costs as the snapshot, None otherwise
+    @classmethod
+    def from_dict(cls, data, cn):
+        node_index = {node.name: i for i, node in enumerate(cn.nodes)}
+        link_index = {link.name: l for l, link in enumerate(cn.links)}
+        if len(data['nodes']) != len(cn.nodes):
+            return None
+        if len(data['links']) != len(cn.links):
+            return None
+        # stored index -> snapshot index
+        nodes, links = [], []
+        for name in data['nodes']:
+            if name not in node_index:
+                return None
+            nodes.append(node_index[name])
+        for name, source, destination, costSD, costDS in data['links']:
+            if name not in link_index:
+                return None
+            l = link_index[name]
+            link = cn.links[l]
+            if (source, destination) != (link.source.name, link.destination.name):
+                return None
+            if (costSD, costDS) != (cn.costSD[l], cn.costDS[l]):
+                return None
+            links.append(l)
+
+        hierarchy = cls.__new__(cls)
+        hierarchy.cn = cn
+        n = len(nodes)
+        hierarchy.rank = [0]*n
+        hierarchy.up, hierarchy.down = [None]*n, [None]*n
+        for i, v in enumerate(nodes):
+            hierarchy.rank[v] = data['rank'][i]
+            hierarchy.up[v] = [(nodes[w], cost) for w, cost in data['up'][i]]
+            hierarchy.down[v] = [(nodes[u], cost) for u, cost in data['down'][i]]
+        hierarchy.edges = {}
+        for u, w, middle, l, sd in data['edges']:
+            arc = -1
+            if l != -1:
+                arc = cn.link_arc[links[l]]
+                if not sd:
+                    arc = cn.arc_twin[arc]
+            middle = nodes[middle] if middle != -1 else -1
+            hierarchy.edges[nodes[u], nodes[w]] = (middle, arc)
+        return hierarchy
@@ -0,0 +1,69 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .network import Network
+from .compiled_network import CompiledNetwork
+from .connectivity import Connectivity
+from .shortest_path_tree import SPTCache
+
+# A fork is a copy-on-write overlay of a network, used to evaluate what-if
+# scenarios without modifying the network itself (see Network.fork):
+# - all pools and indexes are shared with the base network: the topology
+# must not be modified through a fork
+# - link properties written by the algorithms (costs, capacities, flows,
+# traffics) and the paths of the traffic links are stored in the fork's 
+# overrides, not in the links
+# - the routing tables of the nodes are shared: routing on a fork rebuilds 
+# them for the failures of the fork
+# - the fork has its own set of failed objects
+# Several forks of the same network can be used concurrently.
+
+class NetworkFork(Network):
+
+    def __init__(self, base):
+        # nothing is copied: the fork refers to the same pools as the base
+        self.__dict__.update(base.__dict__)
+        self.base = base
+        # overridden link properties: (link, property) -> value
+        self.overrides = dict(getattr(base, 'overrides', {}))
+        # increased every time a cost or a capacity is overridden
+        self.overlay_version = getattr(base, 'overlay_version', 0)
+        self.compiled = self.compiled_key = None
+        self.spt_cache = SPTCache()
+        self._failed_obj = set(base.failed_obj)
+        self.connectivity = Connectivity(self)
+
+    def value(self, obj, property):
+        try:
+            return self.overrides[obj, property]
+        except KeyError:
+            return getattr(obj, property)
+
+    def set_value(self, obj, property, value):
+        self.overrides[obj, property] = value
+        if property[:-2] in CompiledNetwork.properties:
+            self.overlay_version += 1
+
+    # the snapshot of a fork is the snapshot of the base network, with the
+    # overridden costs and capacities patched in
+    def compile(self):
+        snapshot = self.base.compile()
+        if not self.overlay_version:
+            return snapshot
+        key = (snapshot, self.overlay_version)
+        if self.compiled_key != key:
+            self.compiled = snapshot.patch(self.overrides)
+            self.compiled_key = key
+        return self.compiled
+
@@ -0,0 +1,144 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from array import array
+from multiprocessing import Pool
+from .max_flow import dinic, source_side
+
+# Gomory-Hu tree of a compiled network (see compiled_network.py): a tree on
+# the nodes of the network such that, for any two nodes u and v, the
+# minimum cut between u and v is the lightest edge of the tree path from u
+# to v, and the two components of the tree without this edge are the two
+# sides of the cut.
+# A cut tree only exists for symmetric capacities: the capacity of a
+# physical link is the highest of capacitySD and capacityDS, in both
+# directions (a link with a single direction still connects its nodes).
+# The tree is built with Gusfield algorithm, from n - 1 minimum cut
+# computations in the network itself. The tree is stored as a parent array
+# rooted at the node 0: weight[i] is the weight of the edge (i, parent[i]).
+# The minimum cuts are computed by batches in a pool of worker processes,
+# with the parents known at the start of the batch. They are then applied
+# in order: a cut computed with a parent that was changed in the meantime
+# is computed again.
+
+# (offsets, targets, arc_twin, capacity) of a worker process, set by the
+# pool initializer
+topology = None
+
+def share(shared):
+    global topology
+    topology = shared
+
+def minimum_cut(shared, s, t):
+    offsets, targets, arc_twin, capacity = shared
+    flow, value = dinic(offsets, targets, arc_twin, capacity, s, t)
+    return value, source_side(offsets, targets, capacity, flow, s)
+
+def worker_cut(task):
+    return minimum_cut(topology, *task)
+
+class GomoryHuTree(object):
+
+    def __init__(self, cn, workers=None):
+        self.cn = cn
+        n = len(cn)
+        capacity = array('d', (max(cn.capacitySD[l], cn.capacityDS[l])
+                                                    for l in cn.arc_link))
+        shared = (cn.offsets, cn.targets, cn.arc_twin, capacity)
+        self.parent = parent = array('l', [0])*n
+        self.weight = weight = array('d', [0])*n
+        if workers is None:
+            workers = os.cpu_count() or 1
+        pool = Pool(workers, share, (shared,)) if workers > 1 and n > 2 else None
+
+        try:
+            for start in range(1, n, workers):
+                batch = range(start, min(n, start + workers))
+                tasks = [(s, parent[s]) for s in batch]
+                if pool is not None and len(tasks) > 1:
+                    cuts = pool.map(worker_cut, tasks)
+                else:
+                    cuts = [minimum_cut(shared, *task) for task in tasks]
+                for (s, t), (value, side) in zip(tasks, cuts):
+                    if parent[s] != t:
+                        t = parent[s]
+                        value, side = minimum_cut(shared, s, t)
+                    weight[s] = value
+                    for i in range(n):
+                        if i != s and side[i] and parent[i] == t:
+                            parent[i] = s
+                    if side[parent[t]]:
+                        parent[s], parent[t] = parent[t], s
+                        weight[s], weight[t] = weight[t], value
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        # depth of each node in the tree, to find the path between two nodes,
+        # and nodes in breadth-first order (parents before children)
+        children = [[] for _ in range(n)]
+        for i in range(1, n):
+            children[parent[i]].append(i)
+        self.depth, self.order = [0]*n, [0] if n else []
+        for node in self.order:
+            for child in children[node]:
+                self.depth[child] = self.depth[node] + 1
+                self.order.append(child)
+
+    # lightest edge (i, parent[i]) of the tree path between u and v
+    def lightest_edge(self, u, v):
+        parent, weight, depth = self.parent, self.weight, self.depth
+        best = None
+        while u != v:
+            if depth[u] < depth[v]:
+                u, v = v, u
+            if best is None or weight[u] < weight[best]:
+                best = u
+            u = parent[u]
+        return best
+
+    # value of the minimum cut between two nodes
+    def minimum_cut_value(self, source, destination):
+        index = self.cn.index
+        edge = self.lightest_edge(index[source], index[destination])
+        return float('inf') if edge is None else self.weight[edge]
+
+    # minimum cut between two nodes: returns its value, the nodes on the
+    # side of the source, and the physical links of the cut
+    def minimum_cut(self, source, destination):
+        cn = self.cn
+        s = cn.index[source]
+        edge = self.lightest_edge(s, cn.index[destination])
+        if edge is None:
+            return float('inf'), set(), set()
+        # the subtree below the edge is one side of the cut
+        n = len(cn)
+        below = bytearray(n)
+        below[edge] = 1
+        for i in self.order[1:]:
+            if below[self.parent[i]]:
+                below[i] = 1
+        side = below if below[s] else bytearray(1 - x for x in below)
+        nodes = {cn.nodes[i] for i in range(n) if side[i]}
+        links = {link for l, link in enumerate(cn.links) if side[
+                    cn.link_source[l]] != side[cn.link_destination[l]]}
+        return self.weight[edge], nodes, links
+
+    # edges of the tree as (node, node, value), lightest first
+    def edges(self):
+        nodes = self.cn.nodes
+        return sorted(((nodes[i], nodes[self.parent[i]], self.weight[i])
+                        for i in range(1, len(nodes))), key=lambda e: e[2])
@@ -13,45 +13,90 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from objects.objects import *
+from .journal import Journal, FailureSet
+from .observer import NetworkObserver
+from .connectivity import Connectivity
 from collections import defaultdict
 from math import sqrt
 
 class Graph(object):
     
-    def __init__(self, view):
+    # a network has no reference to the GUI: GUI callbacks go through the 
+    # observer (see observer.py), and the network is headless by default
+    def __init__(self, observer=None):
         self.nodes = {}
         self.links = {}
         
         # pn for 'pool network'
         self.pn = {'node': self.nodes, 'link': self.links}
                    
-        self.view = view
+        self.observer = observer or NetworkObserver()
         self.graph = defaultdict(lambda: defaultdict(set))
+        
+        # per-subtype indexes, kept up-to-date by the factories and the 
+        # removal functions so that filtering by subtype costs O(result):
+        # - spn (subtype pool network): subtype -> {id: object}. Interfaces
+        # have no ID: they are their own key.
+        # - sgraph: node ID -> link type -> link subtype -> {(neighbor, link)}
+        self.spn = defaultdict(dict)
+        self.sgraph = defaultdict(lambda: defaultdict(lambda: defaultdict(set)))
+        # node pair index: (node ID, node ID, link type) -> {links}, stored
+        # in both orientations, for constant-time connectivity checks
+        self.pair_links = defaultdict(set)
         self.cpt_link = self.cpt_node = self.cpt_AS = 1
         # useful for tests and listbox when we want to retrieve an object
         # based on its name. The only object that needs changing when a object
         # is renamed by the user.
         self.name_to_id = {}
 
+        # journal of all changes of the topology (see journal.py)
+        self.journal = Journal()
+
         # set of all objects in failure: this parameter is used for
         # link dimensioning and failure simulation
-        self.failed_obj = set()
+        self._failed_obj = FailureSet(self.journal)
+        
+        # connected components, maintained from the journal
+        self.connectivity = Connectivity(self)
+        
+    # version of the topology: increased every time the topology changes
+    @property
+    def version(self):
+        return self.journal.version
+        
+    @property
+    def failed_obj(self):
+        return self._failed_obj
+        
+    # the set of failed objects is updated in place, so that the journal
+    # only records the objects that actually failed or recovered
+    @failed_obj.setter
+    def failed_obj(self, objects):
+        objects = set(objects)
+        self._failed_obj.difference_update(self._failed_obj - objects)
+        self._failed_obj.update(objects)
 
-    # function filtering pn to retrieve all objects of given subtypes
+    # function retrieving all objects of given subtypes from the pool: the 
+    # subtypes that are not of the given type are ignored
     def ftr(self, type, *sts):
-        keep = lambda r: r.subtype in sts
-        if type == 'interface':
-            return filter(keep, self.pn[type])
-        else:
-            return filter(keep, self.pn[type].values())
+        for subtype in dict.fromkeys(sts):
+            if subtype_to_type.get(subtype) == type and subtype in self.spn:
+                yield from self.spn[subtype].values()
         
-    # function filtering graph to retrieve all links of given subtypes
-    # attached to the source node. 
+    # function retrieving all links of given subtypes attached to the 
+    # source node. 
     # if ud (undirected) is set to True, we retrieve all links of the 
     # corresponding subtypes, else we check that 'src' is the source
     def gftr(self, src, type, *sts, ud=True):
-        keep = lambda r: r[1].subtype in sts and (ud or r[1].source == src)
-        return filter(keep, self.graph[src.id][type])
+        if src.id not in self.sgraph or type not in self.sgraph[src.id]:
+            return
+        adjacency = self.sgraph[src.id][type]
+        for subtype in dict.fromkeys(sts):
+            if subtype not in adjacency:
+                continue
+            for neighbor, link in adjacency[subtype]:
+                if ud or link.source == src:
+                    yield neighbor, link
           
     # 'lf' is the link factory. Creates or retrieves any type of link
     def lf(self, subtype='ethernet link', id=None, name=None, **kwargs):
@@ -70,13 +115,29 @@ class Graph(object):
             new_link = link_class_with_vc[subtype](**kwargs)
             self.name_to_id[name] = id
             self.pn[link_type][id] = new_link
-            self.graph[s.id][link_type].add((d, new_link))
-            self.graph[d.id][link_type].add((s, new_link))
+            self.spn[subtype][id] = new_link
+            self.index_link(new_link)
             if subtype in ('ethernet link', 'optical link'):
                 self.interfaces |= {new_link.interfaceS, new_link.interfaceD}
             self.cpt_link += 1
+            self.journal.record('add', (new_link,))
         return self.pn[link_type][id]
         
+    # adds a new link to the adjacency and pair indexes. Physical links
+    # record the changes of their costs and capacities in the journal
+    def index_link(self, link):
+        s, d, type, subtype = link.source, link.destination, link.type, link.subtype
+        self.graph[s.id][type].add((d, link))
+        self.graph[d.id][type].add((s, link))
+        self.sgraph[s.id][type][subtype].add((d, link))
+        self.sgraph[d.id][type][subtype].add((s, link))
+        self.pair_links[(s.id, d.id, type)].add(link)
+        self.pair_links[(d.id, s.id, type)].add(link)
+        if type == 'plink':
+            link.journal = self.journal
+            for interface in (link.interfaceS, link.interfaceD):
+                self.spn[interface.subtype][interface] = interface
+        
     # 'nf' is the node factory. Creates or retrieves any type of nodes
     def nf(self, subtype='router', id=None, **kwargs):
         if 'name' not in kwargs:
@@ -90,8 +151,10 @@ class Graph(object):
         id = self.cpt_node
         kwargs['id'] = id
         self.nodes[id] = node_class[subtype](**kwargs)
+        self.spn[subtype][id] = self.nodes[id]
         self.name_to_id[kwargs['name']] = id
         self.cpt_node += 1
+        self.journal.record('add', (self.nodes[id],))
         return self.nodes[id]
         
     # 'of' is the object factory: returns a link or a node from its name
@@ -159,11 +222,18 @@ class Graph(object):
             
     def erase_network(self):
         self.graph.clear()
+        self.sgraph.clear()
+        self.spn.clear()
+        self.pair_links.clear()
         for dict_of_objects in self.pn.values():
             dict_of_objects.clear()
+        self.journal.reset()
             
     def remove_node(self, node):
         self.nodes.pop(self.name_to_id.pop(node.name))
+        self.spn[node.subtype].pop(node.id, None)
+        self.sgraph.pop(node.id, None)
+        self.journal.record('remove', (node,))
         # retrieve adj links to delete them 
         dict_of_adj_links = self.graph.pop(node.id, {})
         for type_link, adj_obj in dict_of_adj_links.items():
@@ -173,17 +243,83 @@ class Graph(object):
     def remove_link(self, link):
         # if it is a physical link, remove the link's interfaces from the model
         if link.type == 'plink':
+            link.journal = None
             self.interfaces -= {link.interfaceS, link.interfaceD}
+            for interface in (link.interfaceS, link.interfaceD):
+                self.spn[interface.subtype].pop(interface, None)
         # remove the link itself from the model
         self.graph[link.source.id][link.type].discard((link.destination, link))
         self.graph[link.destination.id][link.type].discard((link.source, link))
+        for end, other_end in ((link.source, link.destination), 
+                               (link.destination, link.source)):
+            if end.id in self.sgraph:
+                self.sgraph[end.id][link.type][link.subtype].discard((other_end, link))
+        for pair in ((link.source.id, link.destination.id, link.type),
+                     (link.destination.id, link.source.id, link.type)):
+            if pair in self.pair_links:
+                self.pair_links[pair].discard(link)
+                if not self.pair_links[pair]:
+                    del self.pair_links[pair]
+        self.spn[link.subtype].pop(link.id, None)
         self.pn[link.type].pop(self.name_to_id.pop(link.name, None), None)
+        self.journal.record('remove', (link,))
+            
+    # removes a set of nodes and links, and all links attached to the nodes:
+    # the pools and indexes are updated in a single pass, and the removal
+    # counts as one change in the journal. Returns the removed objects.
+    def remove_many(self, objects):
+        nodes = {obj for obj in objects if obj.class_type == 'node'}
+        links = {obj for obj in objects if obj.class_type == 'link'}
+        for node in nodes:
+            for adjacent_links in self.graph.get(node.id, {}).values():
+                links.update(link for _, link in adjacent_links)
+        
+        interfaces = set()
+        for link in links:
+            source, destination = link.source, link.destination
+            if link.type == 'plink':
+                link.journal = None
+                interfaces.update((link.interfaceS, link.interfaceD))
+            # the adjacency of removed nodes is dropped as a whole below
+            for end, other_end in ((source, destination), (destination, source)):
+                if end in nodes:
+                    continue
+                self.graph[end.id][link.type].discard((other_end, link))
+                if end.id in self.sgraph:
+                    self.sgraph[end.id][link.type][link.subtype].discard(
+                                                            (other_end, link))
+            for pair in ((source.id, destination.id, link.type),
+                         (destination.id, source.id, link.type)):
+                if pair in self.pair_links:
+                    self.pair_links[pair].discard(link)
+                    if not self.pair_links[pair]:
+                        del self.pair_links[pair]
+            self.spn[link.subtype].pop(link.id, None)
+            self.pn[link.type].pop(link.id, None)
+            self.name_to_id.pop(link.name, None)
+        if interfaces:
+            self.interfaces -= interfaces
+            for interface in interfaces:
+                self.spn[interface.subtype].pop(interface, None)
+                
+        for node in nodes:
+            self.graph.pop(node.id, None)
+            self.sgraph.pop(node.id, None)
+            self.spn[node.subtype].pop(node.id, None)
+            self.nodes.pop(node.id, None)
+            self.name_to_id.pop(node.name, None)
+            
+        removed = nodes | links
+        if removed:
+            self.journal.record('remove', removed)
+        return removed
             
     def is_connected(self, nodeA, nodeB, link_type, subtype=None):
+        links = self.pair_links.get((nodeA.id, nodeB.id, link_type), ())
         if not subtype:
-            return any(n == nodeA for n, _ in self.graph[nodeB.id][link_type])
+            return bool(links)
         else:
-            return any(n == nodeA for n, _ in self.gftr(nodeB, link_type, subtype))
+            return any(link.subtype == subtype for link in links)
         
     # given a node, retrieves nodes attached with a link which subtype 
     # is in sts
@@ -210,21 +346,14 @@ class Graph(object):
         
     def number_of_links_between(self, nodeA, nodeB):
         return sum(
-                   n == nodeB 
-                   for _type in self.link_type 
-                   for n, _ in self.graph[nodeA.id][_type]
+                   len(self.pair_links.get((nodeA.id, nodeB.id, _type), ()))
+                   for _type in link_type
                    )
         
     def links_between(self, nodeA, nodeB, _type='all'):
-        if _type == 'all':
-            for type in link_type:
-                for neighbor, link in self.graph[nodeA.id][type]:
-                    if neighbor == nodeB:
-                        yield link
-        else:
-            for neighbor, link in self.graph[nodeA.id][_type]:
-                if neighbor == nodeB:
-                    yield link
+        types = link_type if _type == 'all' else (_type,)
+        for type in types:
+            yield from self.pair_links.get((nodeA.id, nodeB.id, type), ())
                                                 
     ## Graph functions
     
@@ -241,11 +370,22 @@ class Graph(object):
                         layer.add(neighbor)
                         yield neighbor
     
+    # components of the physical topology (objects in failure excluded)
+    def component_of(self, node):
+        return self.connectivity.component_of(node)
+        
+    def same_component(self, nodeA, nodeB):
+        component = self.component_of(nodeA)
+        return component is not None and component == self.component_of(nodeB)
+    
+    # unlike the former BFS-based version, the nodes in failure do not 
+    # belong to any component, and a physical link in failure does not
+    # connect its end nodes
     def connected_components(self):
-        visited = set()
+        components = defaultdict(set)
         for node in self.nodes.values():
-            if node not in visited:
-                new_comp = set(self.bfs(node))
-                visited.update(new_comp)
-                yield new_comp
+            component = self.component_of(node)
+            if component is not None:
+                components[component].add(node)
+        yield from components.values()
         
\ No newline at end of file
@@ -0,0 +1,139 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+
+# The journal records all changes of the topology: the version is increased
+# every time something changes, and each change is stored as an entry
+# (version, change, object, property) where change is one of:
+# - 'add' / 'remove': an object was added to / removed from the network
+# - 'update': a directional cost or capacity of a physical link was modified
+# ('property' is the name of the modified property, e.g 'costSD')
+# - 'failure' / 'recovery': an object was added to / removed from failed_obj
+# A result computed from the network can be stamped with the version it was
+# computed at: it is up-to-date as long as the version is the same, and the
+# entries recorded since then tell what has to be updated.
+
+class Journal(object):
+
+    def __init__(self, size=100000):
+        self.version = 0
+        self.entries = deque(maxlen=size)
+        # entries are dropped when the journal is full: 'truncated' is the
+        # highest version for which at least one entry was dropped
+        self.truncated = 0
+
+    def record(self, change, objects, property=None):
+        # a change of several objects at once (bulk creation, removal of a
+        # node and its links...) counts as a single version
+        self.version += 1
+        entries = self.entries
+        for obj in objects:
+            if len(entries) == entries.maxlen:
+                self.truncated = entries[0][0]
+            entries.append((self.version, change, obj, property))
+
+    # used when the whole network is erased: results computed at a previous
+    # version can no longer be updated incrementally
+    def reset(self):
+        self.version += 1
+        self.entries.clear()
+        self.truncated = self.version
+
+    # returns the entries recorded after 'version', or None if some of them
+    # were dropped (the caller must then rebuild its result from scratch)
+    def since(self, version):
+        if version < self.truncated:
+            return None
+        entries = []
+        for entry in reversed(self.entries):
+            if entry[0] <= version:
+                break
+            entries.append(entry)
+        return entries[::-1]
+
+# set of failed objects: all modifications are recorded in the journal
+class FailureSet(set):
+
+    def __init__(self, journal, objects=()):
+        super().__init__(objects)
+        self.journal = journal
+
+    def add(self, obj):
+        if obj not in self:
+            super().add(obj)
+            self.journal.record('failure', (obj,))
+
+    def discard(self, obj):
+        if obj in self:
+            super().discard(obj)
+            self.journal.record('recovery', (obj,))
+
+    def remove(self, obj):
+        super().remove(obj)
+        self.journal.record('recovery', (obj,))
+
+    def update(self, *iterables):
+        new = {obj for objects in iterables for obj in objects} - self
+        if new:
+            super().update(new)
+            self.journal.record('failure', new)
+
+    def difference_update(self, *iterables):
+        old = self & {obj for objects in iterables for obj in objects}
+        if old:
+            super().difference_update(old)
+            self.journal.record('recovery', old)
+
+    def intersection_update(self, *iterables):
+        old = self - self.intersection(*iterables)
+        if old:
+            super().difference_update(old)
+            self.journal.record('recovery', old)
+
+    def symmetric_difference_update(self, objects):
+        objects = set(objects)
+        old, new = self & objects, objects - self
+        if old:
+            super().difference_update(old)
+            self.journal.record('recovery', old)
+        if new:
+            super().update(new)
+            self.journal.record('failure', new)
+
+    def pop(self):
+        obj = super().pop()
+        self.journal.record('recovery', (obj,))
+        return obj
+
+    def clear(self):
+        if self:
+            self.journal.record('recovery', set(self))
+            super().clear()
+
+    def __ior__(self, objects):
+        self.update(objects)
+        return self
+
+    def __isub__(self, objects):
+        self.difference_update(objects)
+        return self
+
+    def __iand__(self, objects):
+        self.intersection_update(objects)
+        return self
+
+    def __ixor__(self, objects):
+        self.symmetric_difference_update(objects)
+        return self
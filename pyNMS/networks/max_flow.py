@@ -0,0 +1,99 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+
+# Maximum flow on the arrays of a compiled network (see compiled_network.py),
+# so that it can also run in a worker process. The residual capacity of an
+# arc e is capacity[e] - flow[e], where flow[e] = -flow[twin] (the flow of
+# the physical link in the direction of the arc).
+
+# Dinic algorithm. Each phase computes the level of the nodes (BFS from the
+# source), then a blocking flow along arcs that go one level up. The
+# blocking flow is found with an iterative DFS: each node has a current
+# arc, which is only moved forward when the arc is saturated or leads to a
+# dead end, so no arc is scanned twice within a phase. After an
+# augmentation, the search resumes from the tail of the first saturated arc.
+# Returns the flow of each arc and the value of the flow.
+def dinic(offsets, targets, arc_twin, capacity, s, t):
+    n = len(offsets) - 1
+    flow = [0]*len(targets)
+    total = 0
+    while True:
+        level = [-1]*n
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            node = queue.popleft()
+            # the nodes beyond the level of the target are useless
+            if node == t:
+                break
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                if level[neighbor] == -1 and capacity[e] - flow[e] > 0:
+                    level[neighbor] = level[node] + 1
+                    queue.append(neighbor)
+        if level[t] == -1:
+            return flow, total
+
+        current = list(offsets[:-1])
+        path, node = [], s
+        while True:
+            if node == t:
+                residuals = [capacity[e] - flow[e] for e in path]
+                delta = min(residuals)
+                for e in path:
+                    flow[e] += delta
+                    flow[arc_twin[e]] -= delta
+                total += delta
+                # the bottleneck arc is saturated exactly, even if rounding
+                # leaves it a tiny residual capacity (float capacities)
+                saturated = residuals.index(delta)
+                e = path[saturated]
+                flow[e], flow[arc_twin[e]] = capacity[e], -capacity[e]
+                node = targets[arc_twin[e]]
+                del path[saturated:]
+                continue
+            e, end = current[node], offsets[node + 1]
+            while e < end and not (level[targets[e]] == level[node] + 1
+                                        and capacity[e] - flow[e] > 0):
+                e += 1
+            current[node] = e
+            if e < end:
+                path.append(e)
+                node = targets[e]
+            # dead end: we go back to the previous node, and move its
+            # current arc forward
+            elif node == s:
+                break
+            else:
+                level[node] = -1
+                e = path.pop()
+                node = targets[arc_twin[e]]
+                current[node] += 1
+
+# source side of a minimum cut: the nodes that can still be reached from
+# the source in the residual network of a maximum flow
+def source_side(offsets, targets, capacity, flow, s):
+    side = bytearray(len(offsets) - 1)
+    side[s] = 1
+    queue = deque([s])
+    while queue:
+        node = queue.popleft()
+        for e in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[e]
+            if not side[neighbor] and capacity[e] - flow[e] > 0:
+                side[neighbor] = 1
+                queue.append(neighbor)
+    return side
@@ -13,20 +13,31 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from .graph import Graph
+from .compiled_network import CompiledNetwork
+from .all_pairs import AllPairsShortestPaths
+from .shortest_path_tree import ShortestPathTree, SPTCache
+from .contraction_hierarchy import ContractionHierarchy
+from .bulk_shortest_paths import BulkShortestPaths
+from .max_flow import dinic
+from .spfa import spfa, find_cycle
+from .gomory_hu import GomoryHuTree
 from autonomous_system.AS import AS_class
 from objects import objects
+import json
+import os
 import random
 import re
 import warnings
+from array import array
 from copy import copy
-from ip_networks.configuration import RouterConfiguration
 from objects.objects import *
 from miscellaneous.network_functions import *
 from math import cos, sin, asin, radians, sqrt, ceil, log
 from collections import defaultdict, deque, OrderedDict
 from heapq import heappop, heappush, nsmallest
 from operator import getitem, itemgetter
-from itertools import combinations
+from itertools import combinations, islice
+from threading import Thread
 from miscellaneous.union_find import UnionFind
 try:
     import numpy as np
@@ -34,6 +45,10 @@ try:
 except ImportError:
     warnings.warn('Package missing: linear programming functions will fail')
 
+# with float capacities and supplies, an excess of flow below the tolerance
+# is rounding: it is considered to be zero by the flow algorithms
+flow_tolerance = 1e-9
+
 class Network(Graph):
     
     def __init__(self, *args, **kwargs):
@@ -55,6 +70,16 @@ class Network(Graph):
                    'interface': self.interfaces
                    }
         self.pnAS = {}
+        # last compiled snapshot of the physical topology
+        self.compiled = None
+        # last all-pairs shortest paths computed from a snapshot
+        self.all_pairs = None
+        # shortest path trees computed from the current snapshot
+        self.spt_cache = SPTCache()
+        # contraction hierarchy built from a snapshot
+        self.hierarchy = None
+        # converted coordinates and bounds of the A* heuristic
+        self.geographic = None
         # useful for tests and listbox when we want to retrieve an object
         # based on its name. The only object that needs changing when a object
         # is renamed by the user.
@@ -125,7 +150,7 @@ class Network(Graph):
         if name not in self.pnAS:
             # creation of the AS
             self.pnAS[name] = AS_class[AS_type](
-                                                self.view,
+                                                self,
                                                 name, 
                                                 id,
                                                 plinks, 
@@ -139,7 +164,7 @@ class Network(Graph):
     ## Retrieve the credentials
     
     def get_credentials(self, node):
-        credentials = self.view.controller.credentials_window.get_credentials()
+        credentials = self.observer.get_credentials()
         for property in ('username', 'password', 'enable_password', 'ip_address'):
             value = getattr(node, property)
             if value:
@@ -335,7 +360,17 @@ class Network(Graph):
         # we need to remove all failures before dimensioning the physical links:
         # the set of failed physical link will be redefined, but we also need the
         # icons to be cleaned from the canvas
-        self.view.remove_failures()
+        self.failed_obj.clear()
+        self.observer.remove_failures()
+        
+        # the shortest path trees of the sources of the traffic flows that are
+        # not routed with routing tables are computed once without failure:
+        # for each failure, they are repaired instead of computed again
+        trees = {}
+        for traffic in self.traffics.values():
+            src, dest = traffic.source, traffic.destination
+            if not all(node.subtype == 'router' for node in (src, dest)):
+                trees[src] = self.shortest_path_tree(src)
         
         # we consider each physical link in the network to be failed, one by one
         for failed_plink in self.plinks.values():
@@ -343,13 +378,14 @@ class Network(Graph):
             # the physical link being failed, we will recreate all routing tables
             # then use the path finding procedure to map the traffic flows
             self.routing_table_creation()
-            self.path_finder()
+            self.path_finder({src: self.update_spt(tree, [failed_plink]) 
+                                            for src, tree in trees.items()})
             for plink in self.plinks.values():
                 for dir in ('SD', 'DS'):
-                    curr_traffic = getattr(plink, 'traffic' + dir)
-                    if curr_traffic > getattr(plink, 'wctraffic' + dir):
-                        setattr(plink, 'wctraffic' + dir, curr_traffic)
-                        setattr(plink, 'wcfailure', str(failed_plink))
+                    curr_traffic = self.value(plink, 'traffic' + dir)
+                    if curr_traffic > self.value(plink, 'wctraffic' + dir):
+                        self.set_value(plink, 'wctraffic' + dir, curr_traffic)
+                        self.set_value(plink, 'wcfailure', str(failed_plink))
         self.failed_obj.clear()
                     
     # this function creates both the ARP and the RARP tables
@@ -386,17 +422,50 @@ class Network(Graph):
     def reset_traffic(self):
         # reset the traffic for all physical links
         for plink in self.plinks.values():
-            plink.trafficSD = plink.trafficDS = 0.
+            self.set_value(plink, 'trafficSD', 0.)
+            self.set_value(plink, 'trafficDS', 0.)
                 
-    def path_finder(self):
+    # 'trees' are shortest path trees to use instead of new searches, e.g
+    # trees updated after a failure (see plink_dimensioning)
+    def path_finder(self, trees=None):
         self.reset_traffic()
+        trees = trees or {}
+        # the shortest path tree of a source is worth computing if several 
+        # demands start from it: otherwise, a point-to-point search is used
+        demands = defaultdict(int)
+        for traffic in self.traffics.values():
+            demands[traffic.source] += 1
+        # the paths avoid the failed nodes, which do not belong to any 
+        # component in the partition check below
+        failed_nodes = {obj for obj in self.failed_obj 
+                                            if obj.class_type == 'node'}
+        allowed_nodes = None
+        if failed_nodes:
+            allowed_nodes = set(self.nodes.values()) - failed_nodes
         for traffic in self.traffics.values():
             src, dest = traffic.source, traffic.destination
             if all(node.subtype == 'router' for node in (src, dest)):
-                self.RFT_path_finder(traffic)
+                path, _ = self.RFT_path_finder(traffic)
+            # if the demand is partitioned (because of a failure), there is 
+            # no need to look for a path
+            elif not self.same_component(src, dest):
+                path = []
+            elif src in trees:
+                _, path = trees[src].path(dest)
+            # the paths avoid the failed physical links and nodes, like the
+            # partition check above
+            elif demands[src] > 1:
+                _, path = self.shortest_path_tree(src, 
+                            allowed_nodes=allowed_nodes,
+                            excluded_plinks=self.failed_obj).path(dest)
             else:
-                _, traffic.path = self.A_star(src, dest)
-            if not traffic.path:
+                _, path = self.bidirectional_dijkstra(src, dest, 
+                                        allowed_nodes=allowed_nodes,
+                                        excluded_plinks=self.failed_obj)
+            # the path of a traffic computed on a fork is only stored in 
+            # the fork
+            self.set_value(traffic, 'path', path)
+            if not path:
                 print('no path found for {}'.format(traffic))
                 
     ## A) Ethernet switching table
@@ -483,7 +552,8 @@ class Network(Graph):
                     # a mapping IP <-> (MAC, outgoing interface)
                     new_dataflow.dst_mac = curr_node.arpt[nh_ip][0]
                     sd = (curr_node == ex_tk.source)*'SD' or 'DS'
-                    ex_tk.__dict__['traffic' + sd] += new_dataflow.throughput
+                    self.set_value(ex_tk, 'traffic' + sd, 
+                        self.value(ex_tk, 'traffic' + sd) + new_dataflow.throughput)
                     # add the exit physical link to the path
                     path.add(ex_tk)
                     # the next-hop is the node at the end of the exit physical link
@@ -529,7 +599,7 @@ class Network(Graph):
                                                 ex_int = ex_int
                                                 ))
         print(path)
-        traffic.path = path
+        self.set_value(traffic, 'path', path)
         return path, path_str
         
     ## 2) Add connected interfaces to the RFT
@@ -575,9 +645,61 @@ class Network(Graph):
         self.routing_table_creation()
         self.path_finder()
       
+    ## Compiled snapshot of the physical topology
+    
+    # all graph algorithms below run on an integer-indexed CSR snapshot 
+    # of the network (see compiled_network.py) rather than on self.graph.
+    # the snapshot is stamped with the version of the topology it was built
+    # at, and only rebuilt when the topology has changed since then.
+    # Algorithms must not modify it.
+    # Failures are not part of the snapshot: if the only changes since it 
+    # was built are failures and recoveries, it is kept as is.
+    def compile(self):
+        compiled = self.compiled
+        if compiled is None or compiled.version != self.version:
+            entries = None
+            if compiled is not None:
+                entries = self.journal.since(compiled.version)
+            if entries is None or any(change not in ('failure', 'recovery') 
+                                            for _, change, _, _ in entries):
+                self.compiled = CompiledNetwork(self)
+            self.compiled.version = self.version
+        return self.compiled
+        
+    ## What-if scenarios
+    
+    # a fork is a copy-on-write overlay of the network (see fork.py): the 
+    # algorithms that modify link properties (costs, flows) read and write 
+    # them with value / set_value, which only affect the fork.
+    def fork(self):
+        from .fork import NetworkFork
+        return NetworkFork(self)
+        
+    def value(self, obj, property):
+        return getattr(obj, property)
+        
+    def set_value(self, obj, property, value):
+        setattr(obj, property, value)
+      
     ## Shortest path(s) algorithms
     
     ## 1) Dijkstra algorithm
+    
+    # shortest path tree from the source (see shortest_path_tree.py): trees
+    # are cached until the topology or a cost changes, so that all demands
+    # from the same source share the same tree
+    def shortest_path_tree(
+                           self, 
+                           source, 
+                           metric = 'cost', 
+                           allowed_plinks = None, 
+                           allowed_nodes = None,
+                           excluded_plinks = None
+                           ):
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes)
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        return self.spt_cache.get(cn, source, metric, allowed_node, allowed_plink)
         
     def dijkstra(
                  self, 
@@ -587,39 +709,11 @@ class Network(Graph):
                  allowed_nodes = None
                  ):
         
-        if allowed_plinks is None:
-            allowed_plinks = set(self.plinks.values())
-        if allowed_nodes is None:
-            allowed_nodes = set(self.nodes.values())
-        
-        prec_node = {i: None for i in allowed_nodes}
-        prec_plink = {i: None for i in allowed_nodes}
-        visited = set()
-        dist = {i: float('inf') for i in allowed_nodes}
-        dist[source] = 0
-        heap = [(0, source)]
-        while heap:
-            dist_node, node = heappop(heap) 
-            if node not in visited:
-                visited.add(node)
-                for neighbor, adj_plink in self.graph[node.id]['plink']:
-                    # we ignore what's not allowed (not in the AS or in failure)
-                    if neighbor not in allowed_nodes:
-                        continue
-                    if adj_plink not in allowed_plinks:
-                        continue
-                    dist_neighbor = dist_node + adj_plink('cost', node)
-                    if dist_neighbor < dist[neighbor]:
-                        dist[neighbor] = dist_neighbor
-                        prec_node[neighbor] = node
-                        prec_plink[neighbor] = adj_plink
-                        heappush(heap, (dist_neighbor, neighbor))
-                        
-        # traceback the path from target to source
-        curr, path_plink = target, [prec_plink[target]]
-        while curr != source:
-            curr = prec_node[curr]
-            path_plink.append(prec_plink[curr])
+        tree = self.shortest_path_tree(
+                                       source, 
+                                       allowed_plinks = allowed_plinks, 
+                                       allowed_nodes = allowed_nodes
+                                       )
                         
         # we return:
         # - the dist dictionnary, that contains the distance from the source
@@ -627,9 +721,75 @@ class Network(Graph):
         # - the shortest path from source to target
         # - all edges that belong to the Shortest Path Tree
         # we need all three variables for Suurbale algorithm below
-        return dist, path_plink[:-1][::-1], filter(None, prec_plink.values())
+        return tree.distances(), tree.path(target)[1], tree.links()
         
     ## 2) A* algorithm for CSPF modelization
+    
+    # great-circle distance (km) between two nodes
+    def haversine_distance(self, s, d):
+        coord = (s.longitude, s.latitude, d.longitude, d.latitude)
+        # decimal degrees to radians conversion
+        lon_s, lat_s, lon_d, lat_d = map(radians, coord)
+    
+        delta_lon = lon_d - lon_s 
+        delta_lat = lat_d - lat_s 
+        a = sin(delta_lat/2)**2 + cos(lat_s)*cos(lat_d)*sin(delta_lon/2)**2
+        c = 2*asin(sqrt(min(1, a)))
+        
+        # radius of earth (km)
+        r = 6371 
+        
+        return c*r
+        
+    # geographic lower bound of the cost of a path, used as A* heuristic:
+    # the cost of a physical link is at least k times its length, where k is
+    # the smallest cost per km of all allowed physical links. The cost of a 
+    # path from a node to the target is therefore at least k times the 
+    # great-circle distance between them (admissible and consistent).
+    # Returns k and the distance function (between two node indices), with 
+    # k = 0 (no heuristic) if a cost is negative.
+    # The coordinates are not part of the snapshot: they are converted once 
+    # per snapshot and per version of the coordinates (Node.coordinates_version),
+    # and k is computed once per mask of allowed physical links.
+    def geographic_bound(self, cn, allowed_plink):
+        geographic = self.geographic
+        if (geographic is None or geographic[0] is not cn 
+                        or geographic[1] != Node.coordinates_version):
+            coordinates = []
+            for node in cn.nodes:
+                lat = radians(node.latitude)
+                coordinates.append((radians(node.longitude), lat, cos(lat)))
+                
+            def distance(i, j):
+                lon_i, lat_i, cos_i = coordinates[i]
+                lon_j, lat_j, cos_j = coordinates[j]
+                a = sin((lat_j - lat_i)/2)**2 + cos_i*cos_j*sin((lon_j - lon_i)/2)**2
+                return 12742*asin(sqrt(min(1, a)))
+                
+            geographic = (cn, Node.coordinates_version, distance, {})
+            self.geographic = geographic
+        _, _, distance, bounds = geographic
+        mask = bytes(allowed_plink)
+        if mask not in bounds:
+            # a few masks are kept: most queries use the same one
+            if len(bounds) == 16:
+                bounds.clear()
+            bounds[mask] = self.cost_per_km(cn, allowed_plink, distance)
+        return bounds[mask], distance
+        
+    def cost_per_km(self, cn, allowed_plink, distance):
+        k = float('inf')
+        costs = zip(cn.link_source, cn.link_destination, cn.costSD, cn.costDS)
+        for l, (s, d, costSD, costDS) in enumerate(costs):
+            if not allowed_plink[l]:
+                continue
+            if costSD < 0 or costDS < 0:
+                return 0
+            length = distance(s, d)
+            if length:
+                k = min(k, costSD/length, costDS/length)
+        # the bound is slightly lowered to absorb rounding errors
+        return 0 if k == float('inf') else k*(1 - 1e-9)
             
     def A_star(
                self, 
@@ -641,48 +801,59 @@ class Network(Graph):
                allowed_plinks = None, 
                allowed_nodes = None
                ):
-                
-        # initialize parameters
-        if excluded_nodes is None:
-            excluded_nodes = set()
-        if excluded_plinks is None:
-            excluded_plinks = set()
-        if path_constraints is None:
-            path_constraints = []
-        if allowed_plinks is None:
-            allowed_plinks = set(self.plinks.values())
-        if allowed_nodes is None:
-            allowed_nodes = set(self.nodes.values())
-            
-        pc = [target] + path_constraints[::-1]
-        visited = set()
-        heap = [(0, source, [source], [], pc)]
-        while heap:
-            dist, node, nodes, plinks, pc = heappop(heap)
-            if node not in visited:
-                visited.add(node)
-                if node == pc[-1]:
-                    visited.clear()
-                    heap.clear()
-                    pc.pop()
-                    if not pc:
-                        return nodes, plinks
-                for neighbor, adj_plink in self.graph[node.id]['plink']:
-                    # excluded and allowed nodes
-                    if neighbor not in allowed_nodes - excluded_nodes: 
+               
+        cn = self.compile()
+        # the allowed and excluded sets are converted to masks once
+        allowed_node = cn.node_mask(allowed_nodes, excluded_nodes or ())
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        offsets, targets = cn.offsets, cn.targets
+        arc_link, arc_cost = cn.arc_link, cn.arc_cost
+        k, distance = self.geographic_bound(cn, allowed_plink)
+        
+        # the path goes through all path constraints, in order: it is built 
+        # one segment at a time, from a constraint to the next one
+        waypoints = [source] + list(path_constraints or []) + [target]
+        n = len(cn)
+        path_node, path_arc = [cn.index[source]], []
+        for s, t in zip(waypoints, waypoints[1:]):
+            s, t = cn.index[s], cn.index[t]
+            # prec_arc is the index of the arc used to reach a node (-1 if 
+            # none): paths are not copied in the heap
+            prec_arc = [-1]*n
+            visited = bytearray(n)
+            dist = [float('inf')]*n
+            # heuristic of each node, computed when it is first reached
+            bound = [-1]*n
+            dist[s] = 0
+            heap = [(0, s)]
+            while heap:
+                _, node = heappop(heap)
+                if visited[node]:
+                    continue
+                if node == t:
+                    break
+                visited[node] = 1
+                dist_node = dist[node]
+                for e in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[e]
+                    # excluded and allowed nodes and physical links
+                    if visited[neighbor] or not allowed_node[neighbor]: 
                         continue
-                    # excluded and allowed physical links
-                    if adj_plink not in allowed_plinks - excluded_plinks: 
+                    if not allowed_plink[arc_link[e]]: 
                         continue
-                    heappush(heap, (
-                                    dist + adj_plink('cost', node), 
-                                    neighbor,
-                                    nodes + [neighbor], 
-                                    plinks + [adj_plink], 
-                                    pc
-                                    )
-                            )
-        return [], []
+                    dist_neighbor = dist_node + arc_cost[e]
+                    if dist_neighbor < dist[neighbor]:
+                        dist[neighbor] = dist_neighbor
+                        prec_arc[neighbor] = e
+                        if bound[neighbor] < 0:
+                            bound[neighbor] = k*distance(neighbor, t) if k else 0
+                        heappush(heap, (dist_neighbor + bound[neighbor], neighbor))
+            else:
+                return [], []
+            segment_node, segment_arc = cn.traceback(prec_arc, t)
+            path_node.extend(segment_node[1:])
+            path_arc.extend(segment_arc)
+        return cn.to_nodes(path_node), cn.to_links(path_arc)
 
     ## 3) Bellman-Ford algorithm
         
@@ -707,85 +878,124 @@ class Network(Graph):
         if allowed_nodes is None:
             allowed_nodes = set(self.nodes.values())
 
-        n = len(allowed_nodes)
-        prec_node = {i: None for i in allowed_nodes}
-        prec_plink = {i: None for i in allowed_nodes}
-        dist = {i: float('inf') for i in allowed_nodes}
-        dist[source] = 0
-        
-        for i in range(n+2):
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes, excluded_nodes)
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks)
+        offsets, targets = cn.offsets, cn.targets
+        arc_link, arc_cost = cn.arc_link, cn.arc_cost
+        
+        n = len(cn)
+        # the relaxation only starts from allowed nodes
+        allowed = [i for i in range(n) if allowed_node[i]]
+        s, t = cn.index[source], cn.index[target]
+        allowed_node[s] = 1
+        prec_arc = [-1]*n
+        dist = [float('inf')]*n
+        dist[s] = 0
+        
+        for i in range(len(allowed) + 2):
             negative_cycle = False
-            for node in allowed_nodes:
-                for neighbor, adj_plink in self.graph[node.id]['plink']:
-                    sd = (node == adj_plink.source)*'SD' or 'DS'
+            for node in allowed:
+                dist_node = dist[node]
+                if dist_node == float('inf'):
+                    continue
+                for e in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[e]
                     # excluded and allowed nodes
-                    if neighbor not in allowed_nodes - excluded_nodes: 
+                    if not allowed_node[neighbor]: 
                         continue
                     # excluded and allowed physical links
-                    if adj_plink not in allowed_plinks - excluded_plinks: 
+                    if not allowed_plink[arc_link[e]]: 
                         continue
-                    dist_neighbor = dist[node] + getattr(adj_plink, 'cost' + sd)
+                    dist_neighbor = dist_node + arc_cost[e]
                     if dist_neighbor < dist[neighbor]:
                         dist[neighbor] = dist_neighbor
-                        prec_node[neighbor] = node
-                        prec_plink[neighbor] = adj_plink
+                        prec_arc[neighbor] = e
                         negative_cycle = True
+            # if no label changed during a whole round, none ever will
+            if not negative_cycle:
+                break
                         
         # traceback the path from target to source
-        if dist[target] != float('inf') and not cycle:
-            curr, path_node, path_plink = target, [target], [prec_plink[target]]
-            while curr != source:
-                curr = prec_node[curr]
-                path_plink.append(prec_plink[curr])
-                path_node.append(curr)
-            return path_node[::-1], path_plink[:-1][::-1]
-        # if we want a cycle, and one exists, we find it
+        if dist[t] != float('inf') and not cycle:
+            path_node, path_arc = cn.traceback(prec_arc, t)
+            return cn.to_nodes(path_node), cn.to_links(path_arc)
+        # if we want a cycle, and one exists, we find it: starting from the
+        # target, we go through the predecessors
         if cycle and negative_cycle:
-                curr, path_node, path_plink = target, [target], [prec_plink[target]]
-                # return the cycle itself (for the cycle cancelling algorithm) 
-                # starting from the target, we go through the predecessors 
-                # we find any cycle (we don't necessarily have to come back to
-                # the target).
-                while curr not in path_node:
-                    curr = prec_node[curr]
-                    path_plink.append(prec_plink[curr])
-                    path_node.append(curr)
-                return path_node[::-1], path_plink[:-1][::-1]
+            return self.predecessor_cycle(cn, prec_arc, t)
         # if we didn't find a path, and were not looking for a cycle, 
         # we return empty lists
         return [], []
+        
+    # return the cycle itself (for the cycle cancelling algorithm) 
+    # starting from a node, we go through the predecessors until we meet a
+    # node twice: that node is on a cycle (we don't necessarily have to come
+    # back to the first node). A cycle of predecessors has a negative cost.
+    def predecessor_cycle(self, cn, prec_arc, node):
+        curr = find_cycle(cn.targets, cn.arc_twin, prec_arc, node)
+        if curr == -1:
+            return [], []
+        node, cycle_node, cycle_arc = curr, [], []
+        while True:
+            cycle_arc.append(prec_arc[node])
+            node = cn.arc_source(prec_arc[node])
+            if node == curr:
+                break
+            cycle_node.append(node)
+        path_node = [curr] + cycle_node[::-1] + [curr]
+        return cn.to_nodes(path_node), cn.to_links(cycle_arc[::-1])
+        
+    # queue-based Bellman-Ford (SPFA, label-correcting, see spfa.py): only
+    # the nodes whose distance decreased are scanned again, and the search 
+    # stops as soon as no distance changes anymore.
+    # Same parameters and results as bellman_ford, except that with 
+    # 'cycle', the cycle returned is the first one found, not necessarily 
+    # a cycle leading to the target. Without 'cycle', there is no path if a
+    # negative cycle can be reached from the source.
+    def spfa(
+             self, 
+             source, 
+             target, 
+             cycle = False,
+             excluded_plinks = None, 
+             excluded_nodes = None, 
+             allowed_plinks = None, 
+             allowed_nodes = None
+             ):
+             
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes, excluded_nodes or ())
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        s, t = cn.index[source], cn.index[target]
+        dist, prec_arc, cycle_node = spfa(cn.offsets, cn.targets, cn.arc_link, 
+                cn.arc_twin, cn.arc_cost, allowed_node, allowed_plink, s)
+        if cycle_node != -1:
+            return self.predecessor_cycle(cn, prec_arc, cycle_node) \
+                                                if cycle else ([], [])
+        if cycle or dist[t] == float('inf'):
+            return [], []
+        path_node, path_arc = cn.traceback(prec_arc, t)
+        return cn.to_nodes(path_node), cn.to_links(path_arc)
             
     ## 4) Floyd-Warshall algorithm
+    
+    # all-pairs shortest paths (see all_pairs.py): the engine is chosen 
+    # according to the density of the graph unless specified ('dijkstra' or
+    # 'floyd_warshall'). The result is cached with the snapshot it was 
+    # computed from, i.e until the topology changes.
+    def all_pairs_shortest_paths(self, engine=None):
+        cn, result = self.compile(), self.all_pairs
+        if result is None or result.cn is not cn or engine not in (None, 
+                                                                result.engine):
+            result = self.all_pairs = AllPairsShortestPaths(cn, engine)
+        return result
             
+    # returns False if there is a negative cycle. Otherwise, the result 
+    # can be used as a dictionnary: all_length[source][target]
     def floyd_warshall(self):
-        nodes = list(self.nodes.values())
-        n = len(nodes)
-        W = [[0]*n for _ in range(n)]
-        
-        for id1, n1 in enumerate(nodes):
-            for id2, n2 in enumerate(nodes):
-                if id1 != id2:
-                    for neighbor, plink in self.graph[n1.id]['plink']:
-                        if neighbor == n2:
-                            W[id1][id2] = plink.costSD
-                            break
-                    else:
-                        W[id1][id2] = float('inf')
-                        
-        for k in range(n):
-            for u in range(n):
-                for v in range(n):
-                    W[u][v] = min(W[u][v], W[u][k] + W[k][v])
-                    
-        if any(W[v][v] < 0 for v in range(n)):
-            return False
-        else:
-            all_length = defaultdict(dict)
-            for id1, n1 in enumerate(nodes):
-                for id2, n2 in enumerate(nodes):
-                    all_length[n1][n2] = W[id1][id2]
-                    
-        return all_length  
+        all_length = self.all_pairs_shortest_paths('floyd_warshall')
+        return False if all_length.negative_cycle else all_length
         
     ## 5) DFS (all loop-free paths)
         
@@ -811,6 +1021,458 @@ class Network(Graph):
                 yield list(path)
         yield from find_all_paths()
         
+    ## 6) Yen algorithm (k shortest loop-free paths)
+    
+    # generates the loop-free paths from source to target in increasing 
+    # order of cost, as (nodes, physical links), with the same allowed and 
+    # excluded parameters as A*. Paths are only computed when requested: 
+    # 'k' is the maximum number of paths (no limit if None).
+    # - each new path is the cheapest of all deviations of the previous 
+    # paths: for each node of the last path found (the spur node), we look
+    # for the shortest path to the target that starts like the last path 
+    # up to the spur node, then leaves it with a physical link that no 
+    # other path with the same beginning used, without going through the 
+    # beginning again.
+    # - the spur searches use A* with the exact distance to the target in 
+    # the whole graph as heuristic: the tree of the shortest paths to the 
+    # target (reverse costs) is computed once, and shared with the cache.
+    # All costs must be non-negative.
+    def k_shortest_paths(
+                         self, 
+                         source, 
+                         target, 
+                         k = None,
+                         excluded_plinks = None, 
+                         excluded_nodes = None, 
+                         allowed_plinks = None, 
+                         allowed_nodes = None
+                         ):
+                         
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes, excluded_nodes or ())
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        offsets, targets = cn.offsets, cn.targets
+        arc_link, arc_cost = cn.arc_link, cn.arc_cost
+        s, t = cn.index[source], cn.index[target]
+        allowed_node[s] = 1
+        # distance from all nodes to the target (the mask is copied, as it 
+        # is modified below)
+        bound = self.spt_cache.get(cn, target, 'rcost', 
+                                bytearray(allowed_node), allowed_plink).dist
+        
+        # shortest path from a spur node to the target that does not use the
+        # blocked arcs. The search only visits a few nodes: the distances 
+        # and predecessors are stored in dictionnaries.
+        def spur_search(spur, blocked_arcs):
+            dist, prec_arc, visited = {spur: 0}, {spur: -1}, set()
+            heap = [(bound[spur], spur)]
+            while heap:
+                _, node = heappop(heap)
+                if node in visited:
+                    continue
+                if node == t:
+                    break
+                visited.add(node)
+                dist_node = dist[node]
+                for e in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[e]
+                    if neighbor in visited or not allowed_node[neighbor]:
+                        continue
+                    if not allowed_plink[arc_link[e]] or e in blocked_arcs:
+                        continue
+                    dist_neighbor = dist_node + arc_cost[e]
+                    if dist_neighbor < dist.get(neighbor, float('inf')):
+                        dist[neighbor] = dist_neighbor
+                        prec_arc[neighbor] = e
+                        heappush(heap, (dist_neighbor + bound[neighbor], neighbor))
+            else:
+                return None
+            path_node, path_arc = [t], []
+            while prec_arc[path_node[-1]] != -1:
+                path_arc.append(prec_arc[path_node[-1]])
+                path_node.append(cn.arc_source(path_arc[-1]))
+            return dist[t], path_node[::-1], path_arc[::-1]
+            
+        if bound[s] == float('inf'):
+            return
+        # the paths found so far, and the candidates (deviations)
+        paths, candidates = [spur_search(s, ())], []
+        seen = {tuple(paths[0][2])}
+        while True:
+            cost, path_node, path_arc = paths[-1]
+            yield cn.to_nodes(path_node), cn.to_links(path_arc)
+            if k is not None and len(paths) == k:
+                return
+            root_cost = 0
+            for i, spur in enumerate(path_node[:-1]):
+                root_arc = path_arc[:i]
+                # arcs used by the paths that start with the same root
+                blocked_arcs = {p_arc[i] for _, _, p_arc in paths 
+                                                if p_arc[:i] == root_arc}
+                # the spur path must not go through the root path again
+                for node in path_node[:i]:
+                    allowed_node[node] = 0
+                spur_path = spur_search(spur, blocked_arcs)
+                for node in path_node[:i]:
+                    allowed_node[node] = 1
+                if spur_path:
+                    spur_cost, spur_node, spur_arc = spur_path
+                    candidate_arc = tuple(root_arc + spur_arc)
+                    if candidate_arc not in seen:
+                        seen.add(candidate_arc)
+                        heappush(candidates, (
+                                              root_cost + spur_cost, 
+                                              len(candidate_arc),
+                                              candidate_arc,
+                                              path_node[:i] + spur_node
+                                              ))
+                root_cost += arc_cost[path_arc[i]]
+            if not candidates:
+                return
+            cost, _, candidate_arc, candidate_node = heappop(candidates)
+            paths.append((cost, candidate_node, list(candidate_arc)))
+        
+    ## 7) Bidirectional Dijkstra algorithm
+    
+    # point-to-point shortest path: a forward search from the source (costs
+    # of the arcs) and a backward search from the target (costs of the arcs
+    # in the reverse direction) are run alternately. Every time a node is 
+    # reached by both searches, we keep the best path going through it.
+    # The search stops when the sum of the smallest distances in both heaps
+    # is no lower than the cost of that path: no better path can be found.
+    def bidirectional_dijkstra(
+                               self, 
+                               source, 
+                               target, 
+                               allowed_plinks = None, 
+                               allowed_nodes = None,
+                               excluded_plinks = None
+                               ):
+                               
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes)
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        offsets, targets, arc_link = cn.offsets, cn.targets, cn.arc_link
+        s, t = cn.index[source], cn.index[target]
+        if s == t:
+            return [source], []
+        if not allowed_node[t]:
+            return [], []
+            
+        # the first item is the forward search, the second the backward 
+        # search. Only a few nodes are visited: dictionnaries are used.
+        costs = (cn.arc_cost, cn.arc_rcost)
+        dist, prec_arc = ({s: 0}, {t: 0}), ({s: -1}, {t: -1})
+        visited, heaps = (set(), set()), ([(0, s)], [(0, t)])
+        best, meeting = float('inf'), None
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            # we extend the search with the smallest heap
+            side = len(heaps[0]) > len(heaps[1])
+            dist_side, other_side = dist[side], dist[not side]
+            dist_node, node = heappop(heaps[side])
+            if node in visited[side]:
+                continue
+            visited[side].add(node)
+            arc_cost = costs[side]
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                if not allowed_node[neighbor] or not allowed_plink[arc_link[e]]:
+                    continue
+                dist_neighbor = dist_node + arc_cost[e]
+                if dist_neighbor < dist_side.get(neighbor, float('inf')):
+                    dist_side[neighbor] = dist_neighbor
+                    prec_arc[side][neighbor] = e
+                    heappush(heaps[side], (dist_neighbor, neighbor))
+                    if dist_neighbor + other_side.get(neighbor, float('inf')) < best:
+                        best = dist_neighbor + other_side[neighbor]
+                        meeting = neighbor
+                        
+        if meeting is None:
+            return [], []
+        # the path from the source to the meeting node
+        path_node, path_arc = [meeting], []
+        while prec_arc[0][path_node[-1]] != -1:
+            path_arc.append(prec_arc[0][path_node[-1]])
+            path_node.append(cn.arc_source(path_arc[-1]))
+        path_node.reverse()
+        path_arc.reverse()
+        # and from the meeting node to the target: the backward search 
+        # reached a node with the arc in the opposite direction
+        node = meeting
+        while prec_arc[1][node] != -1:
+            e = prec_arc[1][node]
+            path_arc.append(cn.arc_twin[e])
+            node = cn.arc_source(e)
+            path_node.append(node)
+        return cn.to_nodes(path_node), cn.to_links(path_arc)
+        
+    ## 8) Resource-constrained shortest path (CSPF)
+    
+    # propagation speed in optical fibers, used to compute the delay of a 
+    # physical link (ms) from its distance (km)
+    propagation_speed = 200
+    
+    # cheapest path from source to target through all waypoints (in order):
+    # - with a delay (ms) of at most 'max_delay' and at most 'max_hops' 
+    # physical links
+    # - using only the directions of physical links whose residual capacity 
+    # (capacity - traffic) is at least 'bandwidth'
+    # Label-setting algorithm: a label is a partial path, with its cost and 
+    # its constrained resources (delay, hops). Labels are extended in 
+    # increasing order of cost plus a lower bound of the cost to the 
+    # target, and a label is discarded if another label of the same node 
+    # has a lower or equal cost and lower or equal resources (dominance), 
+    # or if it cannot reach the target within the limits.
+    # Waypoints are handled with a layered graph: the layer of a label is
+    # the number of waypoints it went through, so that a path can go 
+    # through the same node in different layers.
+    def constrained_shortest_path(
+                                  self, 
+                                  source, 
+                                  target, 
+                                  waypoints = None,
+                                  bandwidth = 0,
+                                  max_delay = float('inf'),
+                                  max_hops = float('inf'),
+                                  excluded_plinks = None, 
+                                  excluded_nodes = None, 
+                                  allowed_plinks = None, 
+                                  allowed_nodes = None
+                                  ):
+                                  
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes, excluded_nodes or ())
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        offsets, targets, arc_link = cn.offsets, cn.targets, cn.arc_link
+        arc_cost, arc_twin = cn.arc_cost, cn.arc_twin
+        n, s = len(cn), cn.index[source]
+        allowed_node[s] = 1
+        # the layer l ends at the l-th waypoint, the last layer at the target
+        stops = [cn.index[node] for node in waypoints or ()] + [cn.index[target]]
+        last = len(stops) - 1
+        
+        # allowed arcs, with bandwidth pruning
+        arc_allowed = bytearray(allowed_plink[l] for l in arc_link)
+        if bandwidth:
+            for e, l in enumerate(arc_link):
+                if not arc_allowed[e]:
+                    continue
+                dir = 'SD' if cn.arc_sd[e] else 'DS'
+                traffic = self.value(cn.links[l], 'traffic' + dir)
+                if cn.arc_capacity[e] - traffic < bandwidth:
+                    arc_allowed[e] = 0
+                    
+        # the constrained resources: per-arc values and limit
+        resources = []
+        if max_delay < float('inf'):
+            speed = self.propagation_speed
+            arc_delay = [cn.links[l].distance/speed for l in arc_link]
+            resources.append((arc_delay, max_delay))
+        if max_hops < float('inf'):
+            resources.append(([1]*len(arc_link), max_hops))
+                    
+        # lower bounds: bounds[l][v] is the lowest value of a metric from 
+        # the node v in the layer l to the target, through the next waypoints
+        def lower_bounds(arc_values):
+            bounds, tail = [None]*len(stops), 0
+            for layer in range(last, -1, -1):
+                # reverse search from the end of the layer: a node w is 
+                # reached from node with the twin of the arc node -> w
+                dist, visited = [float('inf')]*n, bytearray(n)
+                dist[stops[layer]] = 0
+                heap = [(0, stops[layer])]
+                while heap:
+                    dist_node, node = heappop(heap)
+                    if visited[node]:
+                        continue
+                    visited[node] = 1
+                    for e in range(offsets[node], offsets[node + 1]):
+                        neighbor, twin = targets[e], arc_twin[e]
+                        if not allowed_node[neighbor] or not arc_allowed[twin]:
+                            continue
+                        dist_neighbor = dist_node + arc_values[twin]
+                        if dist_neighbor < dist[neighbor]:
+                            dist[neighbor] = dist_neighbor
+                            heappush(heap, (dist_neighbor, neighbor))
+                bounds[layer] = [d + tail for d in dist]
+                if layer:
+                    tail = bounds[layer][stops[layer - 1]]
+            return bounds
+            
+        cost_bound = lower_bounds(arc_cost)
+        resource_bounds = [lower_bounds(values) for values, _ in resources]
+        
+        # a label is stored as (node, layer, resources, parent, arc): the 
+        # parent is the index of the label it was extended from
+        layer = 0
+        while layer < last and s == stops[layer]:
+            layer += 1
+        if cost_bound[layer][s] == float('inf'):
+            return [], []
+        labels = [(s, layer, (0,)*len(resources), -1, -1)]
+        heap = [(cost_bound[layer][s], 0, 0)]
+        # resources of the labels extended from each (node, layer)
+        settled = defaultdict(list)
+        while heap:
+            _, cost, label = heappop(heap)
+            node, layer, used, _, _ = labels[label]
+            # dominance: the labels settled before have a lower cost
+            state = settled[layer*n + node]
+            if any(all(x <= y for x, y in zip(other, used)) for other in state):
+                continue
+            if layer == last and node == stops[last]:
+                break
+            state.append(used)
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                if not allowed_node[neighbor] or not arc_allowed[e]:
+                    continue
+                new_layer = layer
+                while new_layer < last and neighbor == stops[new_layer]:
+                    new_layer += 1
+                bound = cost_bound[new_layer][neighbor]
+                if bound == float('inf'):
+                    continue
+                new_used = tuple(x + values[e] for x, (values, _) in 
+                                                    zip(used, resources))
+                if any(x + bounds[new_layer][neighbor] > limit for x, 
+                        bounds, (_, limit) in zip(new_used, resource_bounds, 
+                                                                resources)):
+                    continue
+                labels.append((neighbor, new_layer, new_used, label, e))
+                new_cost = cost + arc_cost[e]
+                heappush(heap, (new_cost + bound, new_cost, len(labels) - 1))
+        else:
+            return [], []
+            
+        path_node, path_arc = [node], []
+        while labels[label][3] != -1:
+            path_arc.append(labels[label][4])
+            label = labels[label][3]
+            path_node.append(labels[label][0])
+        return cn.to_nodes(path_node[::-1]), cn.to_links(path_arc[::-1])
+        
+    ## 9) Contraction hierarchy
+    
+    # preprocessing for repeated point-to-point queries (see 
+    # contraction_hierarchy.py). With 'background', the hierarchy is built
+    # in a thread and used once it is ready: the thread is returned.
+    def build_contraction_hierarchy(self, background=False):
+        cn = self.compile()
+        def build():
+            self.hierarchy = ContractionHierarchy(cn)
+        if not background:
+            build()
+            return self.hierarchy
+        thread = Thread(target=build, daemon=True)
+        thread.start()
+        return thread
+        
+    # returns the hierarchy if it was built from the current snapshot, i.e
+    # if neither the topology nor a cost changed since, None otherwise
+    def contraction_hierarchy(self):
+        hierarchy = self.hierarchy
+        if hierarchy is not None and hierarchy.cn is not self.compile():
+            hierarchy = self.hierarchy = None
+        return hierarchy
+        
+    # shortest path with the contraction hierarchy if it is up-to-date, 
+    # with the bidirectional Dijkstra algorithm otherwise
+    def CH_shortest_path(self, source, target):
+        hierarchy = self.contraction_hierarchy()
+        if hierarchy is None:
+            return self.bidirectional_dijkstra(source, target)
+        return hierarchy.path(source, target)
+        
+    def CH_distance(self, source, target):
+        hierarchy = self.contraction_hierarchy()
+        if hierarchy is None:
+            return self.shortest_path_tree(source).distance(target)
+        return hierarchy.distance(source, target)
+        
+    # the hierarchy is saved next to the project file, and reloaded with the
+    # project if the topology and the costs did not change in between
+    def save_contraction_hierarchy(self, filepath):
+        hierarchy = self.contraction_hierarchy()
+        if hierarchy is not None:
+            with open(filepath, 'w') as file:
+                json.dump(hierarchy.to_dict(), file)
+        
+    def load_contraction_hierarchy(self, filepath):
+        if not os.path.isfile(filepath):
+            return None
+        with open(filepath) as file:
+            data = json.load(file)
+        self.hierarchy = ContractionHierarchy.from_dict(data, self.compile())
+        return self.hierarchy
+        
+    ## 10) Shortest paths for many pairs
+    
+    # shortest paths for a list of (source, target) pairs, with a single
+    # search per source, spread over 'workers' processes (one per core by
+    # default, none if workers is 1). 'algorithm' is 'dijkstra' or 'spfa'
+    # (negative costs: like Network.spfa, there is no path from a source 
+    # that reaches a negative cycle). The result is indexed like the pairs (see
+    # bulk_shortest_paths.py): result.path(i) is the path of pairs[i].
+    def shortest_paths_bulk(
+                            self, 
+                            pairs, 
+                            algorithm = 'dijkstra', 
+                            workers = None,
+                            allowed_plinks = None, 
+                            allowed_nodes = None
+                            ):
+        cn = self.compile()
+        return BulkShortestPaths(
+                                 cn, 
+                                 pairs, 
+                                 algorithm, 
+                                 workers, 
+                                 cn.node_mask(allowed_nodes), 
+                                 cn.link_mask(allowed_plinks)
+                                 )
+        
+    ## 11) Dynamic shortest path tree
+    
+    # returns the shortest path tree 'tree' updated after changes on a few
+    # physical links (a cost change, a failure or a recovery): the changed
+    # links in failure are excluded from the new tree, and the physical 
+    # links excluded by the caller of the first tree stay excluded. Only 
+    # the nodes whose distance changes are searched again (see 
+    # shortest_path_tree.py), unless objects were added or removed since 
+    # the tree was computed: it is then computed from scratch, with the 
+    # same allowed objects.
+    def update_spt(self, tree, changed_links):
+        cn, old = self.compile(), tree.cn
+        changed_links = list(changed_links)
+        if cn is not old and (cn.nodes != old.nodes or cn.links != old.links):
+            source = old.nodes[tree.source]
+            nodes = links = None
+            if not all(tree.allowed_node):
+                nodes = [node for i, node in enumerate(old.nodes) 
+                                                    if tree.allowed_node[i]]
+            if not all(tree.base_plink):
+                links = [link for l, link in enumerate(old.links) 
+                                                    if tree.base_plink[l]]
+            # the links excluded by a failure stay excluded, unless they 
+            # changed since
+            failed = [link for l, link in enumerate(old.links) 
+                        if tree.base_plink[l] and not tree.allowed_plink[l] 
+                        and link not in changed_links]
+            failed += [link for link in changed_links if link in self.failed_obj]
+            new = ShortestPathTree(cn, source, tree.metric, 
+                            cn.node_mask(nodes), cn.link_mask(links, failed))
+            new.base_plink = cn.link_mask(links)
+            return new
+        changed = [cn.link_index[link] for link in changed_links]
+        allowed_plink = bytearray(tree.allowed_plink)
+        for l in changed:
+            allowed_plink[l] = tree.base_plink[l] and (
+                                        cn.links[l] not in self.failed_obj)
+        return tree.repair(cn, allowed_plink, changed)
+        
     ## Link-disjoint / link-and-node-disjoint shortest pair algorithms
     
     ## 1) A* link-disjoint pair search
@@ -850,7 +1512,7 @@ class Network(Graph):
                     # or in the path we've used to reach the target)
                     if neighbor not in a_n or adj_plink not in a_t-e_o:
                         continue
-                    cost = getattr(adj_plink, 'cost' + sd)
+                    cost = self.value(adj_plink, 'cost' + sd)
                     heappush(heap, (dist + cost, neighbor, 
                                                 path_plink + [adj_plink], e_o))
         return [], []
@@ -861,7 +1523,7 @@ class Network(Graph):
     # - we find the shortest path from source to target using A* algorithm
     # - we replace bidirectionnal physical links of the shortest path with 
     # unidirectional physical links with a negative cost
-    # - we run Bellman-Ford algorithm to find the new 
+    # - we run Bellman-Ford algorithm (SPFA) to find the new 
     # shortest path from source to target
     # - we remove all overlapping physical links
         
@@ -870,15 +1532,11 @@ class Network(Graph):
         if a_n is None:
             a_n = set(self.nodes.values())
             
-        # we store the cost value in the flow parameters, since bhandari 
-        # algorithm relies on graph transformation, and the costs of the edges
-        # will be modified.
-        # at the end, we will revert the cost to their original value
-        for plink in a_t:
-            plink.flowSD = plink.costSD
-            plink.flowDS = plink.costDS
+        # bhandari algorithm relies on graph transformation: the costs of 
+        # the edges are modified in a fork of the network
+        fork = self.fork()
             
-        _, first_path = self.A_star(
+        _, first_path = fork.A_star(
                               source, 
                               target, 
                               allowed_plinks = a_t, 
@@ -892,20 +1550,16 @@ class Network(Graph):
         for plink in first_path:
             dir = 'SD' * (current_node == plink.source) or 'DS'
             reverse_dir = 'SD' if dir == 'DS' else 'DS'
-            setattr(plink, 'cost' + dir, float('inf'))
-            setattr(plink, 'cost' + reverse_dir, -1)
+            fork.set_value(plink, 'cost' + dir, float('inf'))
+            fork.set_value(plink, 'cost' + reverse_dir, -1)
             current_node = plink.destination if dir == 'SD' else plink.source
             
-        _, second_path = self.bellman_ford(
-                                           source, 
-                                           target, 
-                                           allowed_plinks = a_t, 
-                                           allowed_nodes = a_n
-                                           )
-        
-        for plink in a_t:
-            plink.costSD = plink.flowSD
-            plink.costDS = plink.flowDS
+        _, second_path = fork.spfa(
+                                   source, 
+                                   target, 
+                                   allowed_plinks = a_t, 
+                                   allowed_nodes = a_n
+                                   )
 
         return set(first_path) ^ set(second_path)
         
@@ -923,15 +1577,11 @@ class Network(Graph):
         if a_n is None:
             a_n = set(self.nodes.values())
             
-        # we store the cost value in the flow parameters, since bhandari 
-        # algorithm relies on graph transformation, and the costs of the edges
-        # will be modified.
-        # at the end, we will revert the cost to their original value
-        for plink in a_t:
-            plink.flowSD = plink.costSD
-            plink.flowDS = plink.costDS
+        # suurbale algorithm relies on graph transformation: the costs of 
+        # the edges are modified in a fork of the network
+        fork = self.fork()
             
-        dist, first_path, tree = self.dijkstra(
+        dist, first_path, tree = fork.dijkstra(
                               source, 
                               target, 
                               allowed_plinks = a_t, 
@@ -943,17 +1593,19 @@ class Network(Graph):
             # new_c(a, b) = c(a, b) - D(b) + D(a) where D(x) is the 
             # distance from the source to x.
             src, dest = plink.source, plink.destination
-            plink.costSD += dist[src] - dist[dest]
-            plink.costDS += dist[dest] - dist[src]
+            fork.set_value(plink, 'costSD', 
+                            plink.costSD + dist[src] - dist[dest])
+            fork.set_value(plink, 'costDS', 
+                            plink.costDS + dist[dest] - dist[src])
             
         # we exclude the edge of the shortest path (infinite cost)
         current_node = source
         for plink in first_path:
             dir = 'SD' * (current_node == plink.source) or 'DS'
-            setattr(plink, 'cost' + dir, float('inf'))
+            fork.set_value(plink, 'cost' + dir, float('inf'))
             current_node = plink.destination if dir == 'SD' else plink.source
             
-        _, second_path = self.A_star(
+        _, second_path = fork.A_star(
                               source, 
                               target, 
                               allowed_plinks = a_t, 
@@ -961,13 +1613,205 @@ class Network(Graph):
                               )
                               
         return set(first_path) ^ set(second_path)
+        
+    ## 3) K disjoint shortest paths
+    
+    # k paths from source to target that share no physical link ('link'),
+    # no node ('node'), or no shared risk link group ('srlg'), with the 
+    # lowest total cost (costs must be non-negative). Returns a list of 
+    # (nodes, physical links) sorted by cost, shorter than k if there are 
+    # not enough disjoint paths (empty if an allowed cost is negative).
+    # Nothing is modified: the flows and potentials are private arrays.
+    # For 'srlg', 'srlgs' maps a physical link to the names of its groups 
+    # (without any group, SRLG-disjoint paths are link-disjoint paths).
+    def disjoint_paths(
+                       self, 
+                       source, 
+                       target, 
+                       k = 2, 
+                       mode = 'link',
+                       srlgs = None,
+                       excluded_plinks = None, 
+                       allowed_plinks = None, 
+                       allowed_nodes = None
+                       ):
+        if mode not in ('link', 'node', 'srlg'):
+            raise ValueError('unknown disjointness mode: {}'.format(mode))
+        if mode == 'srlg':
+            if srlgs:
+                return self.srlg_disjoint_paths(source, target, k, srlgs, 
+                        set(excluded_plinks or ()), allowed_plinks, allowed_nodes)
+            mode = 'link'
+        
+        # successive shortest paths: k paths are sent one after another in 
+        # a residual graph, where a path can cancel a previous path on a 
+        # physical link (or node) by using it in the opposite direction.
+        # For node-disjointness, each node v is split into two states, 
+        # v_in (2v) and v_out (2v + 1), joined by a state arc of capacity 1.
+        # The residual graph is never built: the arcs available from a state
+        # are derived from the flow arrays.
+        # With the potential of each state (sum of its distances in the 
+        # previous searches), the reduced costs are non-negative and each 
+        # path is found with Dijkstra algorithm.
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes)
+        allowed_plink = cn.link_mask(allowed_plinks, excluded_plinks or ())
+        offsets, targets = cn.offsets, cn.targets
+        arc_link, arc_twin, arc_cost = cn.arc_link, cn.arc_twin, cn.arc_cost
+        n, inf = len(cn), float('inf')
+        s, t = cn.index[source], cn.index[target]
+        if s == t:
+            return []
+        if any(arc_cost[e] < 0 for e in range(len(targets)) 
+                                            if allowed_plink[arc_link[e]]):
+            return []
+        allowed_node[s] = allowed_node[t] = 1
+        # flow of each arc, and of each node (v_in -> v_out)
+        flow, node_flow = bytearray(len(targets)), bytearray(n)
+        # in link mode, or for the source and target, nodes are not limited
+        split = bytearray(n) if mode == 'link' else bytearray(b'\x01')*n
+        split[s] = split[t] = 0
+        potential = [0]*(2*n)
+        
+        for _ in range(k):
+            dist = [inf]*(2*n)
+            # prec[state] = (previous state, arc) where arc is -1 for the 
+            # state arc of a node
+            prec = [None]*(2*n)
+            visited = bytearray(2*n)
+            dist[2*s + 1] = 0
+            heap = [(0, 2*s + 1)]
+            while heap:
+                dist_state, state = heappop(heap)
+                if visited[state]:
+                    continue
+                visited[state] = 1
+                node, out = divmod(state, 2)
+                moves = []
+                # state arc of the node (forward, or backward to cancel)
+                if not split[node] or node_flow[node] == out:
+                    moves.append((state ^ 1, 0, -1))
+                for e in range(offsets[node], offsets[node + 1]):
+                    neighbor, twin = targets[e], arc_twin[e]
+                    if not allowed_node[neighbor]:
+                        continue
+                    if not allowed_plink[arc_link[e]] or neighbor == node:
+                        continue
+                    # from v_out: new flow on e (neighbor_in)
+                    if out and not flow[e] and arc_cost[e] != inf:
+                        moves.append((2*neighbor, arc_cost[e], e))
+                    # from v_in: the flow of the twin arc, which ends at 
+                    # v_in, is canceled (neighbor_out)
+                    if not out and flow[twin]:
+                        moves.append((2*neighbor + 1, -arc_cost[twin], twin))
+                for next_state, cost, e in moves:
+                    if visited[next_state]:
+                        continue
+                    reduced = cost + potential[state] - potential[next_state]
+                    if dist_state + reduced < dist[next_state]:
+                        dist[next_state] = dist_state + reduced
+                        prec[next_state] = (state, e)
+                        heappush(heap, (dist_state + reduced, next_state))
+            if dist[2*t] == inf:
+                break
+            for state in range(2*n):
+                if dist[state] < inf:
+                    potential[state] += dist[state]
+            # the flow is sent along the path
+            state = 2*t
+            while state != 2*s + 1:
+                previous, e = prec[state]
+                if e == -1:
+                    node_flow[state // 2] ^= 1
+                else:
+                    flow[e] ^= 1
+                state = previous
+        
+        # two paths using a physical link in opposite directions cancel out
+        for e in range(len(targets)):
+            if flow[e] and flow[arc_twin[e]]:
+                flow[e] = flow[arc_twin[e]] = 0
+        # decomposition of the flow into paths: loops (zero-cost cycles 
+        # when nodes are not limited) are removed
+        paths = []
+        while True:
+            path_node, path_arc = [s], []
+            while path_node[-1] != t:
+                node = path_node[-1]
+                e = next((e for e in range(offsets[node], offsets[node + 1])
+                                                        if flow[e]), None)
+                if e is None:
+                    break
+                flow[e] = 0
+                if targets[e] in path_node:
+                    index = path_node.index(targets[e])
+                    del path_node[index + 1:], path_arc[index:]
+                else:
+                    path_node.append(targets[e])
+                    path_arc.append(e)
+            if path_node[-1] != t:
+                break
+            paths.append((sum(arc_cost[e] for e in path_arc), path_node, path_arc))
+        return [(cn.to_nodes(path_node), cn.to_links(path_arc)) 
+                                    for _, path_node, path_arc in sorted(paths)]
+                                    
+    # SRLG-disjoint paths: the problem is NP-hard, it is solved with a 
+    # bounded search. The first path is chosen among the 'attempts' shortest
+    # paths (Yen algorithm); the physical links that share a group with 
+    # it are excluded, and the remaining paths are searched the same way.
+    # At most attempts*k paths are tried in total, and the result of each 
+    # (excluded physical links, k) is reused.
+    # A physical link always shares a group with itself.
+    def srlg_disjoint_paths(
+                            self, 
+                            source, 
+                            target, 
+                            k, 
+                            srlgs, 
+                            excluded_plinks, 
+                            allowed_plinks = None, 
+                            allowed_nodes = None,
+                            attempts = 5
+                            ):
+        if allowed_plinks is None:
+            allowed_plinks = self.plinks.values()
+        groups = lambda plink: {plink} | set(srlgs.get(plink, ()))
+        results, budget = {}, [attempts*k]
+        
+        def search(excluded_plinks, k):
+            key = (frozenset(excluded_plinks), k)
+            if k <= 0 or key in results:
+                return results.get(key, [])
+            best = []
+            for nodes, plinks in islice(self.k_shortest_paths(
+                                        source, 
+                                        target, 
+                                        excluded_plinks = excluded_plinks, 
+                                        allowed_plinks = allowed_plinks,
+                                        allowed_nodes = allowed_nodes
+                                        ), min(attempts, budget[0])):
+                budget[0] -= 1
+                shared = set().union(*map(groups, plinks))
+                conflicting = {plink for plink in allowed_plinks 
+                                                    if groups(plink) & shared}
+                paths = [(nodes, plinks)] + search(excluded_plinks 
+                                                        | conflicting, k - 1)
+                if len(paths) > len(best):
+                    best = paths
+                if len(best) == k or not budget[0]:
+                    break
+            results[key] = best
+            return best
+            
+        return search(set(excluded_plinks), k)
 
         
     ## Flow algorithms
     
     def reset_flow(self):
         for plink in self.plinks.values():
-            plink.flowSD = plink.flowDS = 0
+            self.set_value(plink, 'flowSD', 0)
+            self.set_value(plink, 'flowDS', 0)
     
     ## 1) Ford-Fulkerson algorithm
         
@@ -978,8 +1822,8 @@ class Network(Graph):
         for neighbor, adj_plink in self.graph[curr_node.id]['plink']:
             direction = curr_node == adj_plink.source
             sd, ds = direction*'SD' or 'DS', direction*'DS' or 'SD'
-            cap = getattr(adj_plink, 'capacity' + sd)
-            current_flow = getattr(adj_plink, 'flow' + sd)
+            cap = self.value(adj_plink, 'capacity' + sd)
+            current_flow = self.value(adj_plink, 'flow' + sd)
             if cap > current_flow and not visit[neighbor]:
                 residual_capacity = min(val, cap - current_flow)
                 global_flow = self.augment_ff(
@@ -989,8 +1833,10 @@ class Network(Graph):
                                               visit
                                               )
                 if global_flow > 0:
-                    adj_plink.__dict__['flow' + sd] += global_flow
-                    adj_plink.__dict__['flow' + ds] -= global_flow
+                    self.set_value(adj_plink, 'flow' + sd, 
+                            self.value(adj_plink, 'flow' + sd) + global_flow)
+                    self.set_value(adj_plink, 'flow' + ds, 
+                            self.value(adj_plink, 'flow' + ds) - global_flow)
                     return global_flow
         return False
         
@@ -1000,126 +1846,319 @@ class Network(Graph):
             pass
         # flow leaving from the source 
         return sum(
-                  getattr(adj, 'flow' + (s==adj.source)*'SD' or 'DS') 
+                  self.value(adj, 'flow' + ((s==adj.source)*'SD' or 'DS')) 
                   for _, adj in self.graph[s.id]['plink']
                   )
         
     ## 2) Edmonds-Karp algorithm
         
-    def augment_ek(self, source, destination):
-        res_cap = {n:0 for n in self.pn['node'].values()}
-        augmenting_path = {n: None for n in self.pn['node'].values()}
-        Q = deque()
-        Q.append(source)
-        augmenting_path[source] = source
-        res_cap[source] = float('inf')
+    def augment_ek(self, cn, flow, s, t):
+        # BFS in the residual network of the compiled snapshot: we return 
+        # the arc used to reach each node, and the residual capacity of the 
+        # augmenting path (0 if the target cannot be reached)
+        prec_arc = [-1]*len(cn)
+        res_cap = [0]*len(cn)
+        res_cap[s] = float('inf')
+        Q = deque([s])
         while Q:
             curr_node = Q.popleft()
-            for neighbor, adj_plink in self.graph[curr_node.id]['plink']:
-                direction = curr_node == adj_plink.source
-                sd, ds = direction*'SD' or 'DS', direction*'DS' or 'SD'
-                cap = getattr(adj_plink, 'capacity' + sd)
-                flow = getattr(adj_plink, 'flow' + sd)
-                residual = cap - flow
-                if residual and augmenting_path[neighbor] is None:
-                    augmenting_path[neighbor] = curr_node
+            for e in range(cn.offsets[curr_node], cn.offsets[curr_node + 1]):
+                neighbor = cn.targets[e]
+                residual = cn.arc_capacity[e] - flow[e]
+                if residual > 0 and not res_cap[neighbor]:
+                    prec_arc[neighbor] = e
                     res_cap[neighbor] = min(res_cap[curr_node], residual)
-                    if neighbor == destination:
-                        break
-                    else:
-                        Q.append(neighbor)
-        return augmenting_path, res_cap[destination]
+                    if neighbor == t:
+                        return prec_arc, res_cap[t]
+                    Q.append(neighbor)
+        return prec_arc, 0
         
     def edmonds_karp(self, source, destination):
-        self.reset_flow()
+        cn = self.compile()
+        s, t = cn.index[source], cn.index[destination]
+        # flow[e] is the flow on the arc e, i.e on the physical link of the 
+        # arc, in the direction of the arc
+        flow = [0]*len(cn.targets)
         while True:
-            augmenting_path, global_flow = self.augment_ek(source, destination)
+            prec_arc, global_flow = self.augment_ek(cn, flow, s, t)
             if not global_flow:
                 break
-            curr_node = destination
-            while curr_node != source:
-                # find the physical link between the two nodes
-                prec_node = augmenting_path[curr_node]
-                find_plink = lambda p: getitem(p, 0) == prec_node
-                (_, plink) ,= filter(find_plink, self.graph[curr_node.id]['plink'])
-                # define sd and ds depending on how the physical link is defined
-                direction = curr_node == plink.source
-                sd, ds = direction*'SD' or 'DS', direction*'DS' or 'SD'
-                plink.__dict__['flow' + ds] += global_flow
-                plink.__dict__['flow' + sd] -= global_flow
-                curr_node = prec_node 
-        return sum(
-                   getattr(adj, 'flow' + ((source==adj.source)*'SD' or 'DS')) 
-                   for _, adj in self.graph[source.id]['plink']
-                  )
+            _, path_arc = cn.traceback(prec_arc, t)
+            for e in path_arc:
+                flow[e] += global_flow
+                flow[cn.arc_twin[e]] -= global_flow
+        cn.write_back('flow', flow, self.set_value)
+        # flow leaving from the source 
+        return sum(flow[e] for e in range(cn.offsets[s], cn.offsets[s + 1]))
                   
-    ## 2) Dinic algorithm
+    ## 3) Dinic algorithm
     
-    def augment_di(self, level, flow, curr_node, dest, limit):
-        if limit <= 0:
-            return 0
-        if curr_node == dest:
-            return limit
-        val = 0
-        for neighbor, adj_plink in self.graph[curr_node.id]['plink']:
-            direction = curr_node == adj_plink.source
-            sd, ds = direction*'SD' or 'DS', direction*'DS' or 'SD'
-            cap = getattr(adj_plink, 'capacity' + sd)
-            flow = getattr(adj_plink, 'flow' + sd)
-            residual = cap - flow
-            if level[neighbor] == level[curr_node] + 1 and residual > 0:
-                z = min(limit, residual)
-                aug = self.augment_di(level, flow, neighbor, dest, z)
-                adj_plink.__dict__['flow' + sd] += aug
-                adj_plink.__dict__['flow' + ds] -= aug
-                val += aug
-                limit -= aug
-        if not val:
-            level[curr_node] = None
-        return val
-        
+    # Dinic algorithm on the residual network of the compiled snapshot (see
+    # max_flow.py). Returns the flow of each physical link (in the SD 
+    # direction) and the value of the flow.
     def dinic(self, source, destination):
-        self.reset_flow()
-        Q = deque()
-        total = 0
+        cn = self.compile()
+        flow, total = dinic(cn.offsets, cn.targets, cn.arc_twin, 
+                cn.arc_capacity, cn.index[source], cn.index[destination])
+        cn.write_back('flow', flow, self.set_value)
+        link_flow = array('d', (flow[e] for e in cn.link_arc))
+        return link_flow, total
+        
+    ## 4) Push-relabel algorithm
+    
+    # highest-label push-relabel on the residual network of the compiled 
+    # snapshot: the residual capacity of an arc e is arc_capacity[e] - 
+    # flow[e], where flow[e] = -flow[twin] (the flow of the physical link in
+    # the direction of the arc). 
+    # Active nodes (with an excess of flow) are stored in buckets by height,
+    # and the highest one is discharged first. Heuristics:
+    # - global relabeling: the heights are set to the exact distance to the
+    # target (or n + the distance to the source) in the residual network,
+    # at the start and after every 'relabel_frequency'*n relabels
+    # - gap: when no node is left at some height below n, the nodes above
+    # it can no longer reach the target: they are lifted above n at once.
+    # The nodes are also stored in sets by height, so that a gap only visits
+    # the nodes it lifts: the heights below n are contiguous (a node is 
+    # relabeled at most one above a neighbor), and the lift stops at the
+    # first empty height.
+    # The flows are written back to the physical links in a single pass.
+    def push_relabel(self, source, destination, relabel_frequency=1):
+        cn = self.compile()
+        s, t = cn.index[source], cn.index[destination]
+        offsets, targets = cn.offsets, cn.targets
+        arc_twin, capacity = cn.arc_twin, cn.arc_capacity
+        n = len(cn)
+        flow = [0]*len(targets)
+        excess, height = [0]*n, [0]*n
+        current = list(offsets[:-1])
+        buckets = [[] for _ in range(2*n)]
+        # all nodes at each height, for the gap heuristic
+        levels = [set() for _ in range(2*n)]
+        
+        def global_relabel():
+            for node in range(n):
+                height[node] = 2*n - 1
+            for root, start in ((t, 0), (s, n)):
+                height[root] = start
+                queue = deque([root])
+                while queue:
+                    node = queue.popleft()
+                    for e in range(offsets[node], offsets[node + 1]):
+                        neighbor, twin = targets[e], arc_twin[e]
+                        if height[neighbor] != 2*n - 1 or neighbor == s:
+                            continue
+                        # the neighbor can push to the node
+                        if capacity[twin] - flow[twin] > 0:
+                            height[neighbor] = height[node] + 1
+                            queue.append(neighbor)
+            for bucket in buckets:
+                bucket.clear()
+            for level in levels:
+                level.clear()
+            for node in range(n):
+                levels[height[node]].add(node)
+                current[node] = offsets[node]
+                if excess[node] > flow_tolerance and node not in (s, t):
+                    buckets[height[node]].append(node)
+        
+        # all arcs leaving the source are saturated
+        for e in range(offsets[s], offsets[s + 1]):
+            neighbor = targets[e]
+            if capacity[e] > 0 and neighbor != s:
+                flow[e] += capacity[e]
+                flow[arc_twin[e]] -= capacity[e]
+                excess[neighbor] += capacity[e]
+                excess[s] -= capacity[e]
+        global_relabel()
+        
+        relabels, highest = 0, 2*n - 1
+        while highest >= 0:
+            if not buckets[highest]:
+                highest -= 1
+                continue
+            node = buckets[highest].pop()
+            # discharge: push the excess to the neighbors one level below, 
+            # and relabel the node when all its arcs have been scanned
+            node_height = height[node]
+            end = offsets[node + 1]
+            while excess[node] > flow_tolerance:
+                e = current[node]
+                if e == end:
+                    relabels += 1
+                    new_height = 2*n - 1
+                    for e in range(offsets[node], end):
+                        if capacity[e] - flow[e] > 0:
+                            new_height = min(new_height, height[targets[e]] + 1)
+                    levels[node_height].discard(node)
+                    # gap: the nodes above the empty height are lifted, 
+                    # along with their place in the active buckets
+                    if not levels[node_height] and node_height < n:
+                        for gap_height in range(node_height + 1, n):
+                            if not levels[gap_height]:
+                                break
+                            for other in levels[gap_height]:
+                                height[other] = n + 1
+                            levels[n + 1] |= levels[gap_height]
+                            levels[gap_height].clear()
+                            buckets[n + 1].extend(buckets[gap_height])
+                            buckets[gap_height].clear()
+                        new_height = max(new_height, n + 1)
+                    node_height = height[node] = new_height
+                    levels[new_height].add(node)
+                    current[node] = offsets[node]
+                    if relabels > relabel_frequency*n:
+                        break
+                    continue
+                neighbor = targets[e]
+                residual = capacity[e] - flow[e]
+                if residual > 0 and node_height == height[neighbor] + 1:
+                    delta = min(excess[node], residual)
+                    flow[e] += delta
+                    flow[arc_twin[e]] -= delta
+                    excess[node] -= delta
+                    active = excess[neighbor] > flow_tolerance
+                    excess[neighbor] += delta
+                    if not active and excess[neighbor] > flow_tolerance \
+                                            and neighbor not in (s, t):
+                        buckets[height[neighbor]].append(neighbor)
+                else:
+                    current[node] += 1
+            # the node was relabeled: the nodes it activated can be higher
+            # than the highest active node so far
+            highest = max(highest, node_height)
+            if relabels > relabel_frequency*n:
+                relabels, highest = 0, 2*n - 1
+                global_relabel()
+                
+        cn.write_back('flow', flow, self.set_value)
+        return excess[t]
+        
+    ## 5) Gomory-Hu tree
+    
+    # minimum cuts between all pairs of nodes (see gomory_hu.py): the n - 1
+    # maximum flows of Gusfield algorithm are spread over 'workers' 
+    # processes (one per core by default, none if workers is 1)
+    def gomory_hu_tree(self, workers=None):
+        return GomoryHuTree(self.compile(), workers)
+        
+    ## 6) Minimum-cost flow: successive shortest paths
+    
+    # 'supplies' maps nodes to the amount of flow they send (positive) or 
+    # receive (negative). Costs must be non-negative. The flow of each arc 
+    # of the compiled snapshot is in [0, arc_capacity], and the flow is 
+    # sent one path after another: a path goes from a node with an excess 
+    # of supply to the closest node with a deficit, in the residual network
+    # where a previous path can be canceled by following its arcs backward.
+    # With the potentials of the nodes, the reduced costs of the residual 
+    # arcs are non-negative: each path is found with Dijkstra algorithm, 
+    # which stops as soon as a node with a deficit is reached.
+    # The flows are written to property + 'SD' / 'DS' ('flow' by default, 
+    # with set_value: a fork can be used for what-if scenarios), and the 
+    # cost of the flow is returned (inf if the demands cannot be met, if 
+    # the supplies do not sum to zero, or if a cost is negative: nothing is
+    # written then).
+    def minimum_cost_flow(self, supplies, property='flow'):
+        if abs(sum(supplies.values())) > flow_tolerance:
+            return float('inf')
+        cn = self.compile()
+        offsets, targets = cn.offsets, cn.targets
+        arc_twin, arc_cost, capacity = cn.arc_twin, cn.arc_cost, cn.arc_capacity
+        n, inf = len(cn), float('inf')
+        if any(cost < 0 for cost in arc_cost):
+            return inf
+        excess = [0]*n
+        for node, supply in supplies.items():
+            excess[cn.index[node]] += supply
+        # the excesses that are only rounding are set to zero once, and all
+        # comparisons use the tolerance
+        for node in range(n):
+            if abs(excess[node]) <= flow_tolerance:
+                excess[node] = 0
+        flow = [0]*len(targets)
+        potential = [0]*n
+        
         while True:
-            Q.appendleft(source)
-            level = {node: None for node in self.nodes.values()}
-            level[source] = 0
-            while Q:
-                curr_node = Q.pop()
-                for neighbor, adj_plink in self.graph[curr_node.id]['plink']:
-                    direction = curr_node == adj_plink.source
-                    sd = direction*'SD' or 'DS'
-                    cap = getattr(adj_plink, 'capacity' + sd)
-                    flow = getattr(adj_plink, 'flow' + sd)
-                    if level[neighbor] is None and cap > flow:
-                        level[neighbor] = level[curr_node] + 1
-                        Q.appendleft(neighbor)
-                        
-            if level[destination] is None:
-                return flow, total
-            limit = sum(
-                        getattr(adj_plink, 'capacity' + 
-                        ((source == adj_plink.source)*'SD' or 'DS'))
-                        for _, adj_plink in self.graph[source.id]['plink']
-                        )
-            total += self.augment_di(level, flow, source, destination, limit)
+            s = next((node for node in range(n) 
+                                if excess[node] > flow_tolerance), None)
+            if s is None:
+                break
+            dist, prec_arc = {s: 0}, {s: -1}
+            # for a residual arc u -> v that cancels the flow of the arc 
+            # v -> u, the predecessor is stored as ~arc (negative)
+            visited, heap, t = set(), [(0, s)], None
+            while heap:
+                dist_node, node = heappop(heap)
+                if node in visited:
+                    continue
+                visited.add(node)
+                if excess[node] < -flow_tolerance:
+                    t = node
+                    break
+                for e in range(offsets[node], offsets[node + 1]):
+                    neighbor, twin = targets[e], arc_twin[e]
+                    if neighbor in visited:
+                        continue
+                    moves = []
+                    if flow[e] < capacity[e] and arc_cost[e] != inf:
+                        moves.append((arc_cost[e], e))
+                    if flow[twin] > 0:
+                        moves.append((-arc_cost[twin], ~twin))
+                    for cost, arc in moves:
+                        reduced = cost + potential[node] - potential[neighbor]
+                        dist_neighbor = dist_node + reduced
+                        if dist_neighbor < dist.get(neighbor, inf):
+                            dist[neighbor], prec_arc[neighbor] = dist_neighbor, arc
+                            heappush(heap, (dist_neighbor, neighbor))
+            # the demands cannot be met
+            if t is None:
+                return inf
+            for node in range(n):
+                potential[node] += min(dist.get(node, inf), dist[t]) \
+                                        if node in visited else dist[t]
+            
+            path, node = [], t
+            while node != s:
+                arc = prec_arc[node]
+                path.append(arc)
+                e = arc if arc >= 0 else ~arc
+                node = targets[arc_twin[e]] if arc >= 0 else targets[e]
+            delta = min(excess[s], -excess[t], *(capacity[arc] - flow[arc] 
+                            if arc >= 0 else flow[~arc] for arc in path))
+            for arc in path:
+                if arc >= 0:
+                    flow[arc] += delta
+                else:
+                    flow[~arc] -= delta
+            excess[s] -= delta
+            excess[t] += delta
+            for node in (s, t):
+                if abs(excess[node]) <= flow_tolerance:
+                    excess[node] = 0
+            
+        cn.write_back(property, flow, self.set_value)
+        return sum(f*cost for f, cost in zip(flow, arc_cost) if f)
+        
+    # minimum-cost flow of value 'flow' from s to t
+    def SSP_MCF(self, s, t, flow):
+        return self.minimum_cost_flow({s: flow, t: -flow})
         
     ## Minimum spanning tree algorithms 
     
     ## 1) Kruskal algorithm
         
     def kruskal(self, allowed_nodes):
-        uf = UnionFind(allowed_nodes)
-        edges = []
-        for node in allowed_nodes:
-            for neighbor, adj_plink in self.graph[node.id]['plink']:
-                if neighbor in allowed_nodes:
-                    edges.append((adj_plink.costSD, adj_plink, node, neighbor))
-        for w, t, u, v in sorted(edges, key=itemgetter(0)):
-            if uf.union(u, v):
-                yield t
+        cn = self.compile()
+        allowed_node = cn.node_mask(allowed_nodes)
+        uf = UnionFind(range(len(cn)))
+        # each physical link is considered once, with its SD cost
+        edges = [
+                 (cn.costSD[l], l) for l, (u, v) in 
+                 enumerate(zip(cn.link_source, cn.link_destination))
+                 if allowed_node[u] and allowed_node[v]
+                 ]
+        for w, l in sorted(edges, key=itemgetter(0)):
+            if uf.union(cn.link_source[l], cn.link_destination[l]):
+                yield cn.links[l]
                 
     ## Linear programming algorithms
     
@@ -1441,7 +2480,7 @@ class Network(Graph):
         for idx, plink in enumerate(AS_links):
             for direction in ('SD', 'DS'):
                 tf, cap = 'traffic' + direction, 'capacity' + direction 
-                curr_ncr = getattr(plink, tf) / getattr(plink, cap)
+                curr_ncr = self.value(plink, tf) / self.value(plink, cap)
                 if curr_ncr > ncr:
                     ncr = curr_ncr
                     ct_id = idx
@@ -1474,12 +2513,10 @@ class Network(Graph):
         # so far, i.e the network congestion ratio of the best solution. 
         best_ncr = float('inf')
         
-        # we store the cost value in the flow parameters, since we'll change
-        # the links' costs to evaluate each solution
-        # at the end, we will revert the cost to their original value
-        for plink in AS.pAS['link']:
-            plink.flowSD = plink.costSD
-            plink.flowDS = plink.costDS
+        # the solutions are evaluated in a fork of the network: the costs,
+        # traffics and paths of the network are only modified once the best
+        # solution has been found
+        fork = self.fork()
             
         generation_size = 10
         best_candidates = []
@@ -1490,14 +2527,15 @@ class Network(Graph):
                 
             # we assign the costs to the physical links
             for id, cost in enumerate(curr_solution):
-                setattr(AS_links[id//2], 'cost' + ('DS'*(id%2) or 'SD'), cost)
+                fork.set_value(AS_links[id//2], 
+                                    'cost' + ('DS'*(id%2) or 'SD'), cost)
                 
             # create the routing tables with the newly allocated costs,
             # route all traffic flows and find the network congestion ratio
-            self.routing_table_creation()
-            self.path_finder()
+            fork.routing_table_creation()
+            fork.path_finder()
             
-            curr_ncr, *_ = self.ncr_computation(AS_links)
+            curr_ncr, *_ = fork.ncr_computation(AS_links)
             best_candidates.append((curr_ncr, curr_solution)) 
                     
         best_candidates = nsmallest(5, best_candidates)
@@ -1513,9 +2551,10 @@ class Network(Graph):
             
             # we assign the costs to the physical links
             for id, cost in enumerate(curr_solution):
-                setattr(AS_links[id//2], 'cost' + ('DS'*(id%2) or 'SD'), cost)
+                fork.set_value(AS_links[id//2], 
+                                    'cost' + ('DS'*(id%2) or 'SD'), cost)
             
-            self.route()
+            fork.route()
             
             # if we have to look for the most congested physical link more than 
             # C_max times, and still can't have a network congestion 
@@ -1524,9 +2563,9 @@ class Network(Graph):
             local_best_ncr = float('inf')
             
             while True:
-                self.route()
+                fork.route()
                     
-                curr_ncr, ct_id, cd = self.ncr_computation(AS_links)
+                curr_ncr, ct_id, cd = fork.ncr_computation(AS_links)
 
                 # update the best solution found if the network congestion ratio
                 # is the lowest one found so far
@@ -1545,23 +2584,24 @@ class Network(Graph):
                     
                 # we store the bandwidth of the physical link with the highest
                 # congestion (in the congested direction)
-                initial_bw = getattr(AS_links[ct_id], 'traffic' + cd)
+                initial_bw = fork.value(AS_links[ct_id], 'traffic' + cd)
                     
                 # we'll increase the cost of the congested physical link, until
                 # at least one traffic is rerouted (in such a way that it will
                 # no longer use the congested physical link)
                 for k in range(5):
                     #print(k)
-                    AS_links[ct_id].__dict__['cost' + cd] += n // 5
+                    fork.set_value(AS_links[ct_id], 'cost' + cd, 
+                            fork.value(AS_links[ct_id], 'cost' + cd) + n // 5)
                     # we update the solution being evaluated and append
                     # it to the tabu list
                     curr_solution[ct_id*2 + (cd == 'DS')] += n // 5
                     
                     tabu_list.append(curr_solution)
                     
-                    self.route()
+                    fork.route()
                     
-                    new_bw = getattr(AS_links[ct_id], 'traffic' + cd)
+                    new_bw = fork.value(AS_links[ct_id], 'traffic' + cd)
                     
                     if new_bw != initial_bw:
                         break
@@ -1569,8 +2609,9 @@ class Network(Graph):
                     C = C_max - 1
                 
 
+        # the best solution is applied to the network
         for id, cost in enumerate(best_solution):
-            setattr(AS_links[id//2], 'cost' + ('DS'*(id%2) or 'SD'), cost)
+            self.set_value(AS_links[id//2], 'cost' + ('DS'*(id%2) or 'SD'), cost)
         self.route()
         ncr, ct_id, cd = self.ncr_computation(AS_links)
         print(ncr)
@@ -1581,7 +2622,7 @@ class Network(Graph):
         
         # we compute the path of all traffic physical links
         self.path_finder()
-        graph_project = self.view.controller.add_project(name)
+        graph_network = self.observer.new_network(self, name)
 
         # in the new graph, each node corresponds to a traffic path
         # we create one node per traffic physical link in the new view            
@@ -1590,15 +2631,16 @@ class Network(Graph):
         for tlA in self.traffics.values():
             for tlB in self.traffics.values():
                 if tlB not in visited and tlA != tlB:
-                    if set(tlA.path) & set(tlB.path):
+                    if (set(self.value(tlA, 'path')) 
+                                        & set(self.value(tlB, 'path'))):
                         nA, nB = tlA.name, tlB.name
                         name = '{} - {}'.format(nA, nB)
-                        graph_project.network.lf(
-                                source = graph_project.network.nf(
+                        graph_network.lf(
+                                source = graph_network.nf(
                                                     name = nA,
                                                     subtype = 'optical switch'
                                                     ),
-                                destination = graph_project.network.nf(
+                                destination = graph_network.nf(
                                                     name = nB,
                                                     subtype = 'optical switch'
                                                     ),
@@ -1606,8 +2648,8 @@ class Network(Graph):
                                 )
             visited.add(tlA)
                             
-        graph_project.current_view.refresh_display()
-        return graph_project
+        graph_network.observer.refresh_display()
+        return graph_network
         
     def largest_degree_first(self):
         # we color the transformed graph by allocating colors to largest
@@ -1897,6 +2939,112 @@ class Network(Graph):
                 if src_node != dest_node:
                     yield self.lf(source=src_node, destination=dest_node)
                 
+    ## Bulk construction
+    
+    # column-oriented counterparts of 'nf' and 'lf', used to import large
+    # networks: 'columns' maps a property name to the list of its values 
+    # (one value per object). The objects are created with a single 
+    # bulk_initializer call, IDs are assigned in one pass and the pools are 
+    # updated with one dict.update per pool.
+    
+    def bulk_add_nodes(self, subtype, columns):
+        columns = {p: list(values) for p, values in columns.items()}
+        count = len(next(iter(columns.values()))) if columns else 0
+        if 'name' not in columns:
+            columns['name'] = [subtype + str(self.cpt_node + i) 
+                                                for i in range(count)]
+        # nodes that already exist (or appear twice in the batch) are 
+        # updated the same way 'nf' does it, the others are created in bulk
+        rows, new_rows, seen = [], [], set()
+        for i, name in enumerate(columns['name']):
+            if name in self.name_to_id or name in seen:
+                rows.append(i)
+            else:
+                seen.add(name)
+                new_rows.append(i)
+        ids = range(self.cpt_node, self.cpt_node + len(new_rows))
+        new_columns = {p: [values[i] for i in new_rows] 
+                                        for p, values in columns.items()}
+        new_columns['id'] = list(ids)
+        new_nodes = bulk_initializer(node_class[subtype], new_columns, len(ids))
+        self.nodes.update(zip(ids, new_nodes))
+        self.spn[subtype].update(zip(ids, new_nodes))
+        self.name_to_id.update(zip(new_columns['name'], ids))
+        self.cpt_node += len(ids)
+        if new_nodes:
+            self.journal.record('add', new_nodes)
+        nodes = dict(zip(new_rows, new_nodes))
+        for i in rows:
+            nodes[i] = self.nf(subtype, **{p: v[i] for p, v in columns.items()})
+        return [nodes[i] for i in range(count)]
+        
+    # sources and destinations can be given as nodes or node names
+    def bulk_add_links(self, subtype, sources, destinations, columns=None):
+        columns = {p: list(values) for p, values in (columns or {}).items()}
+        link_type = subtype_to_type[subtype]
+        columns['source'] = [node if isinstance(node, Node) 
+                            else self.convert_node(node) for node in sources]
+        columns['destination'] = [node if isinstance(node, Node) 
+                        else self.convert_node(node) for node in destinations]
+        count = len(columns['source'])
+        if 'name' not in columns:
+            columns['name'] = [subtype + str(self.cpt_link + i) 
+                                                for i in range(count)]
+        # links that already exist (or appear twice in the batch) are 
+        # updated the same way 'lf' does it, the others are created in bulk
+        rows, new_rows, seen = [], [], set()
+        for i, name in enumerate(columns['name']):
+            if name in self.name_to_id or name in seen:
+                rows.append(i)
+            else:
+                seen.add(name)
+                new_rows.append(i)
+        ids = range(self.cpt_link, self.cpt_link + len(new_rows))
+        new_columns = {p: [values[i] for i in new_rows] 
+                                        for p, values in columns.items()}
+        new_columns['id'] = list(ids)
+        new_links = bulk_initializer(link_class_with_vc[subtype], 
+                                                    new_columns, len(ids))
+        self.pn[link_type].update(zip(ids, new_links))
+        self.spn[subtype].update(zip(ids, new_links))
+        self.name_to_id.update(zip(new_columns['name'], ids))
+        for link in new_links:
+            self.index_link(link)
+        if link_type == 'plink':
+            self.interfaces.update(interface for link in new_links 
+                    for interface in (link.interfaceS, link.interfaceD))
+        self.cpt_link += len(ids)
+        if new_links:
+            self.journal.record('add', new_links)
+        # the end nodes of an existing link are not changed: the adjacency
+        # indexes would no longer match
+        links = dict(zip(new_rows, new_links))
+        for i in rows:
+            links[i] = self.lf(subtype, **{p: v[i] for p, v in columns.items()
+                                        if p not in ('source', 'destination')})
+        return [links[i] for i in range(count)]
+                
+    ## Bulk deletion
+    
+    # removal of a set of objects (see Graph.remove_many), including their
+    # AS and site memberships
+    def remove_many(self, objects):
+        removed = super().remove_many(objects)
+        AS_objects, site_objects = defaultdict(list), defaultdict(list)
+        # the backing slots are read instead of the 'AS' and 'sites' side 
+        # tables, which would be created empty for every removed object
+        for obj in removed:
+            for AS in getattr(obj, '_AS', ()):
+                AS_objects[AS].append(obj)
+            for site in getattr(obj, '_sites', ()):
+                site_objects[site].append(obj)
+        for AS, objects in AS_objects.items():
+            AS.remove_from_AS(*objects)
+            AS.management.refresh_display()
+        for site, objects in site_objects.items():
+            site.remove_from_site(*objects)
+        return removed
+                
     ## Configuration
     
     def build_router_configuration(self, node):
@@ -0,0 +1,53 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# The network engine (networks/, autonomous_system/) does not depend on the
+# GUI: everything it needs from the GUI goes through an observer.
+# The default observer is headless: a network created without observer can
+# run in a batch job or a worker process, with no QApplication.
+# The GUI observer is views.view_observer.ViewObserver.
+
+class NetworkObserver(object):
+
+    # default credentials used to connect to the devices
+    def get_credentials(self):
+        return {
+                'username': '',
+                'password': '',
+                'enable_password': '',
+                'path': ''
+                }
+
+    # called when all failures are removed from the network
+    def remove_failures(self):
+        pass
+
+    # called when the network display must be updated
+    def refresh_display(self):
+        pass
+
+    # returns a new, empty network named 'name' (RWA graph transformation)
+    def new_network(self, network, name):
+        return network.__class__()
+
+    # returns the management window of an AS
+    def AS_management(self, AS, is_imported):
+        return NullManagement()
+
+# headless placeholder for the AS management window: all calls are ignored
+class NullManagement(object):
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
@@ -0,0 +1,229 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+
+# Shortest path tree of a compiled network (see compiled_network.py),
+# computed with Dijkstra algorithm from a source node.
+# 'metric' is the per-arc array used as cost: 'cost' (arc_cost) or 'rcost'
+# (arc_rcost: the tree then contains the shortest paths from all nodes to
+# the source). Only the allowed nodes and physical links (masks) are used.
+# Trees are shared through the cache below: they must not be modified.
+
+# Dijkstra algorithm on the arrays of a compiled network, from the node
+# index s: returns the distance to each node and the arc used to reach it.
+# It only needs the arrays, so that it can also run in a worker process.
+def dijkstra(offsets, targets, arc_link, arc_cost, allowed_node, allowed_plink, s):
+    n = len(offsets) - 1
+    # prec_arc is the index of the arc used to reach a node (-1 if none)
+    prec_arc = array('l', [-1])*n
+    visited = bytearray(n)
+    dist = array('d', [float('inf')])*n
+    dist[s] = 0
+    heap = [(0, s)]
+    while heap:
+        dist_node, node = heappop(heap)
+        if not visited[node]:
+            visited[node] = 1
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                # we ignore what's not allowed (not in the AS or in failure)
+                if not allowed_node[neighbor]:
+                    continue
+                if not allowed_plink[arc_link[e]]:
+                    continue
+                dist_neighbor = dist_node + arc_cost[e]
+                if dist_neighbor < dist[neighbor]:
+                    dist[neighbor] = dist_neighbor
+                    prec_arc[neighbor] = e
+                    heappush(heap, (dist_neighbor, neighbor))
+    return dist, prec_arc
+
+class ShortestPathTree(object):
+
+    def __init__(self, cn, source, metric, allowed_node, allowed_plink):
+        self.cn = cn
+        self.source = s = cn.index[source]
+        arc_cost = getattr(cn, 'arc_' + metric)
+        self.dist, self.prec_arc = dijkstra(cn.offsets, cn.targets, 
+                cn.arc_link, arc_cost, allowed_node, allowed_plink, s)
+        self.metric = metric
+        self.allowed_node, self.allowed_plink = allowed_node, allowed_plink
+        # mask of the physical links allowed by the caller: allowed_plink
+        # without the failures excluded when the tree is repaired
+        self.base_plink = allowed_plink
+        self.child_nodes = None
+
+    def __len__(self):
+        return len(self.dist)
+
+    def distance(self, target):
+        return self.dist[self.cn.index[target]]
+
+    # distance from the source to all allowed nodes
+    def distances(self):
+        return {node: self.dist[i] for i, node in enumerate(self.cn.nodes)
+                                                    if self.allowed_node[i]}
+
+    # shortest path from the source to the target, as lists of nodes and
+    # physical links (empty lists if the target cannot be reached)
+    def path(self, target):
+        t = self.cn.index[target]
+        if self.dist[t] == float('inf'):
+            return [], []
+        path_node, path_arc = self.cn.traceback(self.prec_arc, t)
+        return self.cn.to_nodes(path_node), self.cn.to_links(path_arc)
+
+    # all physical links of the tree
+    def links(self):
+        return self.cn.to_links(e for e in self.prec_arc if e != -1)
+
+    # children of each node in the tree, computed when first needed
+    def children(self):
+        if self.child_nodes is None:
+            targets, arc_twin = self.cn.targets, self.cn.arc_twin
+            self.child_nodes = [[] for _ in range(len(self))]
+            for node, e in enumerate(self.prec_arc):
+                if e != -1:
+                    self.child_nodes[targets[arc_twin[e]]].append(node)
+        return self.child_nodes
+
+    # returns the tree of the same source on the snapshot 'cn', where the 
+    # physical links 'changed' (indices) may have another cost, or another
+    # value in the mask (allowed_plink). 'cn' must have the same nodes and
+    # physical links as the snapshot of the tree.
+    # The nodes whose path uses an arc that became more expensive (or is no
+    # longer allowed) lose their distance: they are the subtrees below these
+    # arcs. They are reached again from the nodes that kept their distance,
+    # then the changes are propagated with Dijkstra algorithm, from these
+    # nodes and from the arcs that became cheaper: only the nodes whose
+    # distance changes are searched again.
+    def repair(self, cn, allowed_plink, changed):
+        offsets, targets = cn.offsets, cn.targets
+        arc_link, arc_twin = cn.arc_link, cn.arc_twin
+        old_cost = getattr(self.cn, 'arc_' + self.metric)
+        arc_cost = getattr(cn, 'arc_' + self.metric)
+        allowed_node, inf = self.allowed_node, float('inf')
+        dist, prec_arc = array('d', self.dist), array('l', self.prec_arc)
+
+        worse, better = [], []
+        for l in changed:
+            for e in (cn.link_arc[l], arc_twin[cn.link_arc[l]]):
+                if not allowed_plink[l]:
+                    if self.allowed_plink[l]:
+                        worse.append(e)
+                elif not self.allowed_plink[l] or arc_cost[e] < old_cost[e]:
+                    better.append(e)
+                elif arc_cost[e] > old_cost[e]:
+                    worse.append(e)
+
+        lost, children = set(), None
+        for e in worse:
+            if prec_arc[targets[e]] != e:
+                continue
+            children = children or self.children()
+            stack = [targets[e]]
+            while stack:
+                node = stack.pop()
+                if node not in lost:
+                    lost.add(node)
+                    stack.extend(children[node])
+        for node in lost:
+            dist[node], prec_arc[node] = inf, -1
+
+        heap = []
+        for node in lost:
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor, twin = targets[e], arc_twin[e]
+                if neighbor in lost or not allowed_plink[arc_link[e]]:
+                    continue
+                dist_node = dist[neighbor] + arc_cost[twin]
+                if dist_node < dist[node]:
+                    dist[node], prec_arc[node] = dist_node, twin
+            if dist[node] < inf:
+                heappush(heap, (dist[node], node))
+        for e in better:
+            node, neighbor = targets[arc_twin[e]], targets[e]
+            if not allowed_node[neighbor]:
+                continue
+            dist_neighbor = dist[node] + arc_cost[e]
+            if dist_neighbor < dist[neighbor]:
+                dist[neighbor], prec_arc[neighbor] = dist_neighbor, e
+                heappush(heap, (dist_neighbor, neighbor))
+
+        while heap:
+            dist_node, node = heappop(heap)
+            if dist_node > dist[node]:
+                continue
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                if not allowed_node[neighbor]:
+                    continue
+                if not allowed_plink[arc_link[e]]:
+                    continue
+                dist_neighbor = dist_node + arc_cost[e]
+                if dist_neighbor < dist[neighbor]:
+                    dist[neighbor], prec_arc[neighbor] = dist_neighbor, e
+                    heappush(heap, (dist_neighbor, neighbor))
+
+        tree = ShortestPathTree.__new__(ShortestPathTree)
+        tree.cn, tree.source, tree.metric = cn, self.source, self.metric
+        tree.allowed_node, tree.allowed_plink = allowed_node, allowed_plink
+        tree.base_plink = self.base_plink
+        tree.dist, tree.prec_arc = dist, prec_arc
+        tree.child_nodes = None
+        return tree
+
+# Cache of shortest path trees, with LRU (least recently used) eviction.
+# A tree is identified by its source, its metric and the masks of allowed
+# objects: the masks are stored as bytes, which are cheap to hash and
+# compare. The cache only contains trees of the current snapshot: it is
+# emptied when the topology (or a cost) changes.
+# The memory is bounded by 'capacity', the total number of nodes of all
+# trees in the cache (each tree stores two values per node).
+
+class SPTCache(object):
+
+    def __init__(self, capacity=1 << 22):
+        self.capacity = capacity
+        self.trees = OrderedDict()
+        self.size = 0
+        self.cn = None
+        self.hits = self.misses = 0
+
+    def clear(self):
+        self.trees.clear()
+        self.size = 0
+
+    def get(self, cn, source, metric, allowed_node, allowed_plink):
+        if cn is not self.cn:
+            self.clear()
+            self.cn = cn
+        key = (source, metric, bytes(allowed_node), bytes(allowed_plink))
+        tree = self.trees.get(key)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(key)
+            return tree
+        self.misses += 1
+        tree = ShortestPathTree(cn, source, metric, allowed_node, allowed_plink)
+        self.trees[key] = tree
+        self.size += len(tree)
+        # the least recently used trees are evicted
+        while self.size > self.capacity and len(self.trees) > 1:
+            _, evicted = self.trees.popitem(last=False)
+            self.size -= len(evicted)
+        return tree
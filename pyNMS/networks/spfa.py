@@ -0,0 +1,79 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+from collections import deque
+
+# Queue-based Bellman-Ford (SPFA, label-correcting) on the arrays of a 
+# compiled network (see compiled_network.py), so that it can also run in a
+# worker process: only the nodes whose distance decreased are scanned again,
+# in FIFO order, and the search stops as soon as no distance changes anymore.
+# The source node s is always allowed.
+# A negative cycle is suspected when the path to a node has as many physical
+# links as there are allowed nodes: a cycle is then looked for in the 
+# predecessors of that node. If there is one, the search stops: the
+# distances are meaningless, and no node must be considered reachable.
+# Returns the distance to each node, the arc used to reach it and a node of
+# the negative cycle found (-1 if there is none).
+def spfa(offsets, targets, arc_link, arc_twin, arc_cost, allowed_node, 
+                                                        allowed_plink, s):
+    n = len(offsets) - 1
+    allowed_node = bytearray(allowed_node)
+    allowed_node[s] = 1
+    size = sum(allowed_node)
+    prec_arc = array('l', [-1])*n
+    dist = array('d', [float('inf')])*n
+    dist[s] = 0
+    # number of physical links of the current path to each node
+    length = [0]*n
+    queued = bytearray(n)
+    queued[s] = 1
+    queue = deque([s])
+    while queue:
+        node = queue.popleft()
+        queued[node] = 0
+        dist_node = dist[node]
+        for e in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[e]
+            # excluded and allowed nodes and physical links
+            if not allowed_node[neighbor]:
+                continue
+            if not allowed_plink[arc_link[e]]:
+                continue
+            dist_neighbor = dist_node + arc_cost[e]
+            if dist_neighbor < dist[neighbor]:
+                dist[neighbor] = dist_neighbor
+                prec_arc[neighbor] = e
+                length[neighbor] = length[node] + 1
+                if length[neighbor] >= size:
+                    cycle = find_cycle(targets, arc_twin, prec_arc, neighbor)
+                    if cycle != -1:
+                        return dist, prec_arc, cycle
+                if not queued[neighbor]:
+                    queued[neighbor] = 1
+                    queue.append(neighbor)
+    return dist, prec_arc, -1
+    
+# starting from a node, we go through the predecessors until we meet a node
+# twice: that node is on a cycle of predecessors, which has a negative cost.
+# Returns -1 if the predecessors lead back to the source instead.
+def find_cycle(targets, arc_twin, prec_arc, node):
+    seen = {node}
+    while prec_arc[node] != -1:
+        # the source of an arc is the target of its twin
+        node = targets[arc_twin[prec_arc[node]]]
+        if node in seen:
+            return node
+        seen.add(node)
+    return -1
@@ -16,29 +16,91 @@
 from collections import defaultdict, OrderedDict
 from .properties import *
 
+# side tables (graphical items, sites, AS, per-AS properties...) are empty 
+# for most objects: they are stored in a slot and only allocated the first
+# time they are accessed
+class SideTable(object):
+    
+    def __init__(self, slot, factory):
+        self.slot = slot
+        self.factory = factory
+        
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            table = self.factory()
+            setattr(obj, self.slot, table)
+            return table
+            
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+        
+# directional costs and capacities of physical links are stored in a slot,
+# and their modifications are recorded in the journal of the network the 
+# link belongs to (the 'journal' slot is set when the link is added to a
+# network, see Graph.index_link)
+class JournaledProperty(object):
+    
+    def __init__(self, name):
+        self.name, self.slot = name, '_' + name
+        
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        return getattr(obj, self.slot)
+        
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+        journal = getattr(obj, 'journal', None)
+        if journal:
+            journal.record('update', (obj,), self.name)
+        
+# the geographic coordinates of nodes are stored in a slot, and every 
+# modification increases Node.coordinates_version: values computed from the
+# coordinates (e.g the A* heuristic, see Network.geographic_bound) are 
+# cached until the coordinates of a node change
+class CoordinateProperty(object):
+    
+    def __init__(self, name):
+        self.name, self.slot = name, '_' + name
+        
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        return getattr(obj, self.slot)
+        
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+        Node.coordinates_version += 1
+        
+# if the imported property is not an existing NetDim property, we make sure 
+# to add it everywhere it is needed, so that it's properly added to the 
+# model and displayed. It is also automatically made exportable
+def add_property(subtype, property_name, value):
+    property = type(
+                    property_name, 
+                    (class_to_property[type(value)],), 
+                    {
+                    'name': property_name, 
+                    'pretty_name': property_name
+                    })
+    property_classes[property_name] = property
+    for property_manager in (
+                            object_properties,
+                            object_ie,
+                            box_properties,
+                            ):
+        property_manager[subtype] += (property,)
+
 # decorating __init__ to initialize properties
 def initializer(init):
     def wrapper(self, **properties):
         for property_name, value in properties.items():
-            # if the imported property is not an existing NetDim property,
-            # we make sure to add it everywhere it is needed, so that it's
-            # properly added to the model and displayed
-            # it is also automatically made exportable
             if property_name not in property_classes:
-                property = type(
-                                property_name, 
-                                (class_to_property[type(value)],), 
-                                {
-                                'name': property_name, 
-                                'pretty_name': property_name
-                                })
-                property_classes[property_name] = property
-                for property_manager in (
-                                        object_properties,
-                                        object_ie,
-                                        box_properties,
-                                        ):
-                    property_manager[self.__class__.subtype] += (property,)
+                add_property(self.__class__.subtype, property_name, value)
                 setattr(self, property_name, value)
             else:
                 property = property_classes[property_name]
@@ -48,7 +110,11 @@ def initializer(init):
                     property.values.append(value)
                 setattr(self, property_name, property(value))
                 
-        for property in object_properties[self.__class__.subtype]:
+        cls = self.__class__
+        for property in object_properties[cls.subtype]:
+            # side tables are allocated lazily, not with a default value
+            if isinstance(getattr(cls, property.name, None), SideTable):
+                continue
             if not hasattr(self, property.name):
                 # if the value should be an empty list / set, we make
                 # sure it refers to different objects in memory by using eval
@@ -60,7 +126,61 @@ def initializer(init):
                 except TypeError:
                     print(property.name)
         init(self)
+    # the undecorated __init__ is kept for the bulk creation of objects
+    wrapper.__wrapped__ = init
     return wrapper
+    
+# bulk counterpart of the initializer: creates 'count' objects of the class
+# 'cls' from column-oriented properties ('columns' maps a property name to 
+# the list of its values, one value per object). Property classes and 
+# default values are resolved once for the whole batch.
+def bulk_initializer(cls, columns, count):
+    subtype = cls.subtype
+    resolved = []
+    for property_name, values in columns.items():
+        if property_name not in property_classes:
+            if count:
+                add_property(subtype, property_name, values[0])
+            # like in the initializer, an imported property is stored as is
+            resolved.append((property_name, None, values))
+            continue
+        property = property_classes[property_name]
+        if property.multiple_values:
+            for value in values:
+                if value not in property.values:
+                    property.values.append(value)
+        resolved.append((property_name, property, values))
+        
+    # immutable default values are computed once and shared, but empty 
+    # lists / sets / dicts must refer to different objects in memory
+    shared, per_object = [], []
+    for property in object_properties[subtype]:
+        if property.name in columns:
+            continue
+        if isinstance(getattr(cls, property.name, None), SideTable):
+            continue
+        try:
+            value = property()
+        except TypeError:
+            continue
+        if isinstance(value, (list, set, dict)):
+            per_object.append(property)
+        else:
+            shared.append((property.name, value))
+    
+    init, objects = cls.__init__.__wrapped__, []
+    for i in range(count):
+        obj = cls.__new__(cls)
+        for property_name, value in shared:
+            setattr(obj, property_name, value)
+        for property in per_object:
+            setattr(obj, property.name, property())
+        for property_name, property, values in resolved:
+            value = values[i]
+            setattr(obj, property_name, property(value) if property else value)
+        init(obj)
+        objects.append(obj)
+    return objects
 
     
 ## NetDim objects
@@ -499,12 +619,48 @@ name_to_type = {v: k for k, v in type_to_name.items()}
 
 ## NetDim objects
 
+# names of the slots of a class: the declared properties of its subtypes and
+# the attributes set by pyNMS, except those that the base class already 
+# defines (slots, side tables) and those in 'exclude' (side tables and 
+# journaled properties of the class itself, class constants like 'subtype')
+def property_slots(base, properties, *attributes, exclude=()):
+    names = [property.name for property in properties] + list(attributes)
+    return tuple(OrderedDict.fromkeys(name for name in names 
+                    if name not in exclude and not hasattr(base, name)))
+
+# objects are slotted: the declared properties of a class (object_properties),
+# the attributes set by pyNMS and the side tables are stored in slots. 
+# The '__dict__' slot is only kept for the properties imported or defined by
+# the user: the dictionnary is not allocated for the objects that have none.
+# Objects use the default identity-based equality and hash: there is only 
+# one object per name in a network, and hashing the name string for every
+# set and dict operation is expensive.
 class NDobject(object):
     
-    def __init__(self):
-        self.gobject = {}
-        # sites is the set of sites the object belongs to
-        self.sites = set()
+    __slots__ = ('__dict__', '_gobject', '_sites') + property_slots(object,
+                                                obj_common_properties, 'id')
+    
+    # dictionnary that associates a graphical item to a view
+    gobject = SideTable('_gobject', dict)
+    # sites is the set of sites the object belongs to
+    sites = SideTable('_sites', set)
+        
+    # all attributes of the object, slotted or not, except the side tables
+    # (used to render a Jinja2 template with the properties of a node)
+    def attributes(self):
+        attributes = {}
+        for cls in reversed(type(self).__mro__):
+            for slot in cls.__dict__.get('__slots__', ()):
+                # journaled properties and coordinates are stored in a 
+                # private slot ('_costSD' for 'costSD')
+                name = slot.lstrip('_')
+                if slot == '__dict__' or isinstance(getattr(type(self), 
+                                                    name, None), SideTable):
+                    continue
+                if hasattr(self, name):
+                    attributes[name] = getattr(self, name)
+        attributes.update(getattr(self, '__dict__', {}))
+        return attributes
         
     def update_properties(self, kwargs):
         for k in kwargs:
@@ -529,38 +685,44 @@ class NDobject(object):
 class Node(NDobject):
     
     class_type = type = 'node'
-
-    def __init__(self):
-        # dictionnary that associates a graphical item to a view
-        self.gnode = {}
-
-        # list of AS to which the node belongs. AS is actually a dictionnary
-        # associating an AS to a set of area the node belongs to
-        self.AS = defaultdict(set)
-
-        # AS_properties contains all per-AS properties: It is a dictionnary 
-        # which AS name are the keys (it is easier to store AS names rather 
-        # than AS itself: if we have the AS, AS.name is the name, while if we 
-        # have the name, it is more verbose to retrieve the AS itself)
-        self.AS_properties = defaultdict(dict)
-        
-        # NAPALM data
-        self.napalm_data = {}
-        
-        super().__init__()
+    
+    __slots__ = (
+                 '_gnode', 
+                 '_AS', 
+                 '_AS_properties', 
+                 '_napalm_data', 
+                 '_longitude', 
+                 '_latitude'
+                 ) + property_slots(
+                                    NDobject, 
+                                    node_common_properties, 
+                                    exclude = ('AS', 'longitude', 'latitude')
+                                    )
+    
+    longitude = CoordinateProperty('longitude')
+    latitude = CoordinateProperty('latitude')
+    # increased every time the coordinates of a node are modified
+    coordinates_version = 0
+    
+    # dictionnary that associates a graphical item to a view
+    gnode = SideTable('_gnode', dict)
+
+    # list of AS to which the node belongs. AS is actually a dictionnary
+    # associating an AS to a set of area the node belongs to
+    AS = SideTable('_AS', lambda: defaultdict(set))
+
+    # AS_properties contains all per-AS properties: It is a dictionnary 
+    # which AS name are the keys (it is easier to store AS names rather 
+    # than AS itself: if we have the AS, AS.name is the name, while if we 
+    # have the name, it is more verbose to retrieve the AS itself)
+    AS_properties = SideTable('_AS_properties', lambda: defaultdict(dict))
+    
+    # NAPALM data
+    napalm_data = SideTable('_napalm_data', dict)
         
     def __repr__(self):
         return str(self.name)
         
-    def __eq__(self, other):
-        return isinstance(other, self.__class__) and self.name == other.name
-        
-    def __ne__(self, other):
-        return not self.__eq__(other)
-        
-    def __hash__(self):
-        return hash(self.name)
-        
     def __lt__(self, other):
         return hash(self.name)
         
@@ -577,6 +739,8 @@ class Site(Node):
     subtype = 'site'
     imagex, imagey = 50, 50
     layer = 1
+    
+    __slots__ = ('ps', 'site_type', 'view')
         
     @initializer
     def __init__(self, **kwargs):
@@ -605,17 +769,20 @@ class Router(Node):
     subtype = 'router'
     layer = 3
     imagex, imagey = 33, 25
+    
+    __slots__ = ('_rt', '_arpt', '_rarpt', '_bgpt')
+    
+    # routing table: binds an IP address to a cost / next-hop
+    rt = SideTable('_rt', dict)
+    # arp table: binds an IP to a tuple (MAC address, outgoing interface)
+    arpt = SideTable('_arpt', dict)
+    # reverse arp table: the other way around
+    rarpt = SideTable('_rarpt', dict)
+    # bgp table
+    bgpt = SideTable('_bgpt', lambda: defaultdict(set))
                     
     @initializer
     def __init__(self, **kwargs):
-        # routing table: binds an IP address to a cost / next-hop
-        self.rt = {}
-        # arp table: binds an IP to a tuple (MAC address, outgoing interface)
-        self.arpt = {}
-        # reverse arp table: the other way around
-        self.rarpt = {}
-        # bgp table
-        self.bgpt = defaultdict(set)
         super().__init__()
         
 class Switch(Node):
@@ -625,6 +792,8 @@ class Switch(Node):
     layer = 2
     imagex, imagey = 54, 36
     
+    __slots__ = ('st',)
+    
     @initializer
     def __init__(self, **kwargs):
         # switching table: binds a MAC address to an outgoing interface
@@ -649,6 +818,8 @@ class Host(Node):
     layer = 3
     imagex, imagey = 35, 32
     
+    __slots__ = ('rt',)
+    
     @initializer
     def __init__(self, **kwargs):
         self.rt = {}
@@ -764,21 +935,12 @@ class Link(NDobject):
     
     class_type = 'link'
     
-    def __init__(self):
-        self.glink = {}
-        super().__init__()
+    __slots__ = ('_glink', 'source', 'destination')
+    
+    glink = SideTable('_glink', dict)
         
     def __repr__(self):
         return str(self.name)
-        
-    def __eq__(self, other):
-        return isinstance(other, self.__class__) and self.name == other.name
-        
-    def __ne__(self, other):
-        return not self.__eq__(other)
-        
-    def __hash__(self):
-        return hash(self.name)
 
 class PhysicalLink(Link):
     
@@ -786,16 +948,47 @@ class PhysicalLink(Link):
     layer = 1
     dash = ()
     
+    __slots__ = (
+                 '_AS',
+                 'journal',
+                 '_costSD', 
+                 '_costDS', 
+                 '_capacitySD', 
+                 '_capacityDS',
+                 'flowSD', 
+                 'flowDS'
+                 ) + property_slots(
+                                    Link, 
+                                    plink_common_properties, 
+                                    'sntw', 
+                                    'wctrafficSD', 
+                                    'wctrafficDS', 
+                                    'wcfailure',
+                                    exclude = (
+                                               'costSD', 
+                                               'costDS', 
+                                               'capacitySD', 
+                                               'capacityDS', 
+                                               'AS'
+                                               )
+                                    )
+                 
+    costSD = JournaledProperty('costSD')
+    costDS = JournaledProperty('costDS')
+    capacitySD = JournaledProperty('capacitySD')
+    capacityDS = JournaledProperty('capacityDS')
+    
+    # list of AS to which the physical links belongs. AS is actually 
+    # a dictionnary associating an AS to a set of area the physical links 
+    # belongs to
+    AS = SideTable('_AS', lambda: defaultdict(set))
+    
     def __init__(self):
         self.sntw = None
         self.trafficSD = self.trafficDS = 0.
         self.wctrafficSD = self.wctrafficDS = 0.
         self.wcfailure = None
         self.flowSD = self.flowDS = 0.
-        # list of AS to which the physical links belongs. AS is actually 
-        # a dictionnary associating an AS to a set of area the physical links 
-        # belongs to
-        self.AS = defaultdict(set)
         super().__init__()
         
     @property
@@ -874,26 +1067,24 @@ class OpticalLink(PhysicalLink):
 class Interface(NDobject):
     
     type = 'interface'
+    
+    __slots__ = ('_AS_properties',) + property_slots(NDobject, 
+                                                interface_common_properties)
+    
+    # AS_properties contains all per-AS properties: interface cost, 
+    # interface role. It is a dictionnary which AS name are the keys 
+    # (it is easier to store AS names rather than AS itself: if we have the
+    # AS, AS.name is the name, while if we have the name, it is more 
+    # verbose to retrieve the AS itself)
+    AS_properties = SideTable('_AS_properties', lambda: defaultdict(dict))
         
     @initializer
     def __init__(self, **kwargs):
         self.name = ''
-        # AS_properties contains all per-AS properties: interface cost, 
-        # interface role. It is a dictionnary which AS name are the keys 
-        # (it is easier to store AS names rather than AS itself: if we have the
-        # AS, AS.name is the name, while if we have the name, it is more 
-        # verbose to retrieve the AS itself)
-        self.AS_properties = defaultdict(dict)
         super().__init__()
         
-    def __eq__(self, other):
-        return self.node == other.node and self.link == other.link
-        
     def __repr__(self):
         return self.name
-                                            
-    def __hash__(self):
-        return hash(self.node) + hash(self.link)
         
     def __call__(self, AS, property, value=False):
         # can be used both as a getter and a setter, depending on 
@@ -911,6 +1102,8 @@ class EthernetInterface(Interface):
     public_properties = ethernet_interface_public_properties
     perAS_properties = ethernet_interface_perAS_properties
     
+    __slots__ = property_slots(Interface, ethernet_interface_properties)
+    
     def __init__(self, node, link, **kwargs):
         kwargs['node'] = node
         kwargs['link'] = link
@@ -929,6 +1122,8 @@ class VirtualConnection(Link):
     
     color = 'bisque3'
     dash = (3,5)
+    
+    __slots__ = property_slots(Link, vc_common_properties)
 
     @initializer
     def __init__(self, **kwargs):
@@ -977,6 +1172,13 @@ class Route(Link):
         
     dash = ()
     
+    __slots__ = ('_AS',) + property_slots(Link, route_common_properties, 
+                                                        exclude=('subtype',))
+    
+    # list of AS to which the route belongs. AS is actually a dictionnary 
+    # associating an AS to a set of area the route belongs to
+    AS = SideTable('_AS', lambda: defaultdict(set))
+    
     @initializer
     def __init__(self, **kwargs):
         super().__init__()
@@ -1002,10 +1204,6 @@ class OpticalChannel(Route):
     
     @initializer
     def __init__(self, **kwargs):
-        # list of AS to which the physical links belongs. AS is actually 
-        # a dictionnary associating an AS to a set of area the physical links 
-        # belongs to
-        self.AS = defaultdict(set)
         super().__init__()
         
 class EtherChannel(Route):
@@ -1017,10 +1215,6 @@ class EtherChannel(Route):
     
     @initializer
     def __init__(self, **kwargs):
-        # list of AS to which the physical links belongs. AS is actually 
-        # a dictionnary associating an AS to a set of area the physical links 
-        # belongs to
-        self.AS = defaultdict(set)
         super().__init__()
         
 class PseudoWire(Route):
@@ -1032,10 +1226,6 @@ class PseudoWire(Route):
     
     @initializer
     def __init__(self, **kwargs):
-        # list of AS to which the physical links belongs. AS is actually 
-        # a dictionnary associating an AS to a set of area the physical links 
-        # belongs to
-        self.AS = defaultdict(set)
         super().__init__()
         
 class BGPPeering(Route):
@@ -1047,10 +1237,6 @@ class BGPPeering(Route):
     
     @initializer
     def __init__(self, **kwargs):
-        # list of AS to which the physical links belongs. AS is actually 
-        # a dictionnary associating an AS to a set of area the physical links 
-        # belongs to
-        self.AS = defaultdict(set)
         super().__init__()
         
 class Traffic(Link):
@@ -1060,6 +1246,10 @@ class Traffic(Link):
     dash = (7,1,1,1)
     layer = 4
     
+    # path of the traffic, computed by the routing algorithms
+    __slots__ = property_slots(Link, traffic_common_properties, 'path', 
+                                                        exclude=('subtype',))
+    
     @initializer
     def __init__(self, **kwargs):
         super().__init__()
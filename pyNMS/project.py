@@ -161,6 +161,8 @@ class Project(QWidget):
                     if subtype in link_subtype: 
                         self.network_view.network.lf(subtype=subtype, **kwargs)
                         
+        # contraction hierarchy saved with the project, if any
+        self.network_view.network.load_contraction_hierarchy(filepath + '.ch')
         self.network_view.refresh_display()
         self.network_view.move_to_geographical_coordinates()
         
@@ -194,6 +196,7 @@ class Project(QWidget):
             }
 
             dump(project_objects, file, default_flow_style=False)
+        self.network_view.network.save_contraction_hierarchy(filepath + '.ch')
     
     def excel_import(self, filepath=None):
         if not filepath:
@@ -291,6 +294,8 @@ class Project(QWidget):
                         value = self.network.objectizer(property, args[idx])
                         interface(AS.name, property, value)   
                         
+        # contraction hierarchy saved with the project, if any
+        self.network_view.network.load_contraction_hierarchy(filepath + '.ch')
         self.network_view.refresh_display()
         self.network_view.move_to_geographical_coordinates()
         
@@ -393,6 +398,7 @@ class Project(QWidget):
                 site_sheet.write(cpt, 2, to_string(site.ps['link']))
                 
         excel_workbook.save(selected_file)
+        self.network_view.network.save_contraction_hierarchy(selected_file + '.ch')
         # selected_file.close()
         
     def import_site(self):
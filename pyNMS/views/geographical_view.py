@@ -15,7 +15,6 @@
 from collections import OrderedDict
 from os.path import join
 from .base_view import BaseView
-from math import asin, cos, radians, sin, sqrt
 try:
     import shapefile
     import shapely.geometry
@@ -80,19 +79,7 @@ class GeographicalView(BaseView):
             gnode.x, gnode.y = gnode.node.logical_x, gnode.node.logical_y
         
     def haversine_distance(self, s, d):
-        coord = (s.longitude, s.latitude, d.longitude, d.latitude)
-        # decimal degrees to radians conversion
-        lon_s, lat_s, lon_d, lat_d = map(radians, coord)
-    
-        delta_lon = lon_d - lon_s 
-        delta_lat = lat_d - lat_s 
-        a = sin(delta_lat/2)**2 + cos(lat_s)*cos(lat_d)*sin(delta_lon/2)**2
-        c = 2*asin(sqrt(a)) 
-        
-        # radius of earth (km)
-        r = 6371 
-        
-        return c*r
+        return self.network.haversine_distance(s, d)
                 
 class Map():
 
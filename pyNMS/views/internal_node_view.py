@@ -1,5 +1,6 @@
 from .base_view import BaseView
 
+from .view_observer import ViewObserver
 from networks.graph import Graph
 
 class InternalNodeView(BaseView):
@@ -11,7 +12,7 @@ class InternalNodeView(BaseView):
         self.gnode = gnode
         self.node = gnode.node
         self.parent_view = gnode.view
-        self.network = Graph(self)
+        self.network = Graph(ViewObserver(self))
         super().__init__(controller)
         controller.current_project.hlayout.addWidget(self)
         self.hide()
@@ -79,9 +79,8 @@ class InternalSiteView(NetworkView):
                  
     overrider(NetworkView)
     def remove_objects(self, *items):
-        for item in items:
-            main_item = item.object.gobject[self.network_view]
-            self.network_view.remove_objects(main_item)
+        self.network_view.remove_objects(*(item.object.gobject[self.network_view]
+                                                            for item in items))
         
     @update_paths
     def dropEvent(self, event):
@@ -4,6 +4,7 @@ from graphical_objects.graphical_network_node import GraphicalNetworkNode
 from graphical_objects.graphical_link import GraphicalLink
 from math import sqrt
 from networks.network import Network
+from .view_observer import ViewObserver
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
@@ -15,7 +16,7 @@ class MainNetworkView(GeographicalView, NetworkView):
     menu_type = 'network'
 
     def __init__(self, controller):
-        self.network = Network(self)
+        self.network = Network(ViewObserver(self))
         super().__init__(controller)
         
     # given a graphical node, retrieves all attached graphical links    
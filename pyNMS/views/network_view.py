@@ -71,22 +71,22 @@ class NetworkView(BaseView):
     ## Object deletion
     
     def remove_objects(self, *items):
-        for item in items:
-            obj = item.object
-            item.self_destruction()
-            # remove it from all AS it belongs to
-            if hasattr(obj, 'AS'):
-                for AS in list(obj.AS):
-                    AS.management.remove_from_AS(obj)
-            # remove it from all sites it belongs to
-            for site in set(obj.sites):
-                site.view.remove_from_site(obj)
-            # if it is a node, remove all links attached to the node
-            if self.is_node(item):
-                for link in self.network.remove_node(obj):
-                    self.remove_objects(link.glink[self])
-            else:
-                self.network.remove_link(obj)
+        # the objects and all links attached to the nodes are removed from 
+        # the model at once
+        removed = self.network.remove_many([item.object for item in items])
+        # then the graphical items are removed in a single scene update, 
+        # from this view and from the internal view of the sites they 
+        # belong to, which also indexes its items by object
+        self.setUpdatesEnabled(False)
+        for obj in removed:
+            gobjects = obj.gnode if obj.class_type == 'node' else obj.glink
+            for view, item in gobjects.items():
+                item.self_destruction()
+                if hasattr(view, 'gobj'):
+                    view.gobj.pop(obj, None)
+            gobjects.clear()
+            obj.gobject.clear()
+        self.setUpdatesEnabled(True)
                 
     ## Change display
     
@@ -14,6 +14,7 @@
 
 from graphical_objects.graphical_site import GraphicalSite
 from .geographical_view import GeographicalView
+from .view_observer import ViewObserver
 from networks.sites import Sites
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -25,7 +26,7 @@ class SiteView(GeographicalView):
     menu_type = 'site'
 
     def __init__(self, *args, **kwargs):
-        self.network = Sites(self)
+        self.network = Sites(ViewObserver(self))
         super().__init__(*args, **kwargs)
         
     def draw_objects(self, sites):
@@ -0,0 +1,38 @@
+# Copyright (C) 2017 Antoine Fourmy <antoine dot fourmy at gmail dot com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from networks.observer import NetworkObserver
+
+# GUI observer of a network: GUI callbacks of the network engine are
+# forwarded to the view and the controller
+class ViewObserver(NetworkObserver):
+
+    def __init__(self, view):
+        self.view = view
+
+    def get_credentials(self):
+        return self.view.controller.credentials_window.get_credentials()
+
+    def refresh_display(self):
+        self.view.refresh_display()
+
+    def new_network(self, network, name):
+        return self.view.controller.add_project(name).network
+
+    def AS_management(self, AS, is_imported):
+        # the management windows are only imported when a GUI is running
+        from autonomous_system import AS_management
+        management = getattr(AS_management, AS.AS_type + '_Management')
+        return management(AS, is_imported, self.view)
+